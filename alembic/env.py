@@ -15,6 +15,9 @@ sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
 from app.core.settings import settings
 from app.db.database import engine
 from app.db.models_sqlmodel import Post  # importa tus modelos para autogenerate
+from app.db.models_counts import PostCount
+from app.db.models_stats import VerticalStats, VerticalStatsDelta
+from app.db.models_jobs import PipelineJob
 
 # ------------------------------------------------------------
 # ⚙️ Configuración base de Alembic
@@ -0,0 +1,64 @@
+"""
+add (vertical, cluster_id) index for cluster-partitioned search + latest-run index on clusters
+
+Revision ID: 4b9d2e7f1a6c
+Revises: 7a3e51c2d9b8
+Create Date: 2026-10-19 22:14:05.381240
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "4b9d2e7f1a6c"
+down_revision: Union[str, Sequence[str], None] = "7a3e51c2d9b8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# CONCURRENTLY: sin bloquear escrituras en posts_sqlmodel mientras se
+# construye (no puede ir dentro de una transacción → autocommit_block).
+# Si un build concurrente falla deja un índice INVALID: DROP INDEX
+# CONCURRENTLY y volver a correr el upgrade.
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        # Listas de la búsqueda IVF (app/db/quantized.py, modo "ivf"): posts de
+        # los clusters sondeados + ruido (cluster_id IS NULL, también indexado).
+        op.create_index(
+            "ix_posts_sqlmodel_vertical_cluster",
+            "posts_sqlmodel",
+            ["vertical", "cluster_id"],
+            postgresql_where="deleted_at IS NULL",
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        # Última corrida de clustering por vertical (max(created_at))
+        op.create_index(
+            "ix_insights_clusters_vertical_created",
+            "insights_clusters",
+            ["vertical", "created_at"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_insights_clusters_vertical_created",
+            table_name="insights_clusters",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            "ix_posts_sqlmodel_vertical_cluster",
+            table_name="posts_sqlmodel",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,191 @@
+"""
+vertical_stats: append-only deltas folded periodically (no per-vertical row lock on writes)
+
+Revision ID: 5e8c1f3a7b20
+Revises: 4b9d2e7f1a6c
+Create Date: 2026-10-20 10:02:41.207331
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5e8c1f3a7b20"
+down_revision: Union[str, Sequence[str], None] = "4b9d2e7f1a6c"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Antes cada sentencia sobre posts_sqlmodel hacía upsert de la fila de su
+# vertical en vertical_stats: el lock de esa fila duraba hasta el commit y
+# serializaba a todos los workers de la vertical. Ahora el trigger solo
+# INSERTa deltas (sin conflictos) y `vertical_stats_fold()` los suma a
+# vertical_stats cada pocos segundos (app/db/stats.py).
+_ROW_DELTAS = """
+    SELECT vertical, {sign} AS d_total,
+           {sign} * (embedding IS NOT NULL)::int AS d_embedded,
+           {sign} * (enriched_at IS NOT NULL)::int AS d_enriched,
+           {sign} * (cluster_id IS NOT NULL)::int AS d_clustered
+    FROM {table} WHERE deleted_at IS NULL
+"""
+
+_APPEND = """
+        INSERT INTO vertical_stats_deltas (vertical, d_total, d_embedded, d_enriched, d_clustered)
+        SELECT vertical, sum(d_total), sum(d_embedded), sum(d_enriched), sum(d_clustered)
+        FROM ({deltas}) d
+        GROUP BY vertical
+        HAVING sum(d_total) <> 0 OR sum(d_embedded) <> 0
+            OR sum(d_enriched) <> 0 OR sum(d_clustered) <> 0;
+"""
+
+# Versión anterior (upsert directo), para el downgrade
+_UPSERT = """
+        INSERT INTO vertical_stats AS s (vertical, total, embedded, enriched, clustered, updated_at)
+        SELECT vertical, sum(d_total), sum(d_embedded), sum(d_enriched), sum(d_clustered), now()
+        FROM ({deltas}) d
+        GROUP BY vertical
+        HAVING sum(d_total) <> 0 OR sum(d_embedded) <> 0
+            OR sum(d_enriched) <> 0 OR sum(d_clustered) <> 0
+        ON CONFLICT (vertical) DO UPDATE SET
+            total = s.total + EXCLUDED.total,
+            embedded = s.embedded + EXCLUDED.embedded,
+            enriched = s.enriched + EXCLUDED.enriched,
+            clustered = s.clustered + EXCLUDED.clustered,
+            updated_at = now();
+"""
+
+_INSERTED = _ROW_DELTAS.format(sign=1, table="new_rows")
+_DELETED = _ROW_DELTAS.format(sign=-1, table="old_rows")
+
+
+def _apply_fn(body: str) -> str:
+    return """
+CREATE OR REPLACE FUNCTION vertical_stats_apply() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+""" + body.format(deltas=_INSERTED) + """
+    ELSIF TG_OP = 'UPDATE' THEN
+""" + body.format(deltas=_DELETED + " UNION ALL " + _INSERTED) + """
+    ELSE
+""" + body.format(deltas=_DELETED) + """
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+# Mueve los deltas visibles a vertical_stats. DELETE ... RETURNING: cada
+# delta se pliega una sola vez aunque corran dos folds a la vez (el segundo
+# espera el lock de la fila y la encuentra borrada). Devuelve cuántos plegó.
+FOLD_FN = """
+CREATE OR REPLACE FUNCTION vertical_stats_fold() RETURNS bigint AS $$
+DECLARE
+    folded bigint;
+BEGIN
+    WITH moved AS (
+        DELETE FROM vertical_stats_deltas
+        RETURNING vertical, d_total, d_embedded, d_enriched, d_clustered
+    ), summed AS (
+        SELECT vertical, count(*) AS n,
+               sum(d_total) AS total, sum(d_embedded) AS embedded,
+               sum(d_enriched) AS enriched, sum(d_clustered) AS clustered
+        FROM moved
+        GROUP BY vertical
+    ), applied AS (
+        INSERT INTO vertical_stats AS s (vertical, total, embedded, enriched, clustered, updated_at)
+        SELECT vertical, total, embedded, enriched, clustered, now() FROM summed
+        ON CONFLICT (vertical) DO UPDATE SET
+            total = s.total + EXCLUDED.total,
+            embedded = s.embedded + EXCLUDED.embedded,
+            enriched = s.enriched + EXCLUDED.enriched,
+            clustered = s.clustered + EXCLUDED.clustered,
+            updated_at = now()
+    )
+    SELECT coalesce(sum(n), 0) INTO folded FROM summed;
+    RETURN folded;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+# Recalcula desde cero (backfill y corrección manual). Bloquea los deltas
+# para que ninguna escritura quede a medio contar.
+REFRESH_FN = """
+CREATE OR REPLACE FUNCTION vertical_stats_refresh() RETURNS void AS $$
+BEGIN
+    LOCK TABLE vertical_stats, vertical_stats_deltas IN EXCLUSIVE MODE;
+    DELETE FROM vertical_stats_deltas;
+    DELETE FROM vertical_stats;
+    INSERT INTO vertical_stats (vertical, total, embedded, enriched, clustered, updated_at)
+    SELECT vertical, count(*), count(embedding), count(enriched_at), count(cluster_id), now()
+    FROM posts_sqlmodel
+    WHERE deleted_at IS NULL
+    GROUP BY vertical;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+REFRESH_FN_OLD = """
+CREATE OR REPLACE FUNCTION vertical_stats_refresh() RETURNS void AS $$
+BEGIN
+    LOCK TABLE vertical_stats IN EXCLUSIVE MODE;
+    DELETE FROM vertical_stats;
+    INSERT INTO vertical_stats (vertical, total, embedded, enriched, clustered, updated_at)
+    SELECT vertical, count(*), count(embedding), count(enriched_at), count(cluster_id), now()
+    FROM posts_sqlmodel
+    WHERE deleted_at IS NULL
+    GROUP BY vertical;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+# Lo que leen /health, el monitor y los conteos: plegado + deltas pendientes
+# (una sola sentencia → un solo snapshot, exacto aunque un fold corra en paralelo).
+LIVE_VIEW = """
+CREATE OR REPLACE VIEW vertical_stats_live AS
+SELECT vertical,
+       sum(total)::bigint AS total,
+       sum(embedded)::bigint AS embedded,
+       sum(enriched)::bigint AS enriched,
+       sum(clustered)::bigint AS clustered,
+       max(updated_at) AS updated_at
+FROM (
+    SELECT vertical, total, embedded, enriched, clustered, updated_at FROM vertical_stats
+    UNION ALL
+    SELECT vertical, d_total, d_embedded, d_enriched, d_clustered, created_at FROM vertical_stats_deltas
+) s
+GROUP BY vertical
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "vertical_stats_deltas",
+        sa.Column("id", sa.BigInteger(), sa.Identity(), nullable=False),
+        sa.Column("vertical", sqlmodel.sql.sqltypes.AutoString(length=255), nullable=False),
+        sa.Column("d_total", sa.BigInteger(), nullable=False),
+        sa.Column("d_embedded", sa.BigInteger(), nullable=False),
+        sa.Column("d_enriched", sa.BigInteger(), nullable=False),
+        sa.Column("d_clustered", sa.BigInteger(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.execute(_apply_fn(_APPEND))
+    op.execute(FOLD_FN)
+    op.execute(REFRESH_FN)
+    op.execute(LIVE_VIEW)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(_apply_fn(_UPSERT))
+    op.execute("SELECT vertical_stats_fold()")
+    op.execute("DROP VIEW IF EXISTS vertical_stats_live")
+    op.execute(REFRESH_FN_OLD)
+    op.execute("DROP FUNCTION IF EXISTS vertical_stats_fold()")
+    op.drop_table("vertical_stats_deltas")
@@ -0,0 +1,60 @@
+"""
+add embedding_bit (binary-quantized shadow of embedding) + sync trigger
+
+Revision ID: 7a3e51c2d9b8
+Revises: c0fa6e4f678e
+Create Date: 2026-10-19 20:31:48.027716
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from pgvector.sqlalchemy import BIT
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7a3e51c2d9b8"
+down_revision: Union[str, Sequence[str], None] = "c0fa6e4f678e"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Requiere pgvector >= 0.7 (binary_quantize / halfvec).
+# Filas nuevas o re-embebidas: el trigger mantiene la sombra en la misma
+# escritura. Las existentes las completa app/scripts/backfill_quantized.py
+# por lotes, que además crea los índices HNSW con CONCURRENTLY (acá
+# bloquearían la tabla durante todo el build).
+SYNC_FN = """
+CREATE OR REPLACE FUNCTION posts_embedding_bit_sync() RETURNS trigger AS $$
+BEGIN
+    IF NEW.embedding IS NULL THEN
+        NEW.embedding_bit := NULL;
+    ELSE
+        NEW.embedding_bit := binary_quantize(NEW.embedding)::bit(384);
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # nullable sin default: solo metadata, sin reescribir la tabla
+    op.add_column("posts_sqlmodel", sa.Column("embedding_bit", BIT(384), nullable=True))
+    op.execute(SYNC_FN)
+    op.execute(
+        "CREATE TRIGGER posts_embedding_bit_sync "
+        "BEFORE INSERT OR UPDATE OF embedding ON posts_sqlmodel "
+        "FOR EACH ROW EXECUTE FUNCTION posts_embedding_bit_sync()"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS ix_posts_sqlmodel_embedding_bit_hnsw")
+    op.execute("DROP INDEX IF EXISTS ix_posts_sqlmodel_embedding_half_hnsw")
+    op.execute("DROP TRIGGER IF EXISTS posts_embedding_bit_sync ON posts_sqlmodel")
+    op.execute("DROP FUNCTION IF EXISTS posts_embedding_bit_sync()")
+    op.drop_column("posts_sqlmodel", "embedding_bit")
@@ -0,0 +1,33 @@
+"""
+pipeline_jobs.rerun_requested: re-encolar un job mientras corre
+
+Revision ID: 8d41b6e2c9f3
+Revises: 5e8c1f3a7b20
+Create Date: 2026-10-20 11:37:12.480915
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8d41b6e2c9f3"
+down_revision: Union[str, Sequence[str], None] = "5e8c1f3a7b20"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # default constante → sin reescritura de la tabla (PG ≥ 11)
+    op.add_column(
+        "pipeline_jobs",
+        sa.Column("rerun_requested", sa.Boolean(), server_default=sa.text("false"), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("pipeline_jobs", "rerun_requested")
@@ -0,0 +1,118 @@
+"""
+add vertical_stats table + triggers
+
+Revision ID: 99724ae09d9d
+Revises: de2193dd237a
+Create Date: 2026-10-19 11:40:05.518830
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = "99724ae09d9d"
+down_revision: Union[str, Sequence[str], None] = "de2193dd237a"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Deltas por fila: +1 por cada fila nueva viva, -1 por cada fila vieja viva.
+# Los triggers son por sentencia (transition tables): un UPDATE masivo del
+# worker de embeddings aplica un upsert por vertical, no uno por fila.
+_ROW_DELTAS = """
+    SELECT vertical, {sign} AS d_total,
+           {sign} * (embedding IS NOT NULL)::int AS d_embedded,
+           {sign} * (enriched_at IS NOT NULL)::int AS d_enriched,
+           {sign} * (cluster_id IS NOT NULL)::int AS d_clustered
+    FROM {table} WHERE deleted_at IS NULL
+"""
+
+_APPLY = """
+        INSERT INTO vertical_stats AS s (vertical, total, embedded, enriched, clustered, updated_at)
+        SELECT vertical, sum(d_total), sum(d_embedded), sum(d_enriched), sum(d_clustered), now()
+        FROM ({deltas}) d
+        GROUP BY vertical
+        HAVING sum(d_total) <> 0 OR sum(d_embedded) <> 0
+            OR sum(d_enriched) <> 0 OR sum(d_clustered) <> 0
+        ON CONFLICT (vertical) DO UPDATE SET
+            total = s.total + EXCLUDED.total,
+            embedded = s.embedded + EXCLUDED.embedded,
+            enriched = s.enriched + EXCLUDED.enriched,
+            clustered = s.clustered + EXCLUDED.clustered,
+            updated_at = now();
+"""
+
+_INSERTED = _ROW_DELTAS.format(sign=1, table="new_rows")
+_DELETED = _ROW_DELTAS.format(sign=-1, table="old_rows")
+
+APPLY_FN = """
+CREATE OR REPLACE FUNCTION vertical_stats_apply() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+""" + _APPLY.format(deltas=_INSERTED) + """
+    ELSIF TG_OP = 'UPDATE' THEN
+""" + _APPLY.format(deltas=_DELETED + " UNION ALL " + _INSERTED) + """
+    ELSE
+""" + _APPLY.format(deltas=_DELETED) + """
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+# Recalcula desde cero (backfill y corrección manual:
+# `SELECT vertical_stats_refresh();`).
+REFRESH_FN = """
+CREATE OR REPLACE FUNCTION vertical_stats_refresh() RETURNS void AS $$
+BEGIN
+    LOCK TABLE vertical_stats IN EXCLUSIVE MODE;
+    DELETE FROM vertical_stats;
+    INSERT INTO vertical_stats (vertical, total, embedded, enriched, clustered, updated_at)
+    SELECT vertical, count(*), count(embedding), count(enriched_at), count(cluster_id), now()
+    FROM posts_sqlmodel
+    WHERE deleted_at IS NULL
+    GROUP BY vertical;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+TRIGGERS = {
+    "vertical_stats_ins": "AFTER INSERT ON posts_sqlmodel REFERENCING NEW TABLE AS new_rows",
+    "vertical_stats_upd": "AFTER UPDATE ON posts_sqlmodel REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows",
+    "vertical_stats_del": "AFTER DELETE ON posts_sqlmodel REFERENCING OLD TABLE AS old_rows",
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "vertical_stats",
+        sa.Column("vertical", sqlmodel.sql.sqltypes.AutoString(length=255), nullable=False),
+        sa.Column("total", sa.BigInteger(), nullable=False),
+        sa.Column("embedded", sa.BigInteger(), nullable=False),
+        sa.Column("enriched", sa.BigInteger(), nullable=False),
+        sa.Column("clustered", sa.BigInteger(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.PrimaryKeyConstraint("vertical"),
+    )
+    op.execute(APPLY_FN)
+    op.execute(REFRESH_FN)
+    for name, spec in TRIGGERS.items():
+        op.execute(
+            f"CREATE TRIGGER {name} {spec} "
+            "FOR EACH STATEMENT EXECUTE FUNCTION vertical_stats_apply()"
+        )
+    op.execute("SELECT vertical_stats_refresh()")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name in TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {name} ON posts_sqlmodel")
+    op.execute("DROP FUNCTION IF EXISTS vertical_stats_refresh()")
+    op.execute("DROP FUNCTION IF EXISTS vertical_stats_apply()")
+    op.drop_table("vertical_stats")
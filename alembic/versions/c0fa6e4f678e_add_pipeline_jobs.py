@@ -0,0 +1,123 @@
+"""
+add pipeline_jobs queue (+ trigger de posts nuevos, backfill, drop post lease)
+
+Revision ID: c0fa6e4f678e
+Revises: eeb093b89412
+Create Date: 2026-10-19 18:10:05.660371
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c0fa6e4f678e"
+down_revision: Union[str, Sequence[str], None] = "eeb093b89412"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Prioridades: mantener en sync con app/db/jobs.py (PRIORITY_FRESH / PRIORITY_BACKFILL)
+PRIORITY_FRESH = 100
+PRIORITY_BACKFILL = 0
+
+# Posts nuevos → jobs embed + classify con prioridad alta, en la misma
+# transacción del INSERT (un post commiteado siempre tiene su job).
+ENQUEUE_FN = """
+CREATE OR REPLACE FUNCTION pipeline_jobs_enqueue() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO pipeline_jobs (kind, key, vertical, priority)
+    SELECT 'embed', pid, vertical, """ + str(PRIORITY_FRESH) + """
+    FROM new_rows
+    WHERE embedding IS NULL AND deleted_at IS NULL
+    ON CONFLICT ON CONSTRAINT uq_pipeline_jobs_kind_key DO NOTHING;
+
+    INSERT INTO pipeline_jobs (kind, key, vertical, priority)
+    SELECT 'classify', pid, vertical, """ + str(PRIORITY_FRESH) + """
+    FROM new_rows
+    WHERE enriched_at IS NULL AND deleted_at IS NULL
+    ON CONFLICT ON CONSTRAINT uq_pipeline_jobs_kind_key DO NOTHING;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+BACKFILL = """
+INSERT INTO pipeline_jobs (kind, key, vertical, priority)
+SELECT '{kind}', pid, vertical, """ + str(PRIORITY_BACKFILL) + """
+FROM posts_sqlmodel
+WHERE {column} IS NULL AND deleted_at IS NULL
+ON CONFLICT ON CONSTRAINT uq_pipeline_jobs_kind_key DO NOTHING
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "pipeline_jobs",
+        sa.Column("id", sa.BigInteger(), sa.Identity(), nullable=False),
+        sa.Column("kind", sa.String(length=32), nullable=False),
+        sa.Column("key", sa.String(length=255), nullable=False),
+        sa.Column("vertical", sa.String(length=255), nullable=False),
+        sa.Column("priority", sa.SmallInteger(), server_default="0", nullable=False),
+        sa.Column("status", sa.String(length=16), server_default="pending", nullable=False),
+        sa.Column("attempts", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("max_attempts", sa.Integer(), server_default="5", nullable=False),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("run_after", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("lease_until", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("claimed_by", sa.String(length=100), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("kind", "key", name="uq_pipeline_jobs_kind_key"),
+    )
+    # claim: pendientes por prioridad/antigüedad; leases vencidos aparte.
+    # Los done/dead (la mayoría de la tabla) quedan fuera de ambos índices.
+    op.create_index(
+        "ix_pipeline_jobs_ready",
+        "pipeline_jobs",
+        ["kind", sa.text("priority DESC"), "run_after"],
+        postgresql_where="status = 'pending'",
+    )
+    op.create_index(
+        "ix_pipeline_jobs_leased",
+        "pipeline_jobs",
+        ["kind", "lease_until"],
+        postgresql_where="status = 'running'",
+    )
+
+    op.execute(ENQUEUE_FN)
+    op.execute(
+        "CREATE TRIGGER pipeline_jobs_enqueue "
+        "AFTER INSERT ON posts_sqlmodel REFERENCING NEW TABLE AS new_rows "
+        "FOR EACH STATEMENT EXECUTE FUNCTION pipeline_jobs_enqueue()"
+    )
+
+    # Backlog existente → prioridad de backfill (los posts nuevos pasan delante)
+    op.execute(BACKFILL.format(kind="embed", column="embedding"))
+    op.execute(BACKFILL.format(kind="classify", column="enriched_at"))
+
+    # El lease por post (eeb093b89412) ahora vive en el job
+    op.drop_column("posts_sqlmodel", "embedding_lease_until")
+    op.drop_column("posts_sqlmodel", "embedding_claimed_by")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column(
+        "posts_sqlmodel",
+        sa.Column("embedding_claimed_by", sa.String(length=100), nullable=True),
+    )
+    op.add_column(
+        "posts_sqlmodel",
+        sa.Column("embedding_lease_until", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.execute("DROP TRIGGER IF EXISTS pipeline_jobs_enqueue ON posts_sqlmodel")
+    op.execute("DROP FUNCTION IF EXISTS pipeline_jobs_enqueue()")
+    op.drop_index("ix_pipeline_jobs_leased", table_name="pipeline_jobs")
+    op.drop_index("ix_pipeline_jobs_ready", table_name="pipeline_jobs")
+    op.drop_table("pipeline_jobs")
@@ -0,0 +1,66 @@
+"""
+add posts_inserted NOTIFY trigger + pending-embedding index
+
+Revision ID: d87131f0285f
+Revises: 99724ae09d9d
+Create Date: 2026-10-19 14:05:12.204518
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d87131f0285f"
+down_revision: Union[str, Sequence[str], None] = "99724ae09d9d"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Un NOTIFY por sentencia y vertical (no por fila): un batch del scraper de
+# 1000 posts despierta al worker una vez. Se entrega al hacer COMMIT.
+NOTIFY_FN = """
+CREATE OR REPLACE FUNCTION posts_inserted_notify() RETURNS trigger AS $$
+DECLARE
+    r record;
+BEGIN
+    FOR r IN
+        SELECT vertical, count(*) AS n
+        FROM new_rows
+        WHERE embedding IS NULL AND deleted_at IS NULL
+        GROUP BY vertical
+    LOOP
+        PERFORM pg_notify(
+            'posts_inserted',
+            json_build_object('vertical', r.vertical, 'n', r.n)::text
+        );
+    END LOOP;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(NOTIFY_FN)
+    op.execute(
+        "CREATE TRIGGER posts_inserted_notify "
+        "AFTER INSERT ON posts_sqlmodel REFERENCING NEW TABLE AS new_rows "
+        "FOR EACH STATEMENT EXECUTE FUNCTION posts_inserted_notify()"
+    )
+    # Cola del worker: pendientes por antigüedad (fetch + lag sin escanear la tabla)
+    op.create_index(
+        "ix_posts_sqlmodel_pending_embedding",
+        "posts_sqlmodel",
+        ["created_at"],
+        postgresql_where="embedding IS NULL AND deleted_at IS NULL",
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_posts_sqlmodel_pending_embedding", table_name="posts_sqlmodel")
+    op.execute("DROP TRIGGER IF EXISTS posts_inserted_notify ON posts_sqlmodel")
+    op.execute("DROP FUNCTION IF EXISTS posts_inserted_notify()")
@@ -0,0 +1,37 @@
+"""
+add post_counts table
+
+Revision ID: de2193dd237a
+Revises: efa29e790a51
+Create Date: 2026-10-19 10:12:31.402117
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = "de2193dd237a"
+down_revision: Union[str, Sequence[str], None] = "efa29e790a51"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "post_counts",
+        sa.Column("vertical", sqlmodel.sql.sqltypes.AutoString(length=255), nullable=False),
+        sa.Column("cluster_id", sqlmodel.sql.sqltypes.AutoString(length=100), nullable=False),
+        sa.Column("total", sa.BigInteger(), nullable=False),
+        sa.Column("refreshed_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.PrimaryKeyConstraint("vertical", "cluster_id"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("post_counts")
@@ -0,0 +1,38 @@
+"""
+add embedding lease columns (work-claiming entre réplicas del worker)
+
+Revision ID: eeb093b89412
+Revises: d87131f0285f
+Create Date: 2026-10-19 16:42:37.518204
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "eeb093b89412"
+down_revision: Union[str, Sequence[str], None] = "d87131f0285f"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Columnas nullable sin default: ADD COLUMN es solo metadata (sin reescribir la tabla)
+    op.add_column(
+        "posts_sqlmodel",
+        sa.Column("embedding_claimed_by", sa.String(length=100), nullable=True),
+    )
+    op.add_column(
+        "posts_sqlmodel",
+        sa.Column("embedding_lease_until", sa.DateTime(timezone=True), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("posts_sqlmodel", "embedding_lease_until")
+    op.drop_column("posts_sqlmodel", "embedding_claimed_by")
@@ -0,0 +1,217 @@
+# app/api/cache.py
+"""
+Cache de respuestas para listados/búsquedas calientes.
+
+- Clave: vertical + generación + ruta + query params normalizados.
+- Tier local: LRU en proceso con TTL.
+- Tier compartido opcional (Redis o diskcache): entradas + contador de
+  generación por vertical, así una escritura en un worker invalida a todos.
+- Invalidación: `invalidate(vertical)` sube la generación → las claves viejas
+  dejan de usarse y expiran solas (sin scans ni deletes masivos).
+- ETag / If-None-Match → 304 sin payload.
+"""
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from fastapi import Request, Response
+
+from app.core.logger import logger
+from app.core.settings import settings
+
+
+@dataclass(frozen=True)
+class CachedBody:
+    body: bytes
+    etag: str
+    media_type: str = "application/json"
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = {t.strip().removeprefix("W/") for t in header.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+# ============================================================
+# 🧠 Tier local (LRU + TTL)
+# ============================================================
+class LocalLRU:
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: "OrderedDict[str, Tuple[float, CachedBody]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[CachedBody]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        stored_at, value = item
+        if time.monotonic() - stored_at > self.ttl:
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: CachedBody) -> None:
+        self._data[key] = (time.monotonic(), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+
+# ============================================================
+# 🌐 Tiers compartidos (opcionales)
+# ============================================================
+class RedisTier:
+    def __init__(self, url: str, ttl: float):
+        import redis.asyncio as redis  # opcional
+
+        self.client = redis.from_url(url)
+        self.ttl = ttl
+
+    async def get(self, key: str) -> Optional[CachedBody]:
+        raw = await self.client.get(f"rc:v:{key}")
+        if raw is None:
+            return None
+        etag, body = raw.split(b"\n", 1)
+        return CachedBody(body=body, etag=etag.decode())
+
+    async def set(self, key: str, value: CachedBody) -> None:
+        await self.client.set(
+            f"rc:v:{key}", value.etag.encode() + b"\n" + value.body, px=int(self.ttl * 1000)
+        )
+
+    async def generation(self, vertical: str) -> int:
+        return int(await self.client.get(f"rc:gen:{vertical}") or 0)
+
+    async def bump(self, vertical: str) -> int:
+        return int(await self.client.incr(f"rc:gen:{vertical}"))
+
+
+class DiskTier:
+    """diskcache es I/O de disco bloqueante (SQLite + archivos): va a un hilo."""
+
+    def __init__(self, directory: str, ttl: float):
+        import diskcache  # opcional
+
+        self.cache = diskcache.Cache(directory)
+        self.ttl = ttl
+
+    async def get(self, key: str) -> Optional[CachedBody]:
+        return await asyncio.to_thread(self.cache.get, f"v:{key}")
+
+    async def set(self, key: str, value: CachedBody) -> None:
+        await asyncio.to_thread(self.cache.set, f"v:{key}", value, expire=self.ttl)
+
+    async def generation(self, vertical: str) -> int:
+        return int(await asyncio.to_thread(self.cache.get, f"gen:{vertical}", 0))
+
+    async def bump(self, vertical: str) -> int:
+        return int(await asyncio.to_thread(self.cache.incr, f"gen:{vertical}"))
+
+
+# ============================================================
+# 🗃️ Cache de respuestas
+# ============================================================
+class ResponseCache:
+    def __init__(self, local: LocalLRU, shared=None, enabled: bool = True):
+        self.local = local
+        self.shared = shared
+        self.enabled = enabled
+        self._generations: Dict[str, int] = {}
+
+    async def _generation(self, vertical: str) -> int:
+        if self.shared is not None:
+            try:
+                return await self.shared.generation(vertical)
+            except Exception as e:
+                logger.warning("Shared cache unavailable (generation): %s", e)
+        return self._generations.get(vertical, 0)
+
+    async def key_for(self, request: Request, vertical: str) -> str:
+        params = "&".join(
+            f"{k}={v}" for k, v in sorted(request.query_params.multi_items())
+        )
+        gen = await self._generation(vertical)
+        return f"{vertical}:{gen}:{request.url.path}?{params}"
+
+    async def get(self, key: str) -> Optional[CachedBody]:
+        if not self.enabled:
+            return None
+        value = self.local.get(key)
+        if value is None and self.shared is not None:
+            try:
+                value = await self.shared.get(key)
+            except Exception as e:
+                logger.warning("Shared cache unavailable (get): %s", e)
+            if value is not None:
+                self.local.set(key, value)
+        return value
+
+    async def set(self, key: str, value: CachedBody) -> None:
+        if not self.enabled:
+            return
+        self.local.set(key, value)
+        if self.shared is not None:
+            try:
+                await self.shared.set(key, value)
+            except Exception as e:
+                logger.warning("Shared cache unavailable (set): %s", e)
+
+    async def invalidate(self, vertical: str) -> None:
+        """Invalida todas las entradas de la vertical (tras create/update/delete)."""
+        self._generations[vertical] = self._generations.get(vertical, 0) + 1
+        if self.shared is not None:
+            try:
+                await self.shared.bump(vertical)
+            except Exception as e:
+                logger.warning("Shared cache unavailable (invalidate): %s", e)
+
+    # ------------------------------------------------------------
+    # Helpers de respuesta
+    # ------------------------------------------------------------
+    @staticmethod
+    def respond(request: Request, cached: CachedBody, status: str) -> Response:
+        headers = {"ETag": cached.etag, "X-Cache": status}
+        if etag_matches(request, cached.etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=cached.body, media_type=cached.media_type, headers=headers)
+
+    async def store(self, request: Request, key: str, response: Response) -> Response:
+        """Guarda el body renderizado y responde (304 si el cliente ya lo tiene)."""
+        cached = CachedBody(
+            body=response.body,
+            etag=make_etag(response.body),
+            media_type=response.media_type or "application/json",
+        )
+        await self.set(key, cached)
+        return self.respond(request, cached, "MISS")
+
+
+def _build_shared_tier():
+    backend = settings.response_cache_backend
+    try:
+        if backend == "redis" and settings.redis_url:
+            return RedisTier(settings.redis_url, settings.response_cache_ttl)
+        if backend == "disk":
+            return DiskTier(settings.response_cache_dir, settings.response_cache_ttl)
+    except ImportError:
+        logger.warning("Response cache backend %r not installed, using memory only", backend)
+    return None
+
+
+response_cache = ResponseCache(
+    LocalLRU(settings.response_cache_max_entries, settings.response_cache_ttl),
+    shared=_build_shared_tier(),
+    enabled=settings.response_cache_enabled,
+)
@@ -1,15 +1,18 @@
 # app/api/deps.py
+import secrets
 from typing import Generator, AsyncGenerator, Annotated, TypeAlias
-from fastapi import Depends
+from fastapi import Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.db.database import SessionLocal, async_session_maker
+from app.db.database import get_session_maker, get_async_session_maker
+from app.db.replicas import replica_router
 from app.core.logger import logger
+from app.core.settings import settings
 
 # ---------- SYNC ----------
 def get_db() -> Generator[Session, None, None]:
     """Sync DB dependency."""
-    db = SessionLocal()
+    db = get_session_maker()()
     try:
         yield db
     except Exception as e:
@@ -23,7 +26,7 @@ DbDep: TypeAlias = Annotated[Session, Depends(get_db)]
 # ---------- ASYNC ----------
 async def get_db_async() -> AsyncGenerator[AsyncSession, None]:
     """Async DB dependency."""
-    async with async_session_maker() as db:
+    async with get_async_session_maker()() as db:
         try:
             yield db
         except Exception as e:
@@ -32,10 +35,50 @@ async def get_db_async() -> AsyncGenerator[AsyncSession, None]:
 
 AsyncDbDep: TypeAlias = Annotated[AsyncSession, Depends(get_db_async)]
 
+# ---------- INTERNAL KEY ----------
+def _valid_internal_key(key: str) -> bool:
+    return secrets.compare_digest(key, settings.internal_api_key.get_secret_value())
+
+
+def check_internal_key(key: str) -> None:
+    """403 salvo X-Internal-Key válida (comparación en tiempo constante)."""
+    if not _valid_internal_key(key):
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+# ---------- ASYNC READ (réplicas) ----------
+def is_internal_request(request: Request) -> bool:
+    key = request.headers.get("X-Internal-Key")
+    return bool(key) and _valid_internal_key(key)
+
+
+async def read_session_maker(request: Request):
+    """
+    Maker de solo lectura: réplica sana si hay; llamadas internas
+    (X-Internal-Key válida) quedan pineadas al primario para leer sus
+    propias escrituras. Directo (sin dependency) para respuestas en
+    streaming: la dependency cierra su sesión antes de que se itere el body.
+    """
+    maker = None
+    if not is_internal_request(request):
+        maker = await replica_router.session_maker()
+    return maker or get_async_session_maker()
+
+
+async def get_read_db_async(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """Async DB dependency de solo lectura (ver `read_session_maker`)."""
+    async with (await read_session_maker(request))() as db:
+        try:
+            yield db
+        except Exception as e:
+            logger.error("Async read DB session error", exc_info=True)
+            raise
+
+AsyncReadDbDep: TypeAlias = Annotated[AsyncSession, Depends(get_read_db_async)]
+
 # ---------- TEST HELPERS ----------
 def override_get_db() -> Generator[Session, None, None]:
     """Override for sync tests."""
-    db = SessionLocal()
+    db = get_session_maker()()
     try:
         yield db
     finally:
@@ -43,5 +86,5 @@ def override_get_db() -> Generator[Session, None, None]:
 
 async def override_get_db_async() -> AsyncGenerator[AsyncSession, None]:
     """Override for async tests."""
-    async with async_session_maker() as db:
+    async with get_async_session_maker()() as db:
         yield db
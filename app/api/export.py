@@ -0,0 +1,179 @@
+# app/api/export.py
+"""
+Export en streaming de posts (GET /posts/export, interno).
+
+Cursor del lado del servidor (`AsyncSession.stream` + `yield_per`) →
+un chunk serializado por partición → `StreamingResponse`. Memoria
+constante: nunca hay más de EXPORT_CHUNK filas en el proceso, sin
+importar cuántos millones se exporten. Sin OFFSET ni COUNT.
+
+Formatos: ndjson | csv | arrow (IPC stream; requiere pyarrow).
+`embedding` (opt-in) va como float32 little-endian crudo: base64 en
+ndjson/csv, fixed_size_list<float32>[384] en arrow.
+"""
+import base64
+import csv
+import io
+import json
+from datetime import datetime
+from typing import AsyncIterator, Callable, List, Optional, Sequence
+
+import numpy as np
+import orjson
+from sqlalchemy import select
+
+from app.db.models_sqlmodel import Post
+
+try:
+    import pyarrow as pa
+    USE_ARROW = True
+except ImportError:
+    USE_ARROW = False
+
+EXPORT_CHUNK = 2000
+DIM = 384
+
+EXPORT_COLUMNS = (
+    "pid", "title", "body", "vertical", "category", "confidence", "score",
+    "n_comments", "cluster_id", "is_relevant", "summary", "tags",
+    "enriched_at", "embedding_attempt_at", "created_at", "updated_at", "deleted_at",
+    "embedding",
+)
+DEFAULT_COLUMNS = tuple(c for c in EXPORT_COLUMNS if c != "embedding")
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+
+def parse_columns(raw: Optional[str]) -> List[str]:
+    """`pid,title,embedding` → lista validada (ValueError si hay desconocidas)."""
+    if not raw:
+        return list(DEFAULT_COLUMNS)
+    columns = [c.strip() for c in raw.split(",") if c.strip()]
+    unknown = [c for c in columns if c not in EXPORT_COLUMNS]
+    if unknown or not columns:
+        raise ValueError(f"Unknown columns: {unknown} (valid: {', '.join(EXPORT_COLUMNS)})")
+    return list(dict.fromkeys(columns))  # sin duplicados, mismo orden
+
+
+def export_query(
+    columns: Sequence[str],
+    vertical: str,
+    updated_after: Optional[datetime] = None,
+    include_deleted: bool = False,
+):
+    """Orden por pid (PK: scan por índice, sin sort) → export reanudable por pid."""
+    stmt = select(*(getattr(Post, c) for c in columns)).where(Post.vertical == vertical)
+    if not include_deleted:
+        stmt = stmt.where(Post.deleted_at.is_(None))
+    if updated_after is not None:
+        stmt = stmt.where(Post.updated_at > updated_after)
+    return stmt.order_by(Post.pid).execution_options(yield_per=EXPORT_CHUNK)
+
+
+def _embedding_bytes(value) -> Optional[bytes]:
+    if value is None:
+        return None
+    return np.asarray(value, dtype="<f4").tobytes()
+
+
+# ============================================================
+# 🧾 Serializadores (una partición → bytes)
+# ============================================================
+def _ndjson(columns: Sequence[str]) -> Callable[[Sequence], bytes]:
+    emb = columns.index("embedding") if "embedding" in columns else None
+
+    def encode(rows) -> bytes:
+        out = []
+        for row in rows:
+            record = dict(zip(columns, row))
+            if emb is not None and row[emb] is not None:
+                record["embedding"] = base64.b64encode(_embedding_bytes(row[emb])).decode("ascii")
+            out.append(orjson.dumps(record, option=orjson.OPT_UTC_Z))
+        return b"\n".join(out) + b"\n" if out else b""
+
+    return encode
+
+
+def _csv_value(column: str, value):
+    if value is None:
+        return ""
+    if column == "embedding":
+        return base64.b64encode(_embedding_bytes(value)).decode("ascii")
+    if column == "tags":
+        return json.dumps(value, ensure_ascii=False)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _csv(columns: Sequence[str]) -> Callable[[Sequence], bytes]:
+    def encode(rows) -> bytes:
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        writer.writerows([[_csv_value(c, v) for c, v in zip(columns, row)] for row in rows])
+        return buf.getvalue().encode("utf-8")
+
+    return encode
+
+
+def _arrow_schema(columns: Sequence[str]):
+    types = {
+        "confidence": pa.float64(),
+        "score": pa.float64(),
+        "n_comments": pa.int64(),
+        "is_relevant": pa.bool_(),
+        "enriched_at": pa.timestamp("us", tz="UTC"),
+        "embedding_attempt_at": pa.timestamp("us", tz="UTC"),
+        "created_at": pa.timestamp("us", tz="UTC"),
+        "updated_at": pa.timestamp("us", tz="UTC"),
+        "deleted_at": pa.timestamp("us", tz="UTC"),
+        "embedding": pa.list_(pa.float32(), DIM),
+    }
+    return pa.schema([(c, types.get(c, pa.string())) for c in columns])
+
+
+def _arrow_column(column: str, values: list, type_):
+    if column == "embedding":
+        # buffer float32 contiguo → FixedSizeList sin convertir float a float
+        valid = np.array([v is not None for v in values])
+        flat = np.zeros((len(values), DIM), dtype=np.float32)
+        if valid.any():
+            flat[valid] = np.stack([v for v in values if v is not None])
+        return pa.FixedSizeListArray.from_arrays(pa.array(flat.ravel()), DIM, mask=pa.array(~valid))
+    if column == "tags":
+        values = [json.dumps(v, ensure_ascii=False) if v is not None else None for v in values]
+    return pa.array(values, type=type_)
+
+
+# ============================================================
+# 🚰 Stream
+# ============================================================
+async def stream_export(session_maker, stmt, columns: Sequence[str], fmt: str) -> AsyncIterator[bytes]:
+    async with session_maker() as db:
+        result = await db.stream(stmt)
+
+        if fmt == "arrow":
+            schema = _arrow_schema(columns)
+            sink = io.BytesIO()
+            with pa.ipc.new_stream(sink, schema) as writer:
+                async for rows in result.partitions():
+                    by_column = list(zip(*rows))
+                    writer.write_batch(pa.record_batch(
+                        [_arrow_column(c, list(v), t) for c, v, t in zip(columns, by_column, schema.types)],
+                        schema=schema,
+                    ))
+                    yield sink.getvalue()
+                    sink.seek(0)
+                    sink.truncate()
+            yield sink.getvalue()  # schema (si no hubo filas) + fin de stream
+            return
+
+        encode = _ndjson(columns) if fmt == "ndjson" else _csv(columns)
+        if fmt == "csv":
+            yield (",".join(columns) + "\r\n").encode("utf-8")
+        async for rows in result.partitions():
+            yield encode(rows)
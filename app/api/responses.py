@@ -0,0 +1,60 @@
+# app/api/responses.py
+"""
+Fast path de serialización para endpoints de listado.
+
+En vez de hidratar `Post` completos (embedding incluido) y validar cada item
+con pydantic, seleccionamos solo las columnas de `PostOut` y armamos el JSON
+directo desde las tuplas con orjson.
+"""
+from typing import Any, Dict, List, Sequence
+
+import orjson
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import select
+
+from app.api.schemas import PostOut
+from app.db.models_sqlmodel import Post
+
+
+class FastJSONResponse(ORJSONResponse):
+    """ORJSONResponse con datetimes UTC como `Z` (mismo formato que pydantic)."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content,
+            option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY,
+        )
+
+
+# Columnas exactas que necesita PostOut (mismo orden que el schema)
+POST_OUT_FIELDS = tuple(PostOut.model_fields)
+POST_OUT_COLUMNS = tuple(getattr(Post, name) for name in POST_OUT_FIELDS)
+
+
+def select_post_out():
+    """`select()` solo con las columnas de PostOut (sin embedding)."""
+    return select(*POST_OUT_COLUMNS)
+
+
+def rows_to_items(rows: Sequence[Sequence[Any]]) -> List[Dict[str, Any]]:
+    """Tuplas → dicts con las claves de PostOut, sin validación."""
+    fields = POST_OUT_FIELDS
+    return [dict(zip(fields, row)) for row in rows]
+
+
+def post_list_payload(
+    items: List[Dict[str, Any]],
+    total: int,
+    limit: int,
+    offset: int,
+    total_is_estimate: bool = False,
+) -> Dict[str, Any]:
+    """Mismo shape que PostListOut."""
+    return {
+        "total": total,
+        "items": items,
+        "limit": limit,
+        "offset": offset,
+        "has_more": len(items) == limit,
+        "total_is_estimate": total_is_estimate,
+    }
@@ -0,0 +1,36 @@
+# app/api/routes/debug.py
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from app.api.deps import check_internal_key
+from app.core.profiling import profile_for
+
+router = APIRouter()
+
+
+# ---------------------------------------------------------
+# GET /debug/profile (interno)
+# ---------------------------------------------------------
+@router.get("/profile", response_class=PlainTextResponse, include_in_schema=False)
+async def profile(
+    seconds: float = Query(10, gt=0, le=60),
+    interval_ms: float = Query(5, ge=1, le=100),
+    idle: bool = Query(False, description="Incluir frames en espera (select, locks)"),
+    x_internal_key: str = Header(..., alias="X-Internal-Key"),
+):
+    """
+    Perfil estadístico del proceso durante `seconds` (el worker que atiende
+    la request; con varios workers, repetir o perfilar cada uno).
+    Stacks colapsados: `flamegraph.pl out.txt > out.svg` o speedscope.app.
+    """
+    check_internal_key(x_internal_key)
+
+    try:
+        profiler = await profile_for(seconds, interval_ms / 1000, include_idle=idle)
+    except RuntimeError:
+        raise HTTPException(status_code=409, detail="Profile already running")
+
+    return PlainTextResponse(
+        profiler.collapsed(),
+        headers={"X-Profile-Samples": str(profiler.samples)},
+    )
@@ -1,26 +1,52 @@
 from datetime import datetime
 from typing import Optional
 
-from fastapi import APIRouter, Query, Header, HTTPException
+import orjson
+from fastapi import APIRouter, Query, Header, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy import func, select, or_, update, text
 from sqlalchemy.exc import SQLAlchemyError
-from asyncio import TimeoutError, timeout as async_timeout
-
-from app.api.deps import AsyncDbDep
+from asyncio import TimeoutError, timeout as async_timeout, to_thread
+
+from app.api import export
+from app.api.cache import response_cache
+from app.api.deps import AsyncDbDep, AsyncReadDbDep, check_internal_key
+from app.api.responses import (
+    FastJSONResponse,
+    post_list_payload,
+    rows_to_items,
+    select_post_out,
+)
+from app.db.counts import CountStrategy, bump_counts, count_posts
+from app.db.database import get_async_session_maker
+from app.db.replicas import replica_router
 from app.db.models_sqlmodel import Post  # ← único modelo
+from app.db.quantized import (
+    COMPACT_MODES,
+    MAX_CANDIDATES,
+    candidates_for,
+    semantic_batch_sql,
+    semantic_search_sql,
+    set_index_scan,
+)
 from app.api.schemas import (
+    NearestClusterOut,
+    NearestClustersOut,
     PostOut,
     PostListOut,
+    SemanticBatchIn,
     PostCreateIn,
     PostUpdateIn,
 )
 from app.core.logger import logger
+from app.core.metrics import span
 from app.core.settings import settings
-from app.ml.embeddings import cached_embed_query
+from app.ml.centroid_index import centroid_index
+from app.ml.embeddings import cached_embed_query, embed_queries
+from app.ml.vector_search import get_engine, search_posts, search_posts_batch
 
 router = APIRouter()
 
-COUNT_TIMEOUT = 1
 POSTS_TIMEOUT = 5
 
 
@@ -50,12 +76,21 @@ def build_base_filters(
     return filters
 
 
+async def get_count_state(db, pid: str):
+    """(cluster_id, deleted_at) actual del post, para ajustar post_counts por cluster."""
+    return (await db.execute(
+        select(Post.cluster_id, Post.deleted_at)
+        .where(Post.pid == pid, Post.vertical == settings.vertical)
+    )).first()
+
+
 # ---------------------------------------------------------
 # GET /posts (público)
 # ---------------------------------------------------------
-@router.get("/posts", response_model=PostListOut)
+@router.get("/posts", response_model=PostListOut, response_class=FastJSONResponse)
 async def read_posts(
-    db: AsyncDbDep,
+    request: Request,
+    db: AsyncReadDbDep,
     limit: int = Query(100, ge=1, le=1000),
     offset: int = Query(0, ge=0),
     after: Optional[datetime] = Query(
@@ -64,7 +99,15 @@ async def read_posts(
     cluster_id: Optional[str] = Query(
         None, description="Filtrar por cluster_id"
     ),
+    count_strategy: Optional[CountStrategy] = Query(
+        None, alias="count", description="exact | estimate | cached (default: settings)"
+    ),
 ):
+    cache_key = await response_cache.key_for(request, settings.vertical)
+    cached = await response_cache.get(cache_key)
+    if cached is not None:
+        return response_cache.respond(request, cached, "HIT")
+
     filters = build_base_filters(cluster_id=cluster_id)
 
     if after:
@@ -74,27 +117,26 @@ async def read_posts(
     # Count
     # -------------------------
     try:
-        async with async_timeout(COUNT_TIMEOUT):
-            total = await db.scalar(
-                select(func.count(Post.pid)).where(*filters)
-            )
-    except TimeoutError:
-        logger.error("Count timeout", exc_info=True)
-        raise HTTPException(status_code=504, detail="Count timeout")
+        count = await count_posts(
+            db, filters, count_strategy, cluster_id=cluster_id, cacheable=after is None
+        )
+    except SQLAlchemyError:
+        logger.error("DB error counting posts", exc_info=True)
+        raise HTTPException(status_code=500, detail="Database error")
 
     # -------------------------
     # Query
     # -------------------------
     try:
         async with async_timeout(POSTS_TIMEOUT):
-            result = await db.scalars(
-                select(Post)
+            result = await db.execute(
+                select_post_out()
                 .where(*filters)
                 .order_by(Post.created_at.desc())
                 .offset(offset)
                 .limit(limit)
             )
-            posts = result.all()
+            rows = result.all()
     except TimeoutError:
         logger.error("Select timeout", exc_info=True)
         raise HTTPException(status_code=504, detail="Select timeout")
@@ -102,55 +144,63 @@ async def read_posts(
         logger.error("DB error on read_posts", exc_info=True)
         raise HTTPException(status_code=500, detail="Database error")
 
-    return PostListOut(
-        total=total or 0,
-        items=[PostOut.from_orm(p) for p in posts],
-        limit=limit,
-        offset=offset,
-        has_more=len(posts) == limit,
+    # Fast path: tuplas → JSON (orjson) sin validación pydantic por item
+    return await response_cache.store(
+        request,
+        cache_key,
+        FastJSONResponse(post_list_payload(
+            rows_to_items(rows), count.total, limit, offset, count.is_estimate
+        )),
     )
 
 
 # ---------------------------------------------------------
 # GET /posts/search (texto plano, público)
 # ---------------------------------------------------------
-@router.get("/posts/search", response_model=PostListOut)
+@router.get("/posts/search", response_model=PostListOut, response_class=FastJSONResponse)
 async def search_posts(
-    db: AsyncDbDep,
+    request: Request,
+    db: AsyncReadDbDep,
     q: str = Query(..., min_length=2, max_length=100),
     limit: int = Query(20, ge=1, le=100),
     offset: int = Query(0, ge=0),
     cluster_id: Optional[str] = Query(
         None, description="Filtrar por cluster_id"
     ),
+    count_strategy: Optional[CountStrategy] = Query(
+        None, alias="count", description="exact | estimate | cached (default: settings)"
+    ),
 ):
+    cache_key = await response_cache.key_for(request, settings.vertical)
+    cached = await response_cache.get(cache_key)
+    if cached is not None:
+        return response_cache.respond(request, cached, "HIT")
+
     filters = build_base_filters(q=q, cluster_id=cluster_id)
 
     # -------------------------
     # Count
     # -------------------------
+    # (texto libre: el cache por cluster no aplica → exact/estimate)
     try:
-        async with async_timeout(COUNT_TIMEOUT):
-            total = await db.scalar(
-                select(func.count(Post.pid)).where(*filters)
-            )
-    except TimeoutError:
-        logger.error("Count timeout in search", exc_info=True)
-        raise HTTPException(status_code=504, detail="Count timeout")
+        count = await count_posts(db, filters, count_strategy)
+    except SQLAlchemyError:
+        logger.error("DB error counting posts in search", exc_info=True)
+        raise HTTPException(status_code=500, detail="Database error")
 
     # -------------------------
     # Query
     # -------------------------
     try:
         async with async_timeout(POSTS_TIMEOUT):
-            result = await db.scalars(
-                select(Post)
+            result = await db.execute(
+                select_post_out()
                 .where(*filters)
                 .order_by(Post.created_at.desc())
                 .offset(offset)
                 .limit(limit)
             )
-            posts = result.all()
+            rows = result.all()
     except TimeoutError:
         logger.error("Select timeout in search", exc_info=True)
         raise HTTPException(status_code=504, detail="Select timeout")
@@ -158,12 +208,48 @@ async def search_posts(
         logger.error("DB error in search", exc_info=True)
         raise HTTPException(status_code=500, detail="Database error")
 
-    return PostListOut(
-        total=total or 0,
-        items=[PostOut.from_orm(p) for p in posts],
-        limit=limit,
-        offset=offset,
-        has_more=len(posts) == limit,
+    # Fast path: tuplas → JSON (orjson) sin validación pydantic por item
+    return await response_cache.store(
+        request,
+        cache_key,
+        FastJSONResponse(post_list_payload(
+            rows_to_items(rows), count.total, limit, offset, count.is_estimate
+        )),
+    )
+
+
+# ---------------------------------------------------------
+# GET /posts/export (interno, streaming)
+#   ndjson | csv | arrow desde un cursor del servidor (app/api/export.py)
+# ---------------------------------------------------------
+@router.get("/posts/export", include_in_schema=False)
+async def export_posts(
+    format: str = Query("ndjson", pattern="^(ndjson|csv|arrow)$"),
+    columns: Optional[str] = Query(
+        None, description="Columnas separadas por coma; `embedding` = float32 crudo"
+    ),
+    vertical: Optional[str] = Query(None),
+    updated_after: Optional[datetime] = Query(None, description="Export incremental"),
+    include_deleted: bool = Query(False),
+    x_internal_key: str = Header(..., alias="X-Internal-Key"),
+):
+    check_internal_key(x_internal_key)
+    if format == "arrow" and not export.USE_ARROW:
+        raise HTTPException(status_code=501, detail="Arrow export requires pyarrow")
+    try:
+        cols = export.parse_columns(columns)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    vertical = vertical or settings.vertical
+    stmt = export.export_query(cols, vertical, updated_after, include_deleted)
+    # réplica si hay (export largo: no cargar el primario), si no el primario
+    maker = await replica_router.session_maker() or get_async_session_maker()
+    ext = {"ndjson": "ndjson", "csv": "csv", "arrow": "arrows"}[format]
+    return StreamingResponse(
+        export.stream_export(maker, stmt, cols, format),
+        media_type=export.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="posts-{vertical}.{ext}"'},
     )
 
 
@@ -176,15 +262,16 @@ async def create_post(
     db: AsyncDbDep,
     x_internal_key: str = Header(..., alias="X-Internal-Key"),
 ):
-    if x_internal_key != settings.internal_key:
-        raise HTTPException(status_code=403, detail="Forbidden")
+    check_internal_key(x_internal_key)
 
     try:
-        post = Post(**post_in.dict(), vertical=settings.vertical)
+        post = Post(**post_in.model_dump(), vertical=settings.vertical)
         db.add(post)
+        await bump_counts(db, settings.vertical, post.cluster_id, +1)
         await db.commit()
+        await response_cache.invalidate(settings.vertical)
         await db.refresh(post)
-        return PostOut.from_orm(post)
+        return PostOut.model_validate(post)
     except SQLAlchemyError:
         logger.error("DB error creating post", exc_info=True)
         raise HTTPException(status_code=500, detail="Database error")
@@ -200,14 +287,16 @@ async def update_post(
     db: AsyncDbDep,
     x_internal_key: str = Header(..., alias="X-Internal-Key"),
 ):
-    if x_internal_key != settings.internal_key:
-        raise HTTPException(status_code=403, detail="Forbidden")
+    check_internal_key(x_internal_key)
 
     try:
+        changes = post_in.model_dump(exclude_unset=True)
+        before = await get_count_state(db, pid) if "cluster_id" in changes else None
+
         stmt = (
             update(Post)
             .where(Post.pid == pid, Post.vertical == settings.vertical)
-            .values(**post_in.dict(exclude_unset=True), updated_at=func.now())
+            .values(**changes, updated_at=func.now())
             .execution_options(synchronize_session="fetch")
         )
         result = await db.execute(stmt)
@@ -215,9 +304,18 @@ async def update_post(
         if result.rowcount == 0:
             raise HTTPException(status_code=404, detail="Post not found")
 
+        if (
+            before is not None
+            and before.deleted_at is None
+            and changes["cluster_id"] != before.cluster_id
+        ):
+            await bump_counts(db, settings.vertical, before.cluster_id, -1)
+            await bump_counts(db, settings.vertical, changes["cluster_id"], +1)
+
         await db.commit()
+        await response_cache.invalidate(settings.vertical)
         post = await db.get(Post, pid)
-        return PostOut.from_orm(post)
+        return PostOut.model_validate(post)
     except SQLAlchemyError:
         logger.error("DB error updating post", exc_info=True)
         raise HTTPException(status_code=500, detail="Database error")
@@ -232,10 +330,11 @@ async def delete_post(
     db: AsyncDbDep,
     x_internal_key: str = Header(..., alias="X-Internal-Key"),
 ):
-    if x_internal_key != settings.internal_key:
-        raise HTTPException(status_code=403, detail="Forbidden")
+    check_internal_key(x_internal_key)
 
     try:
+        before = await get_count_state(db, pid)
+
         stmt = (
             update(Post)
             .where(Post.pid == pid, Post.vertical == settings.vertical)
@@ -247,7 +346,11 @@ async def delete_post(
         if result.rowcount == 0:
             raise HTTPException(status_code=404, detail="Post not found")
 
+        if before is not None and before.deleted_at is None:
+            await bump_counts(db, settings.vertical, before.cluster_id, -1)
+
         await db.commit()
+        await response_cache.invalidate(settings.vertical)
     except SQLAlchemyError:
         logger.error("DB error deleting post", exc_info=True)
         raise HTTPException(status_code=500, detail="Database error")
@@ -255,43 +358,50 @@ async def delete_post(
 
 # ---------------------------------------------------------
 # GET /posts/semantic-search (pgvector)
+#   fp32 | halfvec | binary | ivf según VECTOR_SEARCH_MODE (app/db/quantized.py;
+#   `nprobe` fuerza ivf) o motor en proceso sobre el snapshot (app/ml/vector_search.py)
 # ---------------------------------------------------------
-@router.get("/posts/semantic-search", response_model=PostListOut)
+@router.get("/posts/semantic-search", response_model=PostListOut, response_class=FastJSONResponse)
 async def semantic_search_posts(
-    db: AsyncDbDep,
+    db: AsyncReadDbDep,
     q: str = Query(..., min_length=2, max_length=200),
     min_score: float = Query(0.0, ge=0.0, le=1.0),
     limit: int = Query(20, ge=1, le=200),
     offset: int = Query(0, ge=0),
+    nprobe: Optional[int] = Query(
+        None, ge=1, le=256,
+        description="Clusters a sondear (búsqueda IVF): más = mejor recall, más lento",
+    ),
 ):
     try:
-        query_vec = cached_embed_query(q).tolist()
+        with span("embed"):
+            query_emb = cached_embed_query(q)
     except Exception as e:
         logger.error(f"Embedding failed: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Embedding failed")
 
-    sql = """
-        SELECT
-            pid,
-            title,
-            body,
-            vertical,
-            category,
-            confidence,
-            enriched_at,
-            embedding_attempt_at,
-            created_at,
-            updated_at,
-            deleted_at,
-            1 - (embedding <=> :query_vec) AS score
-        FROM posts_sqlmodel
-        WHERE embedding IS NOT NULL
-          AND deleted_at IS NULL
-          AND vertical = :vertical
-          AND (1 - (embedding <=> :query_vec)) >= :min_score
-        ORDER BY score DESC
-        LIMIT :limit OFFSET :offset
-    """
+    # nprobe explícito → IVF aunque haya motor en proceso
+    engine = get_engine(settings.vertical) if nprobe is None else None
+    if engine is not None:
+        try:
+            rows = await search_posts(
+                db, engine, settings.vertical, query_emb, limit, offset, float(min_score)
+            )
+        except SQLAlchemyError as e:
+            logger.error(f"Semantic search hydrate error: {e}", exc_info=True)
+            raise HTTPException(status_code=500, detail="Database error")
+        with span("render"):
+            return FastJSONResponse(_semantic_payload(rows, limit, offset))
+
+    query_vec = query_emb.tolist()
+    mode = "ivf" if nprobe is not None else settings.vector_search_mode
+    if mode in COMPACT_MODES and offset + limit > MAX_CANDIDATES:
+        # más allá del tope de candidatos la página saldría vacía
+        raise HTTPException(
+            status_code=422,
+            detail=f"offset + limit must be <= {MAX_CANDIDATES} with VECTOR_SEARCH_MODE={mode}",
+        )
+    sql = semantic_search_sql(mode)
 
     params = {
         "query_vec": query_vec,
@@ -302,12 +412,23 @@ async def semantic_search_posts(
     }
 
     try:
-        result = await db.execute(text(sql), params)
-        rows = result.mappings().all()
+        with span("db"):
+            if mode == "ivf":
+                params["nprobe"] = nprobe or settings.vector_ivf_nprobe
+            elif mode != "fp32":
+                params["candidates"] = candidates_for(limit, offset)
+                await set_index_scan(db, params["candidates"])
+            result = await db.execute(text(sql), params)
+            rows = result.mappings().all()
     except SQLAlchemyError as e:
         logger.error(f"Semantic search SQL error: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Database error")
 
+    with span("render"):
+        return FastJSONResponse(_semantic_payload(rows, limit, offset))
+
+
+def _semantic_payload(rows, limit: int, offset: int):
     items = [
         PostOut(
             pid=row["pid"],
@@ -331,4 +452,123 @@ async def semantic_search_posts(
         limit=limit,
         offset=offset,
         has_more=len(items) == limit,
+    ).model_dump()
+
+
+# ---------------------------------------------------------
+# POST /posts/semantic-search:batch (NDJSON, interno)
+#   N queries → 1 encode + statements de BATCH_SQL_CHUNK queries (VALUES +
+#   LATERAL) o una GEMM en proceso; una línea por query, en orden.
+# ---------------------------------------------------------
+BATCH_SQL_CHUNK = 32
+NDJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+@router.post("/posts/semantic-search:batch", response_class=StreamingResponse)
+async def semantic_search_batch(
+    body: SemanticBatchIn,
+    x_internal_key: str = Header(..., alias="X-Internal-Key"),
+):
+    # hasta 256 encodes + búsquedas por request: solo para servicios internos
+    check_internal_key(x_internal_key)
+    queries = body.queries
+    try:
+        with span("embed"):
+            embs = await to_thread(embed_queries, [item.q for item in queries])
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Batch embedding failed: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Embedding failed")
+
+    # sesión propia: la de la dependency se cierra antes de iterar el body.
+    # Réplica si hay, como el export: todo llamador es interno y pinearlo al
+    # primario (read_session_maker) le mandaría todas las búsquedas batch.
+    maker = await replica_router.session_maker() or get_async_session_maker()
+    engine = get_engine(settings.vertical)
+
+    def line(i: int, rows) -> bytes:
+        item = queries[i]
+        payload = {
+            "index": i,
+            "id": item.id,
+            "q": item.q,
+            "items": _semantic_payload(rows, item.k, 0)["items"],
+        }
+        return orjson.dumps(payload, option=NDJSON_OPTIONS) + b"\n"
+
+    async def stream():
+        # ya con 200 enviado: un error corta el stream (el cliente ve la
+        # última línea completa y sabe hasta qué índice llegó)
+        async with maker() as db:
+            if engine is not None:
+                results = await search_posts_batch(
+                    db, engine, settings.vertical, embs,
+                    [item.k for item in queries], [item.min_score for item in queries],
+                )
+                for i, rows in enumerate(results):
+                    yield line(i, rows)
+                return
+
+            for start in range(0, len(queries), BATCH_SQL_CHUNK):
+                chunk = queries[start : start + BATCH_SQL_CHUNK]
+                params = {"vertical": settings.vertical}
+                for j, item in enumerate(chunk):
+                    params[f"v{j}"] = embs[start + j]
+                    params[f"k{j}"] = item.k
+                    params[f"m{j}"] = float(item.min_score)
+                with span("db"):
+                    result = await db.execute(text(semantic_batch_sql(len(chunk))), params)
+                by_query = [[] for _ in chunk]
+                for row in result.mappings():
+                    by_query[row["idx"]].append(row)
+                for j, rows in enumerate(by_query):
+                    yield line(start + j, rows)
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+# ---------------------------------------------------------
+# GET /clusters/nearest (centroides en memoria)
+#   temas más cercanos a una query (`q`) o a un post existente (`pid`)
+# ---------------------------------------------------------
+@router.get("/clusters/nearest", response_model=NearestClustersOut, response_class=FastJSONResponse)
+async def nearest_clusters(
+    db: AsyncReadDbDep,
+    q: Optional[str] = Query(None, min_length=2, max_length=200),
+    pid: Optional[str] = Query(None),
+    k: int = Query(5, ge=1, le=50),
+):
+    if (q is None) == (pid is None):
+        raise HTTPException(status_code=422, detail="Pass exactly one of q or pid")
+
+    if q is not None:
+        try:
+            with span("embed"):
+                vec = cached_embed_query(q)
+        except Exception as e:
+            logger.error(f"Embedding failed: {e}", exc_info=True)
+            raise HTTPException(status_code=500, detail="Embedding failed")
+    else:
+        try:
+            with span("db"):
+                vec = (await db.execute(
+                    select(Post.embedding).where(
+                        Post.pid == pid,
+                        Post.vertical == settings.vertical,
+                        Post.deleted_at.is_(None),
+                    )
+                )).scalar_one_or_none()
+        except SQLAlchemyError:
+            logger.error("DB error loading post embedding", exc_info=True)
+            raise HTTPException(status_code=500, detail="Database error")
+        if vec is None:
+            raise HTTPException(status_code=404, detail="Post not found or not embedded yet")
+
+    items = centroid_index.nearest(settings.vertical, vec, k)
+    return FastJSONResponse(
+        NearestClustersOut(
+            vertical=settings.vertical,
+            items=[NearestClusterOut.model_validate(c) for c in items],
+        ).model_dump()
     )
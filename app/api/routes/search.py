@@ -8,6 +8,7 @@ from app.api.deps import AsyncDbDep
 from app.core.logger import logger
 from app.core.settings import settings
 from app.ml.embeddings import embed_query
+from app.ml.vector_search import get_engine, search_posts
 
 router = APIRouter()
 
@@ -70,6 +71,43 @@ async def semantic_search(
         logger.exception(f"Unexpected error generating embedding for query '{q}'")
         raise HTTPException(status_code=500, detail="Error generating query embedding") from e
 
+    # Motor en proceso (snapshot mmap) si la vertical lo permite
+    engine = get_engine(vertical_filter)
+    if engine is not None:
+        try:
+            rows = await search_posts(
+                db, engine, vertical_filter, query_vec, limit, offset, float(min_score), category
+            )
+        except Exception as e:
+            logger.exception("Error in in-process semantic search")
+            raise HTTPException(status_code=500, detail="Search query failed") from e
+    else:
+        rows = await _sql_search(db, query_vec, vertical_filter, category, limit, offset, min_score)
+
+    items: List[Dict[str, Any]] = []
+    for row in rows:
+        items.append(
+            {
+                "pid": row["pid"],
+                "title": row["title"],
+                "body": row["body"],
+                "vertical": row["vertical"],
+                "category": row["category"],
+                "confidence": row["confidence"],
+                "score": float(row["score"]) if row["score"] is not None else None,
+            }
+        )
+
+    return {
+        "status": "ok",
+        "query": q,
+        "vertical": vertical_filter,
+        "count": len(items),
+        "items": items,
+    }
+
+
+async def _sql_search(db, query_vec, vertical_filter, category, limit, offset, min_score):
     # Construimos SQL para pgvector
     #  - 1 - (embedding <=> :query_vec) = cosine similarity en [0,1]
     #  - min_score aplica como filtro duro de calidad
@@ -112,24 +150,4 @@ async def semantic_search(
         logger.exception("Error executing semantic search SQL")
         raise HTTPException(status_code=500, detail="Search query failed") from e
 
-    items: List[Dict[str, Any]] = []
-    for row in rows:
-        items.append(
-            {
-                "pid": row["pid"],
-                "title": row["title"],
-                "body": row["body"],
-                "vertical": row["vertical"],
-                "category": row["category"],
-                "confidence": row["confidence"],
-                "score": float(row["score"]) if row["score"] is not None else None,
-            }
-        )
-
-    return {
-        "status": "ok",
-        "query": q,
-        "vertical": vertical_filter,
-        "count": len(items),
-        "items": items,
-    }
+    return rows
@@ -1,6 +1,6 @@
 from datetime import datetime
 from typing import Optional, List, Dict
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from pydantic import ConfigDict
 
 # =========================================================
@@ -38,6 +38,37 @@ class PostInternal(PostBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+# =========================================================
+# INTERNAL WRITES (POST / PATCH /posts, X-Internal-Key)
+# =========================================================
+
+class PostCreateIn(BaseModel):
+    pid: str = Field(max_length=255)
+    title: str
+    body: str
+    category: Optional[str] = Field(None, max_length=100)
+    tags: Optional[Dict[str, str]] = None
+    n_comments: Optional[int] = Field(0, ge=0)
+    score: Optional[float] = None
+    confidence: Optional[float] = Field(None, ge=0, le=1)
+    cluster_id: Optional[str] = Field(None, max_length=100)
+    is_relevant: Optional[bool] = None
+    summary: Optional[str] = None
+
+
+class PostUpdateIn(BaseModel):
+    title: Optional[str] = None
+    body: Optional[str] = None
+    category: Optional[str] = Field(None, max_length=100)
+    tags: Optional[Dict[str, str]] = None
+    n_comments: Optional[int] = Field(None, ge=0)
+    score: Optional[float] = None
+    confidence: Optional[float] = Field(None, ge=0, le=1)
+    cluster_id: Optional[str] = Field(None, max_length=100)
+    is_relevant: Optional[bool] = None
+    summary: Optional[str] = None
+
+
 # =========================================================
 # PUBLIC API (CLIENT SAFE)
 # =========================================================
@@ -70,3 +101,39 @@ class PostListOut(BaseModel):
     limit: int
     offset: int
     has_more: bool
+    total_is_estimate: bool = False
+
+
+# =========================================================
+# SEMANTIC SEARCH BATCH
+# =========================================================
+
+class SemanticQueryIn(BaseModel):
+    q: str = Field(min_length=2, max_length=200)
+    k: int = Field(20, ge=1, le=200)
+    min_score: float = Field(0.0, ge=0.0, le=1.0)
+    id: Optional[str] = Field(None, max_length=100)   # eco para el cliente
+
+
+class SemanticBatchIn(BaseModel):
+    queries: List[SemanticQueryIn] = Field(min_length=1, max_length=256)
+
+
+# =========================================================
+# CLUSTERS
+# =========================================================
+
+class NearestClusterOut(BaseModel):
+    id: int
+    label: str
+    summary: Optional[str] = None
+    n_posts: int
+    last_post_at: Optional[datetime] = None
+    score: float
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class NearestClustersOut(BaseModel):
+    vertical: str
+    items: List[NearestClusterOut]
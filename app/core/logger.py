@@ -1,16 +1,212 @@
+# app/core/logger.py
+"""
+Logging no bloqueante.
+
+- Los loggers de la app solo encolan (QueueHandler → SimpleQueue, O(1), sin
+  I/O); un QueueListener en un thread aparte formatea y escribe a stdout.
+- Formato: texto (default) o JSON por línea (LOG_FORMAT=json); los `extra=`
+  del record se agregan como campos.
+- Mensajes por fila (workers, pipelines): `RateLimitedLogger` (token bucket
+  por mensaje, con conteo de suprimidos) o `SampledLogger` (1 de cada N).
+
+Se configura por variables de entorno (LOG_LEVEL, LOG_FORMAT) para no
+depender de Settings: scripts sin DATABASE_URL también loguean.
+"""
+import atexit
+import copy
+import json
 import logging
+import os
+import queue
 import sys
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+
+TEXT_FORMAT = "[%(asctime)s] [%(levelname)s] %(name)s: %(message)s"
+
+# Atributos estándar de LogRecord (el resto viene de `extra=`)
+_RESERVED = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+
+# ============================================================
+# 🧾 Formatters
+# ============================================================
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED and not key.startswith("_"):
+                payload[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload["exc"] = record.exc_text
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+def _build_formatter() -> logging.Formatter:
+    return JsonFormatter() if LOG_FORMAT == "json" else logging.Formatter(TEXT_FORMAT)
+
+
+# ============================================================
+# 📬 Cola + listener (un solo thread escritor por proceso)
+# ============================================================
+class _EnqueueHandler(QueueHandler):
+    """
+    QueueHandler que deja el record listo para otro thread: mensaje ya
+    interpolado y traceback ya renderizado, pero sin aplastarlo a texto
+    (el formatter del listener sigue viendo levelname, extras, etc.).
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+_queue_handler = _EnqueueHandler(_queue)
+_listener: Optional[QueueListener] = None
+_listener_lock = threading.Lock()
+
+
+def _start_listener() -> None:
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            return
+        stream = logging.StreamHandler(sys.stdout)
+        stream.setFormatter(_build_formatter())
+        _listener = QueueListener(_queue, stream, respect_handler_level=False)
+        _listener.start()
+        atexit.register(stop_logging)
+
+
+def stop_logging() -> None:
+    """Vacía la cola y detiene el listener (atexit; llamable a mano en tests)."""
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
 
 def get_logger(name: str = __name__) -> logging.Logger:
     logger = logging.getLogger(name)
     if not logger.handlers:
-        logger.setLevel(logging.INFO)
-        handler = logging.StreamHandler(sys.stdout)
-        formatter = logging.Formatter(
-            "[%(asctime)s] [%(levelname)s] %(name)s: %(message)s"
-        )
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
+        logger.setLevel(LOG_LEVEL)
+        _start_listener()
+        logger.addHandler(_queue_handler)
     return logger
 
-logger = get_logger("app")
\ No newline at end of file
+
+# ============================================================
+# 🚦 Loggers para mensajes por fila
+# ============================================================
+class RateLimitedLogger:
+    """
+    Token bucket por mensaje (el template, no el texto interpolado): como
+    mucho `per_second` logs/s sostenidos con ráfagas de `burst`. Al volver a
+    emitir, agrega cuántos se suprimieron (`suppressed=N`).
+    """
+
+    def __init__(self, logger: logging.Logger, per_second: float = 1.0, burst: int = 10):
+        self.logger = logger
+        self.per_second = per_second
+        self.burst = burst
+        self._buckets: Dict[str, list] = {}  # msg → [tokens, last, suppressed]
+        self._lock = threading.Lock()
+
+    def _allow(self, key: str):
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [float(self.burst), now, 0]
+            tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.per_second)
+            bucket[1] = now
+            if tokens < 1:
+                bucket[0] = tokens
+                bucket[2] += 1
+                return False, 0
+            bucket[0] = tokens - 1
+            suppressed, bucket[2] = bucket[2], 0
+            return True, suppressed
+
+    def log(self, level: int, msg: str, *args, **kwargs) -> None:
+        self._log(level, msg, *args, **kwargs)
+
+    def _log(self, level: int, msg: str, *args, **kwargs) -> None:
+        if not self.logger.isEnabledFor(level):
+            return
+        allowed, suppressed = self._allow(msg)
+        if not allowed:
+            return
+        if suppressed:
+            kwargs["extra"] = {**kwargs.get("extra", {}), "suppressed": suppressed}
+            msg = f"{msg} (+{suppressed} suprimidos)"
+        self.logger.log(level, msg, *args, stacklevel=3, **kwargs)
+
+    def debug(self, msg, *args, **kwargs):
+        self._log(logging.DEBUG, msg, *args, **kwargs)
+
+    def info(self, msg, *args, **kwargs):
+        self._log(logging.INFO, msg, *args, **kwargs)
+
+    def warning(self, msg, *args, **kwargs):
+        self._log(logging.WARNING, msg, *args, **kwargs)
+
+    def error(self, msg, *args, **kwargs):
+        self._log(logging.ERROR, msg, *args, **kwargs)
+
+
+class SampledLogger:
+    """Emite 1 de cada `every` llamadas por mensaje (con `sampled=every`)."""
+
+    def __init__(self, logger: logging.Logger, every: int = 100):
+        self.logger = logger
+        self.every = every
+        self._counts: Dict[str, int] = {}
+
+    def log(self, level: int, msg: str, *args, **kwargs) -> None:
+        self._log(level, msg, *args, **kwargs)
+
+    def _log(self, level: int, msg: str, *args, **kwargs) -> None:
+        if not self.logger.isEnabledFor(level):
+            return
+        n = self._counts.get(msg, 0)
+        self._counts[msg] = n + 1
+        if n % self.every:
+            return
+        kwargs["extra"] = {**kwargs.get("extra", {}), "sampled": self.every}
+        self.logger.log(level, msg, *args, stacklevel=3, **kwargs)
+
+    def debug(self, msg, *args, **kwargs):
+        self._log(logging.DEBUG, msg, *args, **kwargs)
+
+    def info(self, msg, *args, **kwargs):
+        self._log(logging.INFO, msg, *args, **kwargs)
+
+    def warning(self, msg, *args, **kwargs):
+        self._log(logging.WARNING, msg, *args, **kwargs)
+
+    def error(self, msg, *args, **kwargs):
+        self._log(logging.ERROR, msg, *args, **kwargs)
+
+
+logger = get_logger("app")
@@ -0,0 +1,323 @@
+# app/core/metrics.py
+"""
+Métricas Prometheus de la API.
+
+- /metrics: registry por defecto, o MultiProcessCollector si
+  PROMETHEUS_MULTIPROC_DIR está definido (uvicorn/gunicorn con N workers:
+  cada worker escribe sus métricas en ese directorio, /metrics las agrega).
+- Middleware ASGI: latencia por ruta (template, no path real → cardinalidad
+  acotada) + queries y tiempo de DB por request.
+- Hooks de SQLAlchemy (before/after_cursor_execute) sobre todos los engines:
+  acumulan en un contextvar por request (tiempo, cantidad y, con
+  `trace_enabled`, las primeras MAX_QUERIES queries con su engine).
+- Encode de embeddings: histograma propio (`observe_embedding`), para separar
+  modelo vs DB en el p99 de las búsquedas semánticas.
+- Trazas sobre el mismo estado: `span("embed")` / `span("db")` miden etapas
+  del handler, header `Server-Timing` (etapas + sql + total) y log JSON
+  muestreado de las requests por encima de `trace_slow_ms`, con la query más
+  lenta y, si `trace_explain`, su EXPLAIN en el engine que la sirvió.
+
+Sin prometheus_client instalado las métricas son no-op (las trazas no).
+"""
+import asyncio
+import json
+import os
+import random
+import re
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from fastapi import Response
+from sqlalchemy import Engine, event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.logger import logger
+from app.core.settings import settings
+
+try:
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST,
+        REGISTRY,
+        CollectorRegistry,
+        Histogram,
+        generate_latest,
+    )
+    USE_PROM = True
+
+    LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+    http_request_duration = Histogram(
+        "http_request_duration_seconds",
+        "Latencia de requests HTTP",
+        ["method", "route", "status"],
+        buckets=LATENCY_BUCKETS,
+    )
+    http_request_db_time = Histogram(
+        "http_request_db_seconds",
+        "Tiempo total en DB por request",
+        ["route"],
+        buckets=LATENCY_BUCKETS,
+    )
+    http_request_db_queries = Histogram(
+        "http_request_db_queries",
+        "Queries ejecutadas por request",
+        ["route"],
+        buckets=(0, 1, 2, 3, 5, 10, 25, 50, 100),
+    )
+    embedding_encode_duration = Histogram(
+        "embedding_encode_seconds",
+        "Tiempo de encode del modelo de embeddings",
+        ["route"],
+        buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+    )
+except ImportError:
+    USE_PROM = False
+
+
+# ============================================================
+# 🧵 Estado por request
+# ============================================================
+def _route_template(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+MAX_QUERIES = 50  # registradas por request; el resto solo suma tiempo
+
+
+@dataclass
+class QueryRecord:
+    statement: str
+    parameters: Any
+    duration: float
+    engine: Engine   # el que la sirvió (primario o réplica), para el EXPLAIN
+
+
+@dataclass
+class RequestStats:
+    scope: dict
+    db_queries: int = 0
+    db_time: float = 0.0
+    embed_time: float = 0.0
+    start: float = field(default_factory=time.perf_counter)
+    spans: Dict[str, float] = field(default_factory=lambda: defaultdict(float))
+    queries: List[QueryRecord] = field(default_factory=list)
+
+    @property
+    def route(self) -> str:
+        # el router de FastAPI deja la ruta en el scope al hacer match
+        return _route_template(self.scope)
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    def server_timing(self) -> str:
+        parts = [f"{name};dur={secs * 1000:.1f}" for name, secs in self.spans.items()]
+        if self.db_queries:
+            parts.append(f'sql;dur={self.db_time * 1000:.1f};desc="{self.db_queries} queries"')
+        parts.append(f"total;dur={self.elapsed() * 1000:.1f}")
+        return ", ".join(parts)
+
+    def slowest_query(self) -> Optional[QueryRecord]:
+        return max(self.queries, key=lambda q: q.duration, default=None)
+
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar(
+    "request_stats", default=None
+)
+
+
+def current_stats() -> Optional[RequestStats]:
+    return _request_stats.get()
+
+
+@contextmanager
+def span(name: str):
+    """Mide una etapa de la request actual (acumula si se repite; fuera de una request, no-op)."""
+    stats = _request_stats.get()
+    if stats is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.spans[name] += time.perf_counter() - start
+
+
+def observe_embedding(seconds: float) -> None:
+    """Registra un encode de embedding (fuera de una request → route="-")."""
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.embed_time += seconds
+    if USE_PROM:
+        embedding_encode_duration.labels(stats.route if stats else "-").observe(seconds)
+
+
+# ============================================================
+# 🗄️ Hooks de SQLAlchemy
+# ============================================================
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("query_start")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.db_queries += 1
+        stats.db_time += elapsed
+        if settings.trace_enabled and not executemany and len(stats.queries) < MAX_QUERIES:
+            stats.queries.append(QueryRecord(statement, parameters, elapsed, conn.engine))
+
+
+_hooks_installed = False
+
+
+def install_db_hooks() -> None:
+    """Engancha los hooks a la clase Engine (cubre engines presentes y futuros)."""
+    global _hooks_installed
+    if _hooks_installed:
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    _hooks_installed = True
+
+
+# ============================================================
+# 🐢 Requests lentas
+# ============================================================
+_LOCKING = re.compile(r"\bFOR\s+(NO\s+KEY\s+UPDATE|UPDATE|KEY\s+SHARE|SHARE)\b", re.IGNORECASE)
+
+
+async def _explain(query: QueryRecord) -> Optional[Any]:
+    """
+    EXPLAIN de un SELECT en el mismo engine (réplica si vino de una). Plan
+    estimado, sin ejecutar; `trace_explain_analyze` lo re-ejecuta (nunca si
+    toma locks: FOR UPDATE / FOR SHARE).
+    """
+    if not query.engine.dialect.is_async:
+        return None
+    analyze = settings.trace_explain_analyze and not _LOCKING.search(query.statement)
+    options = "ANALYZE, BUFFERS, FORMAT JSON" if analyze else "FORMAT JSON"
+    try:
+        async with asyncio.timeout(settings.trace_explain_timeout):
+            async with AsyncEngine(query.engine).connect() as conn:
+                await conn.exec_driver_sql(
+                    f"SET LOCAL statement_timeout = {int(settings.trace_explain_timeout * 1000)}"
+                )
+                result = await conn.exec_driver_sql(
+                    f"EXPLAIN ({options}) " + query.statement, query.parameters
+                )
+                plan = result.scalar()
+                await conn.rollback()
+        return json.loads(plan) if isinstance(plan, str) else plan
+    except Exception as e:
+        return {"error": str(e)}
+
+
+async def _log_slow_request(stats: RequestStats, status: int, total: float) -> None:
+    slowest = stats.slowest_query()
+    record = {
+        "event": "slow_request",
+        "method": stats.scope["method"],
+        "path": stats.scope["path"],
+        "route": stats.route,
+        "status": status,
+        "total_ms": round(total * 1000, 1),
+        "spans_ms": {k: round(v * 1000, 1) for k, v in stats.spans.items()},
+        "sql_ms": round(stats.db_time * 1000, 1),
+        "sql_count": stats.db_queries,
+    }
+    if slowest is not None:
+        record["slowest_query"] = {
+            "sql": slowest.statement,
+            "ms": round(slowest.duration * 1000, 1),
+        }
+        if settings.trace_explain and slowest.statement.lstrip().upper().startswith("SELECT"):
+            record["slowest_query"]["explain"] = await _explain(slowest)
+    logger.warning(json.dumps(record, default=str))
+
+
+_background: set = set()
+
+
+def _maybe_log_slow(stats: RequestStats, status: int, total: float) -> None:
+    if total * 1000 < settings.trace_slow_ms or random.random() >= settings.trace_sample_rate:
+        return
+    task = asyncio.create_task(_log_slow_request(stats, status, total))
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+
+
+# ============================================================
+# ⏱️ Middleware ASGI
+# ============================================================
+class MetricsMiddleware:
+    """
+    Latencia por ruta + DB por request (+ Server-Timing y requests lentas
+    con `trace_enabled`). ASGI puro (sin BaseHTTPMiddleware).
+    """
+
+    def __init__(self, app, skip_paths=("/metrics",)):
+        self.app = app
+        self.skip_paths = set(skip_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope)
+        token = _request_stats.set(stats)
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if settings.trace_enabled:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", stats.server_timing().encode()))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            _request_stats.reset(token)
+            if settings.trace_enabled:
+                _maybe_log_slow(stats, status_code, elapsed)
+            if USE_PROM:
+                route = stats.route
+                http_request_duration.labels(scope["method"], route, str(status_code)).observe(elapsed)
+                http_request_db_time.labels(route).observe(stats.db_time)
+                http_request_db_queries.labels(route).observe(stats.db_queries)
+
+
+# ============================================================
+# 📤 /metrics
+# ============================================================
+def _registry():
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def metrics_response() -> Response:
+    if not USE_PROM:
+        return Response("prometheus_client not installed\n", status_code=501, media_type="text/plain")
+    return Response(generate_latest(_registry()), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,222 @@
+# app/core/profiling.py
+"""
+Profiling bajo demanda (sin redeploy, sin dependencias).
+
+- `SamplingProfiler`: thread que muestrea `sys._current_frames()` cada
+  `interval` s y acumula stacks colapsados (`a;b;c N`), el formato que
+  aceptan flamegraph.pl, speedscope e inferno. Overhead ~1-3% a 5 ms.
+- `profile_for(seconds)`: perfil del proceso durante N s sin bloquear el
+  event loop (lo usa el endpoint interno /debug/profile).
+- `worker_profiler(name)`: para workers. Con PROFILE=1 perfila toda la
+  corrida; además SIGUSR1 alterna start/stop. Escribe
+  `{PROFILE_DIR}/<name>-<pid>-<ts>.collapsed`.
+- `StageTimer`: wall + CPU por etapa, con resumen al final de la corrida.
+"""
+import asyncio
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional
+
+from app.core.logger import logger
+
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", "profiles"))
+MAX_DEPTH = 128
+
+
+# ============================================================
+# 🔬 Sampler
+# ============================================================
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}:{code.co_name}"
+
+
+class SamplingProfiler:
+    def __init__(self, interval: float = 0.005, include_idle: bool = False):
+        self.interval = interval
+        self.include_idle = include_idle
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.started_at: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stop.clear()
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if not self.running:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            for t in threading.enumerate():
+                names[t.ident] = t.name
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < MAX_DEPTH:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                if not stack:
+                    continue
+                if not self.include_idle and _is_idle(stack[0]):
+                    continue
+                stack.append(names.get(ident, f"thread-{ident}"))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        """Stacks colapsados, uno por línea: `thread;mod:func;... count`."""
+        return "\n".join(f"{stack} {n}" for stack, n in self.stacks.most_common()) + "\n"
+
+    def dump(self, path: Path) -> Path:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(self.collapsed())
+        return path
+
+
+# Frames "esperando" (selector del event loop, colas, locks): ruido en el flamegraph
+_IDLE = (
+    "selectors:select",
+    "threading:wait",
+    "queue:get",
+    "concurrent.futures.thread:_worker",
+    "logging.handlers:dequeue",  # QueueListener de app/core/logger.py
+)
+
+
+def _is_idle(leaf: str) -> bool:
+    return leaf.startswith(_IDLE)
+
+
+_api_lock = asyncio.Lock()
+
+
+async def profile_for(seconds: float, interval: float = 0.005, include_idle: bool = False) -> SamplingProfiler:
+    """Perfila el proceso actual durante `seconds` (uno a la vez)."""
+    if _api_lock.locked():
+        raise RuntimeError("A profile is already running")
+    async with _api_lock:
+        profiler = SamplingProfiler(interval, include_idle)
+        profiler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profiler.stop()
+        return profiler
+
+
+# ============================================================
+# 🛠️ Workers: PROFILE=1 o SIGUSR1
+# ============================================================
+def _profile_path(name: str) -> Path:
+    return PROFILE_DIR / f"{name}-{os.getpid()}-{time.strftime('%Y%m%d-%H%M%S')}.collapsed"
+
+
+def _dump(profiler: SamplingProfiler, name: str) -> None:
+    path = profiler.dump(_profile_path(name))
+    logger.info("🔬 Perfil %s: %s samples → %s", name, profiler.samples, path)
+
+
+@contextmanager
+def worker_profiler(name: str, interval: float = 0.005):
+    """
+    Perfila el bloque si PROFILE=1. Con SIGUSR1 (POSIX) se alterna en
+    caliente: primera señal arranca, segunda detiene y escribe el archivo.
+    """
+    profiler = SamplingProfiler(interval)
+    toggle = getattr(signal, "SIGUSR1", None)
+    previous = None
+
+    def _on_signal(*_):
+        # el handler corre en el main thread: solo start/stop + dump
+        if profiler.running:
+            profiler.stop()
+            _dump(profiler, name)
+            profiler.stacks.clear()
+            profiler.samples = 0
+        else:
+            logger.info("🔬 Perfil %s iniciado (SIGUSR1 de nuevo para detener)", name)
+            profiler.start()
+
+    if toggle is not None and threading.current_thread() is threading.main_thread():
+        previous = signal.signal(toggle, _on_signal)
+
+    if os.getenv("PROFILE", "").lower() in ("1", "true", "yes"):
+        profiler.start()
+    try:
+        yield profiler
+    finally:
+        if profiler.running:
+            profiler.stop()
+            _dump(profiler, name)
+        if previous is not None:
+            signal.signal(toggle, previous)
+
+
+# ============================================================
+# ⏱️ Tiempos por etapa
+# ============================================================
+class StageTimer:
+    """
+    Wall (perf_counter) y CPU (process_time: incluye threads del proceso,
+    p. ej. el pool del encoder) por etapa. CPU/wall ≈ 1 → CPU-bound;
+    ≈ 0 → esperando I/O (DB, red, locks).
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.wall: Dict[str, float] = defaultdict(float)
+        self.cpu: Dict[str, float] = defaultdict(float)
+        self.calls: Dict[str, int] = defaultdict(int)
+        self._start_wall = time.perf_counter()
+        self._start_cpu = time.process_time()
+
+    @contextmanager
+    def stage(self, stage: str):
+        w0, c0 = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self.wall[stage] += time.perf_counter() - w0
+            self.cpu[stage] += time.process_time() - c0
+            self.calls[stage] += 1
+
+    def summary(self) -> str:
+        total_wall = time.perf_counter() - self._start_wall
+        total_cpu = time.process_time() - self._start_cpu
+        lines = [f"⏱️ {self.name}: wall={total_wall:.2f}s cpu={total_cpu:.2f}s"]
+        for stage in sorted(self.wall, key=self.wall.get, reverse=True):
+            wall, cpu = self.wall[stage], self.cpu[stage]
+            lines.append(
+                f"   {stage:<12} wall={wall:8.2f}s ({wall / total_wall:5.1%}) "
+                f"cpu={cpu:8.2f}s  x{self.calls[stage]}"
+                if total_wall else f"   {stage:<12} wall={wall:8.2f}s cpu={cpu:8.2f}s"
+            )
+        return "\n".join(lines)
+
+    def log_summary(self) -> None:
+        logger.info(self.summary())
@@ -1,3 +1,5 @@
+from typing import List, Optional
+
 from pydantic_settings import BaseSettings
 from pydantic import SecretStr
 
@@ -9,6 +11,83 @@ class Settings(BaseSettings):
     vertical: str = "fitness"
     env: str = "dev"
 
+    # --- Pool de conexiones (un perfil por tipo de proceso; ver app/db/database.py) ---
+    db_profile: str = "api"
+    db_pool_size: int = 10                   # perfil "api"
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 10.0
+    embed_worker_pool_size: int = 2          # 1 lectura + escrituras por batch
+    embed_worker_max_overflow: int = 1
+    embed_worker_pool_timeout: float = 30.0
+    cluster_job_pool_size: int = 1           # una sola sesión larga
+    cluster_job_max_overflow: int = 0
+    cluster_job_pool_timeout: float = 60.0
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    db_statement_cache_size: int = 100
+    db_pgbouncer: bool = False
+
+    # --- Réplicas de lectura (JSON: '["postgresql+asyncpg://..."]') ---
+    database_replica_urls: List[str] = []
+    replica_max_lag: float = 5.0          # segundos
+    replica_check_interval: float = 2.0   # segundos
+
+    # --- Cache de respuestas (app/api/cache.py) ---
+    # backend: "memory" (solo LRU por proceso), "redis" o "disk" (diskcache,
+    # compartido entre workers del mismo host). Sin tier compartido, cada
+    # worker solo ve sus propias invalidaciones (el resto expira por TTL).
+    response_cache_enabled: bool = True
+    response_cache_backend: str = "memory"
+    response_cache_ttl: float = 30.0
+    response_cache_max_entries: int = 1024
+    response_cache_dir: str = ".cache/responses"
+    redis_url: Optional[str] = None
+
+    # --- Conteos paginados (app/db/counts.py): exact | estimate | cached ---
+    count_strategy: str = "exact"
+    count_cache_max_age: float = 900.0           # segundos
+    count_cache_refresh_interval: float = 300.0  # segundos
+    stats_fold_interval: float = 5.0             # pliegue de vertical_stats_deltas (app/db/stats.py)
+
+    # --- Worker de embeddings en modo daemon (app/enrichment/embed_posts.py) ---
+    embed_sweep_interval: float = 60.0          # segundos entre barridos sin NOTIFY
+    embed_metrics_port: Optional[int] = None    # /metrics propio del worker
+    embed_lease_seconds: float = 300.0          # lease por batch reclamado (> duración de un batch)
+    encode_token_budget: int = 4096             # tokens con padding por forward del encoder
+    encode_max_batch: int = 256                 # textos por forward (tope para posts muy cortos)
+
+    # --- Cola de jobs de pipelines (app/db/jobs.py) ---
+    job_max_attempts: int = 5
+    job_backoff_base: float = 30.0              # segundos; se duplica por intento
+    job_backoff_max: float = 6 * 3600.0
+    cluster_debounce: float = 300.0             # espera tras embeddings nuevos antes de reclusterizar
+
+    # --- Búsqueda semántica (app/db/quantized.py): fp32 | halfvec | binary | ivf ---
+    vector_search_mode: str = "fp32"
+    vector_rerank_factor: int = 10      # candidatos = (limit + offset) × factor, re-rank fp32
+    vector_ivf_nprobe: int = 8          # clusters sondeados en modo ivf
+
+    # --- Snapshot mmap de embeddings por vertical (app/ml/vector_snapshot.py) ---
+    vector_snapshot_dir: str = ".cache/vectors"
+    vector_snapshot_check_interval: float = 5.0   # segundos entre stat() del archivo
+
+    # --- Motor en proceso (app/ml/vector_search.py): db | numpy | auto ---
+    # opt-in: el snapshot no ve los posts embebidos después de exportarlo
+    vector_engine: str = "db"
+    vector_engine_max_rows: int = 500_000       # auto: más filas → SQL
+    vector_engine_max_age: float = 900.0        # auto: snapshot más viejo → SQL
+    vector_batch_max: int = 32                  # queries por GEMM
+    vector_batch_wait_ms: float = 2.0           # espera para juntar queries concurrentes
+    centroid_refresh_interval: float = 300.0    # recarga de centroides sin NOTIFY (app/ml/centroid_index.py)
+
+    # --- Trazas por request (app/core/metrics.py) ---
+    trace_enabled: bool = True
+    trace_slow_ms: float = 500.0        # umbral de request lenta
+    trace_sample_rate: float = 0.1      # fracción de requests lentas que se loguean
+    trace_explain: bool = False         # EXPLAIN (plan estimado) de la query más lenta
+    trace_explain_analyze: bool = False # ...re-ejecutándola (EXPLAIN ANALYZE) en el mismo engine
+    trace_explain_timeout: float = 5.0  # segundos
+
     class Config:
         env_file = ".env"
 
@@ -0,0 +1,208 @@
+# app/db/counts.py
+"""
+Estrategias de conteo para endpoints paginados.
+
+- exact:    COUNT(*) real con statement_timeout del servidor dentro de un
+            SAVEPOINT (si se cancela → rollback al savepoint y cae a estimate).
+- estimate: filas estimadas por el planner (EXPLAIN), O(1) sin importar el tamaño.
+- cached:   total de la vertical → vertical_stats_live (triggers, siempre exacto);
+            por cluster → tabla post_counts, actualizada incrementalmente en
+            las escrituras de la API y recalculada en background. Solo aplica
+            a filtros vertical/cluster_id; si no aplica o está vencida → estimate.
+"""
+import asyncio
+import json
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Literal, Optional
+
+from sqlalchemy import func, literal_column, select, text, update
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.logger import logger
+from app.core.settings import settings
+from app.db.models_counts import PostCount
+from app.db.models_stats import vertical_stats_live
+from app.db.models_sqlmodel import Post
+
+CountStrategy = Literal["exact", "estimate", "cached"]
+
+COUNT_TIMEOUT = 1.0        # segundos
+QUERY_CANCELED = "57014"   # SQLSTATE de statement_timeout
+REFRESH_LOCK_ID = 0x1C0C0117  # pg_advisory_lock: un solo refresher por cluster de workers
+
+
+@dataclass(frozen=True)
+class CountResult:
+    total: int
+    is_estimate: bool
+
+
+# ============================================================
+# 🔢 Estrategias
+# ============================================================
+SET_STATEMENT_TIMEOUT = text("SELECT set_config('statement_timeout', :value, true)")
+
+
+async def exact_count(db: AsyncSession, filters, timeout: Optional[float] = None) -> int:
+    """
+    COUNT(*) real. Con `timeout` lo corta el servidor, dentro de un
+    SAVEPOINT: si se cancela, el rollback al savepoint deja la sesión y la
+    transacción usables (cancelar el await del lado del cliente invalida
+    la conexión). Levanta DBAPIError (SQLSTATE 57014) al vencer.
+    """
+    stmt = select(func.count(Post.pid)).where(*filters)
+    if timeout is None:
+        return await db.scalar(stmt) or 0
+    async with db.begin_nested():
+        previous = await db.scalar(text("SELECT current_setting('statement_timeout')"))
+        await db.execute(SET_STATEMENT_TIMEOUT, {"value": f"{int(timeout * 1000)}ms"})
+        total = await db.scalar(stmt) or 0
+        await db.execute(SET_STATEMENT_TIMEOUT, {"value": previous})
+    return total
+
+
+async def estimate_count(db: AsyncSession, filters) -> int:
+    """
+    Filas estimadas por el planner para el WHERE dado. SQL directo al
+    driver (no `text()`): los literales del usuario pueden traer `:algo`
+    y `text()` los tomaría como bind params.
+    """
+    stmt = select(literal_column("1")).select_from(Post).where(*filters)
+    sql = stmt.compile(
+        dialect=postgresql.dialect(),
+        compile_kwargs={"literal_binds": True},
+    )
+    conn = await db.connection()
+    plan = (await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+async def cached_count(
+    db: AsyncSession,
+    vertical: str,
+    cluster_id: Optional[str],
+) -> Optional[int]:
+    """Conteo cacheado o None si no hay fila fresca."""
+    if not cluster_id:
+        total = await db.scalar(
+            select(vertical_stats_live.c.total).where(vertical_stats_live.c.vertical == vertical)
+        )
+        return max(total or 0, 0)
+
+    max_age = timedelta(seconds=settings.count_cache_max_age)
+    row = (await db.execute(
+        select(PostCount.total, PostCount.refreshed_at).where(
+            PostCount.vertical == vertical,
+            PostCount.cluster_id == cluster_id,
+        )
+    )).first()
+    if row is None or datetime.now(timezone.utc) - row.refreshed_at > max_age:
+        return None
+    return max(row.total, 0)
+
+
+async def count_posts(
+    db: AsyncSession,
+    filters,
+    strategy: Optional[CountStrategy] = None,
+    *,
+    cluster_id: Optional[str] = None,
+    cacheable: bool = False,
+) -> CountResult:
+    """
+    Cuenta posts según la estrategia (default: settings.count_strategy).
+    `cacheable` indica que los filtros son solo vertical + cluster_id.
+    """
+    strategy = strategy or settings.count_strategy
+
+    if strategy == "cached" and cacheable:
+        total = await cached_count(db, settings.vertical, cluster_id)
+        if total is not None:
+            return CountResult(total, False)
+        strategy = "estimate"
+
+    if strategy == "exact":
+        try:
+            return CountResult(await exact_count(db, filters, COUNT_TIMEOUT), False)
+        except DBAPIError as e:
+            if getattr(e.orig, "sqlstate", None) != QUERY_CANCELED:
+                raise
+            logger.warning("Exact count timeout, falling back to estimate")
+
+    return CountResult(await estimate_count(db, filters), True)
+
+
+# ============================================================
+# ✍️ Mantenimiento incremental (misma transacción que la escritura)
+# ============================================================
+async def bump_counts(
+    db: AsyncSession,
+    vertical: str,
+    cluster_id: Optional[str],
+    delta: int,
+) -> None:
+    """
+    Ajusta los contadores existentes; no crea filas (las crea el refresh,
+    así un contador nunca arranca desde un valor parcial).
+    """
+    if not cluster_id or not delta:
+        return
+    await db.execute(
+        update(PostCount)
+        .where(PostCount.vertical == vertical, PostCount.cluster_id == cluster_id)
+        .values(total=PostCount.total + delta)
+    )
+
+
+# ============================================================
+# 🔄 Refresh completo (background)
+# ============================================================
+REFRESH_SQL = [
+    text("""
+        INSERT INTO post_counts (vertical, cluster_id, total, refreshed_at)
+        SELECT CAST(:vertical AS varchar), cluster_id, count(*), now()
+        FROM posts_sqlmodel
+        WHERE vertical = :vertical AND deleted_at IS NULL AND cluster_id IS NOT NULL
+        GROUP BY cluster_id
+        ON CONFLICT (vertical, cluster_id)
+        DO UPDATE SET total = EXCLUDED.total, refreshed_at = EXCLUDED.refreshed_at
+    """),
+    # clusters que ya no tienen posts
+    text("""
+        DELETE FROM post_counts
+        WHERE vertical = :vertical AND refreshed_at < now()
+    """),
+]
+
+
+async def refresh_counts(db: AsyncSession, vertical: str) -> bool:
+    """Recalcula los conteos de la vertical. False si otro proceso ya lo está haciendo."""
+    locked = await db.scalar(
+        text("SELECT pg_try_advisory_xact_lock(:id)"), {"id": REFRESH_LOCK_ID}
+    )
+    if not locked:
+        await db.rollback()
+        return False
+    for stmt in REFRESH_SQL:
+        await db.execute(stmt, {"vertical": vertical})
+    await db.commit()
+    return True
+
+
+async def refresh_loop(session_maker, vertical: str, interval: float) -> None:
+    """Loop de refresh para el lifespan de la API."""
+    while True:
+        try:
+            async with session_maker() as db:
+                if await refresh_counts(db, vertical):
+                    logger.info("Post counts refreshed for %s", vertical)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.error("Post counts refresh failed", exc_info=True)
+        await asyncio.sleep(interval)
@@ -1,11 +1,48 @@
 # app/db/database.py
 
-from sqlalchemy import create_engine
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+from uuid import uuid4
+
+import numpy as np
+from pgvector import Vector
+from sqlalchemy import Engine, create_engine, event, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession
 from sqlmodel import SQLModel
 from app.core.settings import settings
 
+# ------------------------------------------------------------------
+# ⚙️ Optional Prometheus Metrics (pool)
+# ------------------------------------------------------------------
+try:
+    from prometheus_client import Counter, Gauge, Histogram
+    USE_PROM = True
+    pool_checkout_wait = Histogram(
+        "db_pool_checkout_wait_seconds",
+        "Espera para obtener una conexión del pool",
+        ["profile"],
+        buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+    )
+    pool_checkout_timeouts = Counter(
+        "db_pool_checkout_timeouts_total", "Checkouts que agotaron pool_timeout", ["profile"]
+    )
+    pool_checked_out = Gauge(
+        "db_pool_checked_out", "Conexiones en uso", ["profile"], multiprocess_mode="livesum"
+    )
+    pool_overflow = Gauge(
+        "db_pool_overflow", "Conexiones por encima de pool_size", ["profile"], multiprocess_mode="livesum"
+    )
+    pool_connections = Gauge(
+        "db_pool_connections", "Conexiones abiertas (en uso + libres)", ["profile"], multiprocess_mode="livesum"
+    )
+except ImportError:
+    USE_PROM = False
+
 # ------------------------------------------------------------------
 # 1️⃣ URLs NORMALIZADAS (CLAVE)
 # ------------------------------------------------------------------
@@ -19,41 +56,260 @@ sync_url = (
 )
 
 # 🔹 Async engine → SIEMPRE asyncpg
-async_url = (
-    raw_url
-    if raw_url.startswith("postgresql+asyncpg")
-    else raw_url.replace("postgresql+psycopg://", "postgresql+asyncpg://")
-)
+def to_async_url(url: str) -> str:
+    return (
+        url
+        if url.startswith("postgresql+asyncpg")
+        else url
+        .replace("postgresql+psycopg://", "postgresql+asyncpg://")
+        .replace("postgresql://", "postgresql+asyncpg://")
+    )
+
+
+async_url = to_async_url(raw_url)
 
 # ------------------------------------------------------------------
 # 2️⃣ Echo solo en dev
 # ------------------------------------------------------------------
 echo = getattr(settings, "env", "dev") == "dev"
 
+
 # ------------------------------------------------------------------
-# 3️⃣ Engines
+# 3️⃣ Perfiles de engine (uno por tipo de proceso)
+#     api          → muchas requests concurrentes, pool grande (DB_POOL_*)
+#     embed_worker → 1 lectura + escrituras por batch, pool chico (EMBED_WORKER_*)
+#     cluster_job  → una sola sesión larga (CLUSTER_JOB_*)
 # ------------------------------------------------------------------
-engine = create_engine(sync_url, echo=echo)
-async_engine = create_async_engine(async_url, echo=echo)
+@dataclass(frozen=True)
+class EngineProfile:
+    pool_size: int
+    max_overflow: int
+    pool_timeout: float
+
+
+ENGINE_PROFILES: Dict[str, EngineProfile] = {
+    "api": EngineProfile(
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+    ),
+    "embed_worker": EngineProfile(
+        pool_size=settings.embed_worker_pool_size,
+        max_overflow=settings.embed_worker_max_overflow,
+        pool_timeout=settings.embed_worker_pool_timeout,
+    ),
+    "cluster_job": EngineProfile(
+        pool_size=settings.cluster_job_pool_size,
+        max_overflow=settings.cluster_job_max_overflow,
+        pool_timeout=settings.cluster_job_pool_timeout,
+    ),
+}
+
+
+def _resolve_profile(profile: Optional[str]) -> str:
+    profile = profile or settings.db_profile
+    if profile not in ENGINE_PROFILES:
+        raise ValueError(f"Unknown DB engine profile: {profile!r}")
+    return profile
+
+
+def _timed_pool(base, profile: str):
+    """Subclase del pool que mide la espera del checkout (sobrevive a recreate())."""
+
+    class TimedPool(base):
+        def _do_get(self):
+            start = time.perf_counter()
+            try:
+                return super()._do_get()
+            except PoolTimeoutError:
+                if USE_PROM:
+                    pool_checkout_timeouts.labels(profile).inc()
+                raise
+            finally:
+                if USE_PROM:
+                    pool_checkout_wait.labels(profile).observe(time.perf_counter() - start)
+
+    TimedPool.__name__ = f"Timed{base.__name__}"
+    return TimedPool
+
+
+def _instrument_pool(sync_engine, profile: str) -> None:
+    if not USE_PROM:
+        return
+
+    def _update(*_):
+        pool = sync_engine.pool
+        checked_out = pool.checkedout()
+        pool_checked_out.labels(profile).set(checked_out)
+        pool_overflow.labels(profile).set(max(pool.overflow(), 0))
+        pool_connections.labels(profile).set(checked_out + pool.checkedin())
+
+    for name in ("connect", "checkout", "checkin", "close", "invalidate"):
+        event.listen(sync_engine, name, _update)
+
+
+def _pool_kwargs(profile: str) -> dict:
+    p = ENGINE_PROFILES[profile]
+    return {
+        "pool_size": p.pool_size,
+        "max_overflow": p.max_overflow,
+        "pool_timeout": p.pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
 
 # ------------------------------------------------------------------
-# 4️⃣ Sesiones
+# 3️⃣b Codec binario de pgvector en asyncpg
+#     vector → np.float32 (np.frombuffer, ~1.5 KB/fila) en vez de
+#     texto '[0.1,...]' (~4 KB/fila) parseado float a float.
 # ------------------------------------------------------------------
-SessionLocal = sessionmaker(
-    bind=engine,
-    autocommit=False,
-    autoflush=False,
-)
+def _encode_vector(value) -> bytes:
+    # Vector(...) bind → texto; listas/ndarray (SQL crudo) → directo
+    vec = Vector.from_text(value) if isinstance(value, str) else Vector(value)
+    return vec.to_binary()
+
+
+def _decode_vector(value: bytes) -> np.ndarray:
+    return Vector.from_binary(value).to_numpy().astype(np.float32)
+
+
+async def register_vector_codecs(conn) -> None:
+    await conn.set_type_codec(
+        "vector",
+        encoder=_encode_vector,
+        decoder=_decode_vector,
+        format="binary",
+    )
+
+
+# ------------------------------------------------------------------
+# 4️⃣ Engines (lazy: solo se crea el que el proceso usa)
+# ------------------------------------------------------------------
+_async_engines: Dict[Tuple[str, str], AsyncEngine] = {}
+_sync_engines: Dict[str, Engine] = {}
+
+
+def _create_async_engine(profile: str, url: str) -> AsyncEngine:
+    # Réplicas comparten perfil pero no métricas: "api@replica1:5432"
+    if url != async_url:
+        parsed = make_url(url)
+        profile_label = f"{profile}@{parsed.host}:{parsed.port or 5432}"
+    else:
+        profile_label = profile
+
+    if settings.db_pgbouncer:
+        # pgbouncer (transaction pooling): sin prepared statements cacheados
+        # y con nombres únicos para no chocar entre backends compartidos.
+        connect_args = {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        }
+    else:
+        connect_args = {"prepared_statement_cache_size": settings.db_statement_cache_size}
+    connect_args["server_settings"] = {"application_name": f"insight-core:{profile_label}"}
+
+    async_engine = create_async_engine(
+        url,
+        echo=echo,
+        poolclass=_timed_pool(AsyncAdaptedQueuePool, profile_label),
+        connect_args=connect_args,
+        **_pool_kwargs(profile),
+    )
+
+    @event.listens_for(async_engine.sync_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        dbapi_connection.run_async(register_vector_codecs)
+
+    _instrument_pool(async_engine.sync_engine, profile_label)
+    return async_engine
+
+
+def _create_sync_engine(profile: str) -> Engine:
+    connect_args = {"prepare_threshold": None} if settings.db_pgbouncer else {}
+    engine = create_engine(
+        sync_url,
+        echo=echo,
+        poolclass=_timed_pool(QueuePool, profile),
+        connect_args=connect_args,
+        **_pool_kwargs(profile),
+    )
+    _instrument_pool(engine, f"{profile}_sync")
+    return engine
+
+
+def get_async_engine(profile: Optional[str] = None, url: Optional[str] = None) -> AsyncEngine:
+    key = (_resolve_profile(profile), to_async_url(url) if url else async_url)
+    if key not in _async_engines:
+        _async_engines[key] = _create_async_engine(*key)
+    return _async_engines[key]
+
+
+def get_sync_engine(profile: Optional[str] = None) -> Engine:
+    profile = _resolve_profile(profile)
+    if profile not in _sync_engines:
+        _sync_engines[profile] = _create_sync_engine(profile)
+    return _sync_engines[profile]
+
+
+# ------------------------------------------------------------------
+# 5️⃣ Sesiones
+# ------------------------------------------------------------------
+@lru_cache(maxsize=None)
+def _session_maker(profile: str):
+    return sessionmaker(
+        bind=get_sync_engine(profile),
+        autocommit=False,
+        autoflush=False,
+    )
+
+
+@lru_cache(maxsize=None)
+def _async_session_maker(profile: str):
+    return sessionmaker(
+        bind=get_async_engine(profile),
+        class_=AsyncSession,
+        expire_on_commit=False,
+    )
+
+
+def get_session_maker(profile: Optional[str] = None):
+    return _session_maker(_resolve_profile(profile))
+
+
+def get_async_session_maker(profile: Optional[str] = None):
+    return _async_session_maker(_resolve_profile(profile))
+
+
+async def dispose_engines() -> None:
+    """Cierra todos los engines creados por este proceso."""
+    for async_engine in list(_async_engines.values()):
+        await async_engine.dispose()
+    for engine in list(_sync_engines.values()):
+        engine.dispose()
+
+
+# Compat: `from app.db.database import engine, async_engine, SessionLocal,
+# async_session_maker` sigue funcionando, pero solo crea lo que se importa
+# (perfil por defecto = settings.db_profile).
+_LAZY = {
+    "engine": get_sync_engine,
+    "async_engine": get_async_engine,
+    "SessionLocal": get_session_maker,
+    "async_session_maker": get_async_session_maker,
+}
+
+
+def __getattr__(name: str):
+    if name in _LAZY:
+        return _LAZY[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-async_session_maker = sessionmaker(
-    bind=async_engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-)
 
 # ------------------------------------------------------------------
-# 5️⃣ Dependency async
+# 6️⃣ Dependency async
 # ------------------------------------------------------------------
 async def get_async_session() -> AsyncSession:
-    async with async_session_maker() as session:
+    async with get_async_session_maker()() as session:
         yield session
@@ -0,0 +1,292 @@
+# app/db/jobs.py
+"""
+Cola de jobs en Postgres (tabla pipeline_jobs, ver models_jobs.py).
+
+- `enqueue`: idempotente por (kind, key). Los posts nuevos llegan solos
+  (trigger de la migración c0fa6e4f678e, prioridad PRIORITY_FRESH).
+- `claim`: transacción corta con FOR UPDATE SKIP LOCKED; suma un intento
+  y deja un lease. Un lease vencido (worker caído) se vuelve a reclamar.
+- `complete` / `fail`: en la misma transacción que escribe el resultado
+  (sin commit propio) → un item exitoso nunca se recalcula. `fail` agenda
+  el reintento con backoff exponencial; al agotar intentos → dead. Solo
+  tocan jobs `running` del mismo worker: un job ya cerrado, o reclamado
+  por otro tras vencer el lease, no cambia.
+- `request_run`: pedir otra corrida de un job por clave (cluster por
+  vertical). Si está running queda `rerun_requested` y `complete` lo
+  devuelve a pending: el pedido no se pierde aunque llegue a mitad de corrida.
+"""
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import case, func, literal, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.settings import settings
+from app.db.models_jobs import PipelineJob
+
+# kinds
+EMBED = "embed"
+CLASSIFY = "classify"
+CLUSTER = "cluster"
+
+# status
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+DEAD = "dead"
+
+# el trigger de posts nuevos usa PRIORITY_FRESH (mantener en sync con la migración)
+PRIORITY_FRESH = 100
+PRIORITY_BACKFILL = 0
+
+ENQUEUE_CHUNK = 5_000
+MAX_ERROR_CHARS = 2_000
+
+
+async def enqueue(
+    db: AsyncSession,
+    kind: str,
+    keys: Iterable[str],
+    vertical: str,
+    priority: int = PRIORITY_BACKFILL,
+    delay: float = 0.0,
+    reopen: bool = False,
+) -> int:
+    """
+    Encola (kind, key) para cada key. Si ya existe no hace nada, salvo
+    `reopen=True`: los jobs done/dead vuelven a pending (reclustering,
+    reprocesos manuales) y los running quedan con `rerun_requested`
+    (su corrida puede haber leído los datos antes del cambio).
+    Devuelve cuántos quedaron pendientes o marcados.
+    """
+    keys = list(dict.fromkeys(keys))
+    run_after = func.now() + timedelta(seconds=delay)
+    queued = 0
+    for i in range(0, len(keys), ENQUEUE_CHUNK):
+        if reopen:
+            # antes del upsert: si la corrida termina entre las dos sentencias,
+            # este UPDATE espera su commit, ya no matchea y el upsert la reabre
+            queued += (await db.execute(
+                update(PipelineJob)
+                .where(
+                    PipelineJob.kind == kind,
+                    PipelineJob.key.in_(keys[i : i + ENQUEUE_CHUNK]),
+                    PipelineJob.status == RUNNING,
+                    PipelineJob.rerun_requested.is_(False),
+                )
+                .values(rerun_requested=True)
+            )).rowcount
+        stmt = insert(PipelineJob).values([
+            {
+                "kind": kind,
+                "key": key,
+                "vertical": vertical,
+                "priority": priority,
+                "max_attempts": settings.job_max_attempts,
+                "run_after": run_after,
+            }
+            for key in keys[i : i + ENQUEUE_CHUNK]
+        ])
+        if reopen:
+            stmt = stmt.on_conflict_do_update(
+                constraint="uq_pipeline_jobs_kind_key",
+                set_={
+                    "status": PENDING,
+                    "attempts": 0,
+                    "priority": stmt.excluded.priority,
+                    "run_after": stmt.excluded.run_after,
+                    "last_error": None,
+                    "finished_at": None,
+                    "rerun_requested": False,
+                },
+                where=PipelineJob.status.in_((DONE, DEAD)),
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(constraint="uq_pipeline_jobs_kind_key")
+        queued += (await db.execute(stmt)).rowcount
+    return queued
+
+
+async def request_run(
+    db: AsyncSession,
+    kind: str,
+    key: str,
+    vertical: str,
+    delay: float = 0.0,
+) -> bool:
+    """
+    Pide una corrida de (kind, key) si no hay una pendiente. El caso común
+    (ya hay una pendiente, dentro del debounce) es un SELECT sin locks: los
+    workers que llaman esto en cada batch no se serializan en la fila del
+    job. Va en su propia transacción corta, después del commit del
+    resultado que la motiva (sin commit propio).
+    """
+    status = await db.scalar(
+        select(PipelineJob.status).where(PipelineJob.kind == kind, PipelineJob.key == key)
+    )
+    if status == PENDING:
+        return False  # todavía no corrió: va a ver los datos ya commiteados
+    return bool(await enqueue(db, kind, [key], vertical, delay=delay, reopen=True))
+
+
+async def claim(
+    db: AsyncSession,
+    kind: str,
+    limit: int,
+    worker_id: str,
+    lease_seconds: float,
+    vertical: Optional[str] = None,
+) -> List[PipelineJob]:
+    """
+    Reclama hasta `limit` jobs vencidos, mayor prioridad primero, y commitea
+    (el claim es su propia transacción corta: los locks de fila duran ms).
+    """
+    now = func.now()
+    await _dead_letter_expired(db, kind)
+
+    ready = (
+        ((PipelineJob.status == PENDING) & (PipelineJob.run_after <= now))
+        | ((PipelineJob.status == RUNNING) & (PipelineJob.lease_until < now))
+    )
+    claimable = (
+        select(PipelineJob.id)
+        .where(PipelineJob.kind == kind, ready, PipelineJob.attempts < PipelineJob.max_attempts)
+        .order_by(PipelineJob.priority.desc(), PipelineJob.run_after)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    if vertical is not None:
+        claimable = claimable.where(PipelineJob.vertical == vertical)
+    claimable = claimable.cte("claimable")
+
+    jobs = (await db.scalars(
+        update(PipelineJob)
+        .where(PipelineJob.id.in_(select(claimable.c.id)))
+        .values(
+            status=RUNNING,
+            attempts=PipelineJob.attempts + 1,
+            lease_until=now + timedelta(seconds=lease_seconds),
+            claimed_by=worker_id,
+        )
+        .returning(PipelineJob)
+        .execution_options(synchronize_session=False)
+    )).all()
+    await db.commit()
+    return sorted(jobs, key=lambda j: (-j.priority, j.run_after))
+
+
+async def _dead_letter_expired(db: AsyncSession, kind: str) -> None:
+    # running con lease vencido y sin intentos restantes: el worker murió en cada uno
+    # (p. ej. OOM con ese item) → no reclamarlo para siempre
+    await db.execute(
+        update(PipelineJob)
+        .where(
+            PipelineJob.kind == kind,
+            PipelineJob.status == RUNNING,
+            PipelineJob.lease_until < func.now(),
+            PipelineJob.attempts >= PipelineJob.max_attempts,
+        )
+        .values(status=DEAD, lease_until=None, last_error="lease expired", finished_at=func.now())
+    )
+
+
+def _owned(ids: List[int], worker_id: str):
+    """Siguen running y son de este worker (no se cerraron ni se reclamaron de nuevo)."""
+    return (
+        PipelineJob.id.in_(ids),
+        PipelineJob.status == RUNNING,
+        PipelineJob.claimed_by == worker_id,
+    )
+
+
+async def complete(
+    db: AsyncSession, ids: Iterable[int], worker_id: str, rerun_delay: float = 0.0
+) -> int:
+    """
+    Marca done (sin commit: va en la transacción del resultado). Los que
+    tienen `rerun_requested` vuelven a pending en `rerun_delay` segundos,
+    con los intentos en 0. Devuelve cuántos cerró (ver `_owned`).
+    """
+    ids = list(ids)
+    if not ids:
+        return 0
+    rerun = PipelineJob.rerun_requested
+    result = await db.execute(
+        update(PipelineJob)
+        .where(*_owned(ids, worker_id))
+        .values(
+            status=case((rerun, PENDING), else_=DONE),
+            attempts=case((rerun, 0), else_=PipelineJob.attempts),
+            run_after=case(
+                (rerun, func.now() + timedelta(seconds=rerun_delay)),
+                else_=PipelineJob.run_after,
+            ),
+            finished_at=case((rerun, None), else_=func.now()),
+            rerun_requested=False,
+            lease_until=None,
+            last_error=None,
+        )
+    )
+    return result.rowcount
+
+
+async def fail(
+    db: AsyncSession, ids: Iterable[int], worker_id: str, error: str, permanent: bool = False
+) -> int:
+    """
+    Reintento con backoff `base * 2^(attempts-1)` (tope job_backoff_max);
+    dead si se agotaron los intentos o si el error es `permanent` (p. ej.
+    post vacío: reintentar no cambia nada). Sin commit. Un `rerun_requested`
+    se descarta: el reintento ya es otra corrida (y un dead se reabre a mano).
+    Devuelve cuántos cambió (ver `_owned`).
+    """
+    ids = list(ids)
+    if not ids:
+        return 0
+    exhausted = PipelineJob.attempts >= PipelineJob.max_attempts
+    if permanent:
+        exhausted = literal(True)
+    backoff = func.least(
+        settings.job_backoff_base * func.power(2, PipelineJob.attempts - 1),
+        settings.job_backoff_max,
+    )
+    result = await db.execute(
+        update(PipelineJob)
+        .where(*_owned(ids, worker_id))
+        .values(
+            status=case((exhausted, DEAD), else_=PENDING),
+            run_after=func.now() + func.make_interval(0, 0, 0, 0, 0, 0, backoff),
+            finished_at=case((exhausted, func.now()), else_=None),
+            lease_until=None,
+            rerun_requested=False,
+            last_error=error[:MAX_ERROR_CHARS],
+        )
+    )
+    return result.rowcount
+
+
+async def queue_stats(db: AsyncSession) -> List[Dict]:
+    """Conteo por (kind, status) y el run_after más viejo."""
+    rows = await db.execute(
+        select(
+            PipelineJob.kind,
+            PipelineJob.status,
+            func.count().label("jobs"),
+            func.min(PipelineJob.run_after).label("oldest"),
+        )
+        .group_by(PipelineJob.kind, PipelineJob.status)
+        .order_by(PipelineJob.kind, PipelineJob.status)
+    )
+    return [dict(r._mapping) for r in rows]
+
+
+async def retry_dead(db: AsyncSession, kind: str) -> int:
+    """Devuelve los dead de `kind` a pending con intentos en 0 (y commitea)."""
+    result = await db.execute(
+        update(PipelineJob)
+        .where(PipelineJob.kind == kind, PipelineJob.status == DEAD)
+        .values(status=PENDING, attempts=0, run_after=func.now(), last_error=None, finished_at=None)
+    )
+    await db.commit()
+    return result.rowcount
@@ -0,0 +1,24 @@
+# app/db/models_counts.py
+from datetime import datetime
+from sqlmodel import SQLModel, Field, Column
+from sqlalchemy import BigInteger, DateTime, func
+
+
+class PostCount(SQLModel, table=True):
+    """
+    Cache de conteos por (vertical, cluster_id) para paginación.
+    El total de la vertical sale de vertical_stats. Ver app/db/counts.py.
+    """
+    __tablename__ = "post_counts"
+
+    vertical: str = Field(primary_key=True, max_length=255)
+    cluster_id: str = Field(primary_key=True, max_length=100)
+    total: int = Field(default=0, sa_column=Column(BigInteger, nullable=False))
+
+    refreshed_at: datetime = Field(
+        sa_column=Column(
+            DateTime(timezone=True),
+            nullable=False,
+            server_default=func.now()
+        )
+    )
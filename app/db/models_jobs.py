@@ -0,0 +1,55 @@
+# app/db/models_jobs.py
+from datetime import datetime
+from typing import Optional
+
+from sqlmodel import SQLModel, Field, Column
+from sqlalchemy import BigInteger, Boolean, DateTime, Identity, Integer, SmallInteger, String, Text, UniqueConstraint, func
+
+
+class PipelineJob(SQLModel, table=True):
+    """
+    Cola durable de trabajo de los pipelines (embed / classify / cluster).
+    Un job por (kind, key): key = pid para trabajo por post, vertical para
+    el reclustering. Operaciones en app/db/jobs.py.
+
+    pending → running (lease) → done
+                 ↘ pending (run_after con backoff) … → dead (max_attempts)
+    running + rerun_requested → pending al completar (se pidió otra corrida
+    mientras esta corría, p. ej. embeddings nuevos durante el clustering)
+    """
+    __tablename__ = "pipeline_jobs"
+    __table_args__ = (UniqueConstraint("kind", "key", name="uq_pipeline_jobs_kind_key"),)
+
+    id: Optional[int] = Field(default=None, sa_column=Column(BigInteger, Identity(), primary_key=True))
+    kind: str = Field(max_length=32)
+    key: str = Field(max_length=255)
+    vertical: str = Field(max_length=255)
+
+    # mayor primero: posts recién ingeridos antes que backfill
+    priority: int = Field(default=0, sa_column=Column(SmallInteger, nullable=False, server_default="0"))
+    status: str = Field(
+        default="pending",
+        sa_column=Column(String(16), nullable=False, server_default="pending"),
+    )
+    attempts: int = Field(default=0, sa_column=Column(Integer, nullable=False, server_default="0"))
+    max_attempts: int = Field(default=5, sa_column=Column(Integer, nullable=False, server_default="5"))
+    rerun_requested: bool = Field(
+        default=False,
+        sa_column=Column(Boolean, nullable=False, server_default="false"),
+    )
+    last_error: Optional[str] = Field(default=None, sa_column=Column(Text, nullable=True))
+
+    run_after: datetime = Field(
+        sa_column=Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    )
+    lease_until: Optional[datetime] = Field(
+        sa_column=Column(DateTime(timezone=True), nullable=True)
+    )
+    claimed_by: Optional[str] = Field(default=None, max_length=100)
+
+    created_at: datetime = Field(
+        sa_column=Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    )
+    finished_at: Optional[datetime] = Field(
+        sa_column=Column(DateTime(timezone=True), nullable=True)
+    )
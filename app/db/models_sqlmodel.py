@@ -3,12 +3,25 @@ from typing import Optional, List, Dict
 
 from sqlmodel import SQLModel, Field
 from sqlalchemy import Column, DateTime, func, JSON
-from pgvector.sqlalchemy import Vector
+from sqlalchemy.orm import declared_attr, deferred, undefer
+from pgvector.sqlalchemy import BIT, Vector
 
 
 class Post(SQLModel, table=True):
     __tablename__ = "posts_sqlmodel"
 
+    # `embedding` es diferido: `select(Post)` no transfiere el vector
+    # (384 floats por fila) salvo opt-in con `with_embedding()`.
+    # raiseload → leerlo sin cargarlo falla explícitamente (sin I/O implícito).
+    @declared_attr
+    def __mapper_args__(cls):
+        return {
+            "properties": {
+                "embedding": deferred(cls.__table__.c.embedding, raiseload=True),
+                "embedding_bit": deferred(cls.__table__.c.embedding_bit, raiseload=True),
+            }
+        }
+
     # Identificador (lo provee tu ingestor, por ahora)
     pid: str = Field(primary_key=True, max_length=255)
 
@@ -38,6 +51,11 @@ class Post(SQLModel, table=True):
     embedding: Optional[List[float]] = Field(
         sa_column=Column(Vector(384), nullable=True)
     )
+    # Sombra binaria (1 bit/dim, 48 B) para candidatos por Hamming; la
+    # mantiene un trigger desde `embedding` (migración 7a3e51c2d9b8).
+    embedding_bit: Optional[str] = Field(
+        default=None, sa_column=Column(BIT(384), nullable=True)
+    )
     enriched_at: Optional[datetime] = Field(
         sa_column=Column(DateTime(timezone=True), nullable=True)
     )
@@ -64,3 +82,11 @@ class Post(SQLModel, table=True):
     deleted_at: Optional[datetime] = Field(
         sa_column=Column(DateTime(timezone=True), nullable=True, index=True)
     )
+
+
+# ------------------------------------------------------------------
+# Loaders opt-in
+# ------------------------------------------------------------------
+def with_embedding():
+    """`select(Post).options(with_embedding())` → carga también el vector."""
+    return undefer(Post.embedding)
@@ -0,0 +1,70 @@
+# app/db/models_stats.py
+from datetime import datetime
+from typing import Optional
+from sqlmodel import SQLModel, Field, Column
+from sqlalchemy import BigInteger, DateTime, Identity, column, func, table
+
+
+class VerticalStats(SQLModel, table=True):
+    """
+    Resumen por vertical de posts no borrados, plegado periódicamente desde
+    vertical_stats_deltas (migración 5e8c1f3a7b20). Para leer usar la vista
+    `vertical_stats_live` (app/db/stats.py), que suma los deltas pendientes.
+    """
+    __tablename__ = "vertical_stats"
+
+    vertical: str = Field(primary_key=True, max_length=255)
+    total: int = Field(default=0, sa_column=Column(BigInteger, nullable=False))
+    embedded: int = Field(default=0, sa_column=Column(BigInteger, nullable=False))
+    enriched: int = Field(default=0, sa_column=Column(BigInteger, nullable=False))
+    clustered: int = Field(default=0, sa_column=Column(BigInteger, nullable=False))
+
+    updated_at: datetime = Field(
+        sa_column=Column(
+            DateTime(timezone=True),
+            nullable=False,
+            server_default=func.now()
+        )
+    )
+
+    @property
+    def pending(self) -> int:
+        """Posts sin embedding todavía."""
+        return max(self.total - self.embedded, 0)
+
+
+class VerticalStatsDelta(SQLModel, table=True):
+    """
+    Deltas append-only que escriben los triggers de posts_sqlmodel (uno por
+    sentencia y vertical); `vertical_stats_fold()` los pasa a vertical_stats.
+    """
+    __tablename__ = "vertical_stats_deltas"
+
+    id: Optional[int] = Field(
+        default=None, sa_column=Column(BigInteger, Identity(), primary_key=True)
+    )
+    vertical: str = Field(max_length=255)
+    d_total: int = Field(sa_column=Column(BigInteger, nullable=False))
+    d_embedded: int = Field(sa_column=Column(BigInteger, nullable=False))
+    d_enriched: int = Field(sa_column=Column(BigInteger, nullable=False))
+    d_clustered: int = Field(sa_column=Column(BigInteger, nullable=False))
+
+    created_at: datetime = Field(
+        sa_column=Column(
+            DateTime(timezone=True),
+            nullable=False,
+            server_default=func.now()
+        )
+    )
+
+
+# Vista: vertical_stats + deltas sin plegar (exacta en una sola sentencia)
+vertical_stats_live = table(
+    "vertical_stats_live",
+    column("vertical"),
+    column("total"),
+    column("embedded"),
+    column("enriched"),
+    column("clustered"),
+    column("updated_at"),
+)
@@ -0,0 +1,80 @@
+# app/db/notify.py
+"""
+LISTEN/NOTIFY de Postgres.
+
+Usa una conexión asyncpg dedicada (fuera del pool: LISTEN es estado de
+sesión y no sobrevive a pgbouncer en modo transaction → en ese caso
+pasar `url` directo al primario). Si la conexión se
+cae, reconecta con backoff; mientras tanto el consumidor debe seguir
+barriendo por intervalo (las notificaciones perdidas no se reenvían).
+"""
+import asyncio
+import json
+from typing import Awaitable, Callable, Optional
+
+import asyncpg
+from sqlalchemy import make_url
+
+from app.core.logger import logger
+from app.db.database import async_url
+
+Callback = Callable[[dict], Optional[Awaitable[None]]]
+
+
+def _dsn(url: str) -> str:
+    return make_url(url).set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+def _parse(payload: str) -> dict:
+    try:
+        return json.loads(payload)
+    except (TypeError, ValueError):
+        return {"payload": payload}
+
+
+async def listen(
+    channel: str,
+    callback: Callback,
+    stop: asyncio.Event,
+    url: Optional[str] = None,
+    max_backoff: float = 30.0,
+) -> None:
+    """
+    Escucha `channel` hasta que `stop` se setea. `callback(payload_dict)` se
+    llama en el event loop (puede ser sync o async; debe ser rápido).
+    """
+    dsn = _dsn(url or async_url)
+    backoff = 1.0
+
+    def _on_notify(conn, pid, chan, payload):
+        result = callback(_parse(payload))
+        if asyncio.iscoroutine(result):
+            asyncio.ensure_future(result)
+
+    while not stop.is_set():
+        conn = None
+        try:
+            conn = await asyncpg.connect(dsn)
+            lost = asyncio.Event()
+            conn.add_termination_listener(lambda _: lost.set())
+            await conn.add_listener(channel, _on_notify)
+            logger.info("👂 LISTEN %s", channel)
+            backoff = 1.0
+
+            stop_wait = asyncio.ensure_future(stop.wait())
+            lost_wait = asyncio.ensure_future(lost.wait())
+            await asyncio.wait({stop_wait, lost_wait}, return_when=asyncio.FIRST_COMPLETED)
+            stop_wait.cancel()
+            lost_wait.cancel()
+            if lost.is_set():
+                logger.warning("LISTEN %s: conexión perdida, reconectando", channel)
+        except (OSError, asyncpg.PostgresError) as e:
+            logger.warning("LISTEN %s falló: %s (reintento en %.0fs)", channel, e, backoff)
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=backoff)
+            except asyncio.TimeoutError:
+                pass
+            backoff = min(backoff * 2, max_backoff)
+        finally:
+            if conn is not None and not conn.is_closed():
+                await conn.close()
@@ -0,0 +1,310 @@
+# app/db/quantized.py
+"""
+Búsqueda semántica con representación compacta + re-rank en fp32
+(pgvector >= 0.7). Modo en `settings.vector_search_mode`:
+
+    fp32     embedding <=> q sobre el vector completo (1.536 B/fila)
+    halfvec  candidatos por índice HNSW de expresión embedding::halfvec(384)
+             (768 B/fila, sin columna extra)
+    binary   candidatos por Hamming sobre la sombra embedding_bit
+             (bit(384), 48 B/fila; la mantiene un trigger)
+    ivf      los :nprobe centroides más cercanos de la última corrida de
+             clustering (cuantizador grueso) → solo los posts de esos
+             clusters + los sin cluster (ruido / embebidos después)
+
+En halfvec/binary se piden (limit + offset) × vector_rerank_factor
+candidatos al índice compacto (que sí entra en RAM) y solo esos se
+re-ordenan con el coseno exacto fp32: el score devuelto es el mismo que
+en fp32. Los índices los crea app/scripts/backfill_quantized.py.
+
+Varias verticales en la tabla: un HNSW global devuelve los ef_search
+vecinos de todas y el `vertical = :vertical` filtra después; en una
+vertical minoritaria quedan pocos o ninguno. Remedios: índices parciales
+por vertical (`partial_index`) y, con pgvector >= 0.8,
+`hnsw.iterative_scan` (sigue recorriendo el grafo hasta llenar el LIMIT).
+"""
+import hashlib
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app.core.logger import logger
+from app.core.settings import settings
+
+MODES = ("fp32", "halfvec", "binary", "ivf")
+COMPACT_MODES = ("halfvec", "binary")
+DIM = 384
+MAX_CANDIDATES = 1000  # tope de hnsw.ef_search
+ITERATIVE_SCAN_VERSION = (0, 8)
+
+INDEX_NAMES = {
+    "binary": "ix_posts_sqlmodel_embedding_bit_hnsw",
+    "halfvec": "ix_posts_sqlmodel_embedding_half_hnsw",
+}
+_INDEX_KEYS = {
+    "binary": "embedding_bit bit_hamming_ops",
+    "halfvec": f"(embedding::halfvec({DIM})) halfvec_cosine_ops",
+}
+INDEXES: Dict[str, str] = {
+    mode: (
+        f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {INDEX_NAMES[mode]} "
+        f"ON posts_sqlmodel USING hnsw ({key})"
+    )
+    for mode, key in _INDEX_KEYS.items()
+}
+
+ROW_COLUMNS = """
+    p.pid, p.title, p.body, p.vertical, p.category, p.confidence,
+    p.enriched_at, p.embedding_attempt_at, p.created_at, p.updated_at, p.deleted_at
+"""
+COLUMNS = ROW_COLUMNS + ", 1 - (p.embedding <=> :query_vec) AS score"
+
+# (columna no nula, expresión indexada, operador, query en el mismo tipo)
+_CANDIDATES = {
+    "halfvec": (
+        "embedding",
+        f"(embedding::halfvec({DIM}))",
+        "<=>",
+        f"CAST(:query_vec AS vector)::halfvec({DIM})",
+    ),
+    "binary": (
+        "embedding_bit",
+        "embedding_bit",
+        "<~>",
+        f"binary_quantize(CAST(:query_vec AS vector))::bit({DIM})",
+    ),
+}
+
+
+def semantic_search_sql(mode: str) -> str:
+    """
+    SQL con parámetros :query_vec, :vertical, :min_score, :limit, :offset
+    (+ :candidates en los modos compactos, :nprobe en ivf).
+    """
+    if mode == "fp32":
+        return f"""
+            SELECT {COLUMNS}
+            FROM posts_sqlmodel p
+            WHERE p.embedding IS NOT NULL
+              AND p.deleted_at IS NULL
+              AND p.vertical = :vertical
+              AND (1 - (p.embedding <=> :query_vec)) >= :min_score
+            ORDER BY score DESC
+            LIMIT :limit OFFSET :offset
+        """
+    if mode == "ivf":
+        return _ivf_sql()
+    if mode not in _CANDIDATES:
+        raise ValueError(f"vector_search_mode desconocido: {mode!r} (válidos: {MODES})")
+
+    column, indexed, op, query = _CANDIDATES[mode]
+    # MATERIALIZED: el planner no debe fusionar el CTE y perder el ORDER BY
+    # por índice (el re-rank va afuera)
+    return f"""
+        WITH candidates AS MATERIALIZED (
+            SELECT pid
+            FROM posts_sqlmodel
+            WHERE {column} IS NOT NULL
+              AND deleted_at IS NULL
+              AND vertical = :vertical
+            ORDER BY {indexed} {op} {query}
+            LIMIT :candidates
+        )
+        SELECT {COLUMNS}
+        FROM candidates c
+        JOIN posts_sqlmodel p ON p.pid = c.pid
+        WHERE (1 - (p.embedding <=> :query_vec)) >= :min_score
+        ORDER BY score DESC
+        LIMIT :limit OFFSET :offset
+    """
+
+
+def _ivf_sql() -> str:
+    """
+    Sondeo en SQL (no con app/ml/centroid_index.py): centroides y
+    Post.cluster_id se leen del mismo snapshot de la transacción, así que
+    no hay ventana entre el commit de una corrida y la recarga del índice
+    en memoria. Cada rama usa ix_posts_sqlmodel_vertical_cluster.
+    """
+    filters = """
+        p.vertical = :vertical
+        AND p.embedding IS NOT NULL
+        AND p.deleted_at IS NULL
+    """
+    return f"""
+        WITH probes AS MATERIALIZED (
+            SELECT CAST(id AS text) AS cluster_id
+            FROM insights_clusters
+            WHERE vertical = :vertical
+              AND centroid IS NOT NULL
+              AND created_at = (
+                  SELECT max(created_at) FROM insights_clusters WHERE vertical = :vertical
+              )
+            ORDER BY centroid <=> :query_vec
+            LIMIT :nprobe
+        )
+        SELECT * FROM (
+            SELECT {COLUMNS}
+            FROM posts_sqlmodel p
+            WHERE {filters}
+              AND p.cluster_id IN (SELECT cluster_id FROM probes)
+            UNION ALL
+            -- ruido y posts sin clusterizar todavía: siempre se escanean
+            SELECT {COLUMNS}
+            FROM posts_sqlmodel p
+            WHERE {filters}
+              AND p.cluster_id IS NULL
+        ) hits
+        WHERE score >= :min_score
+        ORDER BY score DESC
+        LIMIT :limit OFFSET :offset
+    """
+
+
+def semantic_batch_sql(n: int) -> str:
+    """
+    N búsquedas en un solo statement: VALUES con un vector por query y
+    LATERAL top-k por fila (k y min_score propios). Parámetros :vertical
+    y :v{i}, :k{i}, :m{i} para i en [0, n). Resultado ordenado por
+    (idx, score desc). Siempre fp32 exacto.
+    """
+    values = ",\n".join(
+        f"({i}, CAST(:v{i} AS vector), CAST(:k{i} AS int), CAST(:m{i} AS float8))"
+        for i in range(n)
+    )
+    return f"""
+        SELECT q.idx, hits.*
+        FROM (VALUES {values}) AS q(idx, vec, k, min_score)
+        CROSS JOIN LATERAL (
+            SELECT {ROW_COLUMNS}, 1 - (p.embedding <=> q.vec) AS score
+            FROM posts_sqlmodel p
+            WHERE p.embedding IS NOT NULL
+              AND p.deleted_at IS NULL
+              AND p.vertical = :vertical
+              AND (1 - (p.embedding <=> q.vec)) >= q.min_score
+            ORDER BY p.embedding <=> q.vec
+            LIMIT q.k
+        ) hits
+        ORDER BY q.idx, hits.score DESC
+    """
+
+
+def candidates_for(limit: int, offset: int, factor: Optional[int] = None) -> int:
+    """Candidatos a re-rankear; nunca más de MAX_CANDIDATES (offset + limit debe entrar)."""
+    factor = factor or settings.vector_rerank_factor
+    return max(40, min((limit + offset) * factor, MAX_CANDIDATES))
+
+
+def partial_index(mode: str, vertical: str) -> Tuple[str, str]:
+    """
+    (nombre, DDL) del índice compacto de una sola vertical: el grafo HNSW
+    ya es solo de esa vertical, así que el filtro no le quita vecinos.
+    """
+    slug = re.sub(r"[^a-z0-9]+", "_", vertical.lower()).strip("_")[:16]
+    digest = hashlib.md5(vertical.encode("utf-8")).hexdigest()[:8]
+    name = f"{INDEX_NAMES[mode]}_{slug}_{digest}"  # <= 63 chars
+    literal = vertical.replace("'", "''")
+    return name, (
+        f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} "
+        f"ON posts_sqlmodel USING hnsw ({_INDEX_KEYS[mode]}) "
+        f"WHERE vertical = '{literal}'"
+    )
+
+
+_iterative_scan: Optional[bool] = None
+
+
+async def _supports_iterative_scan(db) -> bool:
+    global _iterative_scan
+    if _iterative_scan is None:
+        version = await db.scalar(text("SELECT extversion FROM pg_extension WHERE extname = 'vector'"))
+        parts = tuple(int(p) for p in re.findall(r"\d+", version or "")[:2])
+        _iterative_scan = parts >= ITERATIVE_SCAN_VERSION
+    return _iterative_scan
+
+
+async def set_index_scan(db, candidates: int) -> None:
+    """
+    Ajustes locales a la transacción para la búsqueda de candidatos:
+    - ef_search >= candidatos: si no, HNSW devuelve menos filas que LIMIT.
+    - plan custom siempre: con el statement preparado, un plan genérico
+      (`vertical = $1`) no puede usar los índices parciales por vertical.
+    - iterative_scan (pgvector >= 0.8): el filtro por vertical no vacía
+      el resultado; relaxed_order alcanza porque afuera se re-rankea.
+    """
+    await db.execute(
+        text("""
+            SELECT set_config('hnsw.ef_search', :ef, true),
+                   set_config('plan_cache_mode', 'force_custom_plan', true)
+        """),
+        {"ef": str(max(candidates, 40))},
+    )
+    if await _supports_iterative_scan(db):
+        await db.execute(text("SELECT set_config('hnsw.iterative_scan', 'relaxed_order', true)"))
+
+
+async def fetch_scored_posts(
+    db: AsyncSession, vertical: str, pids: Sequence[str], scores: Sequence[float]
+) -> List[dict]:
+    """
+    Filas de los pids rankeados fuera de la base (app/ml/vector_search.py),
+    en el mismo orden y con su score. Los borrados/movidos después del
+    snapshot no vuelven.
+    """
+    if not pids:
+        return []
+    rows = await db.execute(
+        text(f"""
+            SELECT {ROW_COLUMNS}
+            FROM posts_sqlmodel p
+            WHERE p.pid = ANY(:pids)
+              AND p.deleted_at IS NULL
+              AND p.vertical = :vertical
+        """),
+        {"pids": list(pids), "vertical": vertical},
+    )
+    by_pid = {row["pid"]: dict(row) for row in rows.mappings()}
+    out = []
+    for pid, score in zip(pids, scores):
+        row = by_pid.get(pid)
+        if row is not None:
+            row["score"] = float(score)
+            out.append(row)
+    return out
+
+
+# ============================================================
+# 🧱 Backfill + índices (app/scripts/backfill_quantized.py)
+# ============================================================
+async def backfill_embedding_bit(conn: AsyncConnection, after: str, batch_size: int) -> List[str]:
+    """
+    Un lote por keyset de pid (sin re-escanear lo ya hecho). Commitea por
+    lote: locks cortos y progreso que sobrevive a un corte. Devuelve los
+    pids recorridos (vacío = terminado).
+    """
+    pids = list((await conn.execute(
+        text("SELECT pid FROM posts_sqlmodel WHERE pid > :after ORDER BY pid LIMIT :n"),
+        {"after": after, "n": batch_size},
+    )).scalars())
+    if pids:
+        await conn.execute(
+            text(f"""
+                UPDATE posts_sqlmodel
+                SET embedding_bit = binary_quantize(embedding)::bit({DIM})
+                WHERE pid = ANY(:pids)
+                  AND embedding IS NOT NULL
+                  AND embedding_bit IS NULL
+            """),
+            {"pids": pids},
+        )
+    await conn.commit()
+    return pids
+
+
+async def create_index(conn: AsyncConnection, mode: str, vertical: Optional[str] = None) -> None:
+    """CREATE INDEX CONCURRENTLY (conexión en AUTOCOMMIT); parcial si hay `vertical`."""
+    name, ddl = partial_index(mode, vertical) if vertical else (INDEX_NAMES[mode], INDEXES[mode])
+    logger.info("🏗️ Creando índice %s (CONCURRENTLY)...", name)
+    await conn.execute(text(ddl))
@@ -0,0 +1,133 @@
+# app/db/replicas.py
+"""
+Routing de lecturas a réplicas de Postgres.
+
+- Round-robin entre réplicas sanas.
+- Lag-aware: una réplica con lag > `replica_max_lag` (o que no responde)
+  queda fuera hasta el próximo chequeo; sin réplicas sanas → primario.
+- Una réplica sin WAL receiver en `streaming` (desconectada del
+  primario) cuenta como caída: su lag reportado no significa nada.
+- El chequeo corre en background (`refresh_loop`, lifespan de la API)
+  cada `replica_check_interval` segundos; las requests solo leen el
+  último estado. Hasta el primer chequeo todo va al primario.
+"""
+import asyncio
+import itertools
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.core.logger import logger
+from app.core.settings import settings
+from app.db.database import get_async_engine
+
+CHECK_TIMEOUT = 1.0
+STALE_CHECKS = 3   # estado sin refrescar por N intervalos (refresher caído) → primario
+
+# NULL si el WAL receiver no está en streaming (receive = replay también
+# vale con el receiver caído); 0 si ya reprodujo todo lo recibido (evita
+# falso lag en primario ocioso); si no, antigüedad de la última
+# transacción reproducida.
+LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN NOT EXISTS (
+            SELECT 1 FROM pg_stat_wal_receiver WHERE status = 'streaming'
+        ) THEN NULL
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+@dataclass
+class ReplicaState:
+    url: str
+    lag: float = 0.0
+    healthy: bool = False
+    checked_at: float = 0.0
+
+    @property
+    def engine(self):
+        return get_async_engine("api", self.url)
+
+
+class ReplicaRouter:
+    def __init__(
+        self,
+        urls: List[str],
+        max_lag: float,
+        check_interval: float,
+    ):
+        self.replicas = [ReplicaState(url) for url in urls]
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._rr = itertools.count()
+        self._makers = {}
+
+    async def _check(self, replica: ReplicaState) -> None:
+        try:
+            async with asyncio.timeout(CHECK_TIMEOUT):
+                async with replica.engine.connect() as conn:
+                    lag = await conn.scalar(LAG_SQL)
+            was_healthy = replica.healthy
+            if lag is None:
+                replica.lag, replica.healthy = float("inf"), False
+                if was_healthy:
+                    logger.warning("Replica not streaming from primary, falling back")
+            else:
+                replica.lag = float(lag)
+                replica.healthy = replica.lag <= self.max_lag
+                if was_healthy and not replica.healthy:
+                    logger.warning("Replica lagging (%.1fs), falling back", replica.lag)
+        except Exception as e:
+            if replica.healthy:
+                logger.warning("Replica check failed: %s", e)
+            replica.healthy = False
+        finally:
+            replica.checked_at = time.monotonic()
+
+    async def check_all(self) -> None:
+        await asyncio.gather(*(self._check(r) for r in self.replicas))
+
+    async def refresh_loop(self, stop: asyncio.Event) -> None:
+        """Chequeo periódico de todas las réplicas (fuera del camino de las requests)."""
+        if not self.replicas:
+            return
+        while not stop.is_set():
+            await self.check_all()
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=self.check_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def pick(self) -> Optional[ReplicaState]:
+        """Réplica sana (round-robin) o None → usar primario."""
+        deadline = time.monotonic() - STALE_CHECKS * self.check_interval
+        healthy = [r for r in self.replicas if r.healthy and r.checked_at >= deadline]
+        if not healthy:
+            return None
+        return healthy[next(self._rr) % len(healthy)]
+
+    async def session_maker(self) -> Optional[sessionmaker]:
+        replica = self.pick()
+        if replica is None:
+            return None
+        if replica.url not in self._makers:
+            self._makers[replica.url] = sessionmaker(
+                bind=replica.engine,
+                class_=AsyncSession,
+                expire_on_commit=False,
+            )
+        return self._makers[replica.url]
+
+
+replica_router = ReplicaRouter(
+    settings.database_replica_urls,
+    max_lag=settings.replica_max_lag,
+    check_interval=settings.replica_check_interval,
+)
@@ -0,0 +1,91 @@
+# app/db/stats.py
+"""
+Lectura de vertical_stats (total / embedded / pending / enriched / clustered).
+
+Los triggers por sentencia sobre posts_sqlmodel solo agregan deltas a
+vertical_stats_deltas (append-only: las escrituras concurrentes de una
+vertical no compiten por una fila). `fold_loop` los pliega en
+vertical_stats cada pocos segundos; las lecturas van contra la vista
+`vertical_stats_live` (plegado + pendientes), así que siempre son exactas
+y cuestan una búsqueda por PK más los deltas sin plegar.
+"""
+import asyncio
+from typing import Dict
+
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.logger import logger
+from app.db.models_stats import VerticalStats, vertical_stats_live
+
+FOLD_LOCK_ID = 0x57A75F01  # pg_advisory_xact_lock: un solo fold a la vez
+
+
+async def get_vertical_stats(db: AsyncSession, vertical: str) -> VerticalStats:
+    """Stats de la vertical (todo en 0 si todavía no tiene posts)."""
+    row = (await db.execute(
+        select(vertical_stats_live).where(vertical_stats_live.c.vertical == vertical)
+    )).mappings().first()
+    if row is None:
+        return VerticalStats(vertical=vertical)
+    return VerticalStats(**row)
+
+
+async def get_global_stats(db: AsyncSession) -> Dict[str, int]:
+    """Suma de todas las verticales."""
+    live = vertical_stats_live.c
+    row = (await db.execute(
+        select(
+            func.coalesce(func.sum(live.total), 0).label("total"),
+            func.coalesce(func.sum(live.embedded), 0).label("embedded"),
+        )
+    )).one()
+    return {"total": int(row.total), "embedded": int(row.embedded)}
+
+
+def stats_payload(stats: VerticalStats) -> Dict[str, int]:
+    return {
+        "total": stats.total,
+        "embedded": stats.embedded,
+        "pending": stats.pending,
+        "enriched": stats.enriched,
+        "clustered": stats.clustered,
+    }
+
+
+async def refresh_vertical_stats(db: AsyncSession) -> None:
+    """Recalcula todo desde cero (corrige drift; normalmente no hace falta)."""
+    await db.execute(text("SELECT vertical_stats_refresh()"))
+    await db.commit()
+
+
+# ============================================================
+# 🧮 Fold de deltas (background)
+# ============================================================
+async def fold_vertical_stats(db: AsyncSession) -> int:
+    """Pliega los deltas pendientes. -1 si otro proceso ya está plegando."""
+    locked = await db.scalar(
+        text("SELECT pg_try_advisory_xact_lock(:id)"), {"id": FOLD_LOCK_ID}
+    )
+    if not locked:
+        await db.rollback()
+        return -1
+    folded = await db.scalar(text("SELECT vertical_stats_fold()"))
+    await db.commit()
+    return int(folded or 0)
+
+
+async def fold_loop(session_maker, interval: float, stop: asyncio.Event) -> None:
+    """Loop de fold para el lifespan de la API (y el worker de embeddings)."""
+    while not stop.is_set():
+        try:
+            async with session_maker() as db:
+                folded = await fold_vertical_stats(db)
+            if folded > 0:
+                logger.debug("🧮 vertical_stats: %s deltas plegados", folded)
+        except Exception:
+            logger.error("vertical_stats fold failed", exc_info=True)
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            pass
@@ -1,74 +1,125 @@
 # app/enrichment/cluster_pipeline.py
+import argparse
 import asyncio
+import json
+import os
+import socket
 import numpy as np
 from datetime import datetime, timezone
 from sqlmodel import select
+from sqlalchemy import delete, text
 from sqlalchemy.exc import SQLAlchemyError
 
-from app.db.database import async_session_maker
-from app.db.models_sqlmodel import Post
+from app.db import jobs
+from app.db.counts import refresh_counts
+from app.db.database import get_async_session_maker
+from app.db.models_sqlmodel import Post, with_embedding
 from app.db.models_clusters import Cluster
+from app.ml.centroid_index import NOTIFY_CHANNEL
 from app.ml.clustering import cluster_embeddings
 from app.ml.embedder import embed_text
 from app.core.settings import settings
 from app.core.logger import logger
+from app.core.profiling import StageTimer, worker_profiler
 
+async_session_maker = get_async_session_maker("cluster_job")
 
-async def cluster_posts():
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"[:100]
+CLUSTER_LEASE_SECONDS = 3600  # HDBSCAN sobre toda la vertical puede tardar
+
+
+async def cluster_posts(vertical: str = settings.vertical):
     """
     Agrupa posts enriquecidos (con embeddings) en clusters semánticos.
     - Usa HDBSCAN (basado en densidad)
     - Calcula centroides
     - Guarda resumen y metadatos (n_posts, last_post_at)
+    PROFILE=1 / SIGUSR1 para perfilar (app/core/profiling.py).
+    """
+    stages = StageTimer("cluster_posts")
+    with worker_profiler("cluster_posts"):
+        try:
+            return await _cluster_posts(stages, vertical)
+        finally:
+            stages.log_summary()
+
+
+async def run_cluster_jobs(limit: int = 1) -> int:
     """
+    Consume jobs `cluster` (uno por vertical, los encola el worker de
+    embeddings con debounce). Si llegaron embeddings durante la corrida
+    (`rerun_requested`), el job vuelve a pending tras otro debounce.
+    Devuelve cuántos corrió.
+    """
+    async with async_session_maker() as session:
+        batch = await jobs.claim(session, jobs.CLUSTER, limit, WORKER_ID, CLUSTER_LEASE_SECONDS)
+
+    for job in batch:
+        result = await cluster_posts(job.vertical)
+        async with async_session_maker() as session:
+            if result is None:  # _cluster_posts ya logueó el error
+                await jobs.fail(session, [job.id], WORKER_ID, "clustering falló (ver logs)")
+            else:
+                await jobs.complete(session, [job.id], WORKER_ID, rerun_delay=settings.cluster_debounce)
+            await session.commit()
+    return len(batch)
+
+
+async def _cluster_posts(stages: StageTimer, vertical: str):
     async with async_session_maker() as session:
         try:
             # 1️⃣ Obtener todos los posts con embeddings disponibles
-            result = await session.execute(
-                select(Post)
-                .where(
-                    Post.vertical == settings.vertical,
-                    Post.embedding.is_not(None),
-                    Post.enriched_at.is_not(None)
+            with stages.stage("fetch"):
+                result = await session.execute(
+                    select(Post)
+                    .where(
+                        Post.vertical == vertical,
+                        Post.embedding.is_not(None),
+                        Post.enriched_at.is_not(None)
+                    )
+                    .options(with_embedding())
                 )
-            )
-            posts = result.scalars().all()
+                posts = result.scalars().all()
 
+            # Sin posts o sin clusters válidos la corrida igual reemplaza a la
+            # anterior (sección 4️⃣): sus clusters y cluster_id ya no describen
+            # los embeddings actuales.
             if not posts:
                 logger.warning("⚠️ No hay embeddings disponibles para clusterizar.")
-                return {"vertical": settings.vertical, "clusters": 0, "posts": 0}
-
-            logger.info("🧩 Obtenidos %s posts enriquecidos para %s", len(posts), settings.vertical)
+                labels, n_clusters = [], 0
+            else:
+                logger.info("🧩 Obtenidos %s posts enriquecidos para %s", len(posts), vertical)
 
-            # 2️⃣ Ejecutar clustering
-            embeddings = [np.array(p.embedding, dtype=np.float32) for p in posts]
-            labels, n_clusters = cluster_embeddings(embeddings)
+                # 2️⃣ Ejecutar clustering
+                with stages.stage("cluster"):
+                    embeddings = [np.array(p.embedding, dtype=np.float32) for p in posts]
+                    labels, n_clusters = cluster_embeddings(embeddings)
 
             if n_clusters == 0:
-                logger.info("⚠️ No se formaron clusters válidos.")
-                return {"vertical": settings.vertical, "clusters": 0, "posts": len(posts)}
-
-            logger.info("🧠 Detectados %s clusters válidos", n_clusters)
+                logger.info("⚠️ No se formaron clusters válidos: se borra la corrida anterior.")
+            else:
+                logger.info("🧠 Detectados %s clusters válidos", n_clusters)
 
             # 3️⃣ Crear objetos Cluster para DB
             clusters_data = []
+            by_label = {}
             now = datetime.now(timezone.utc)
 
-            for cluster_id in set(labels):
-                if cluster_id == -1:
-                    continue  # -1 = ruido
+            with stages.stage("centroids"):
+                for cluster_id in set(labels):
+                    if cluster_id == -1:
+                        continue  # -1 = ruido
 
-                cluster_posts = [p for p, label in zip(posts, labels) if label == cluster_id]
-                centroid = np.mean([p.embedding for p in cluster_posts], axis=0).tolist()
-                joined_titles = " | ".join([p.title for p in cluster_posts])
+                    cluster_posts = [p for p, label in zip(posts, labels) if label == cluster_id]
+                    centroid = np.mean([p.embedding for p in cluster_posts], axis=0).tolist()
+                    joined_titles = " | ".join([p.title for p in cluster_posts])
 
-                # 🔹 Resumen semántico (por ahora placeholder)
-                summary_text = f"Theme of {len(cluster_posts)} posts: {joined_titles[:120]}..."
-                label = f"Cluster {cluster_id}"
+                    # 🔹 Resumen semántico (por ahora placeholder)
+                    summary_text = f"Theme of {len(cluster_posts)} posts: {joined_titles[:120]}..."
+                    label = f"Cluster {cluster_id}"
 
-                clusters_data.append(
-                    Cluster(
-                        vertical=settings.vertical,
+                    by_label[cluster_id] = Cluster(
+                        vertical=vertical,
                         label=label,
                         summary=summary_text,
                         n_posts=len(cluster_posts),
@@ -77,16 +128,35 @@ async def cluster_posts():
                         centroid=centroid,
                         created_at=now,
                     )
+                    clusters_data.append(by_label[cluster_id])
+
+            # 4️⃣ Guardar clusters en la DB (reemplaza la corrida anterior en
+            # la misma transacción: nunca hay dos corridas visibles a la vez)
+            with stages.stage("write"):
+                await session.execute(
+                    delete(Cluster).where(Cluster.vertical == vertical)
+                )
+                session.add_all(clusters_data)
+                await session.flush()  # ids de los clusters nuevos
+                await _assign_posts(session, vertical, posts, labels, by_label)
+                # se entrega al commit: la API recarga los centroides de la vertical
+                await session.execute(
+                    text("SELECT pg_notify(:channel, :payload)"),
+                    {"channel": NOTIFY_CHANNEL, "payload": json.dumps({"vertical": vertical})},
                 )
+                await session.commit()
 
-            # 4️⃣ Guardar clusters en la DB
-            session.add_all(clusters_data)
-            await session.commit()
+            logger.info("✅ Guardados %s clusters en la DB para '%s'", len(clusters_data), vertical)
 
-            logger.info("✅ Guardados %s clusters en la DB para '%s'", len(clusters_data), settings.vertical)
+            # post_counts por cluster_id: los ids cambiaron en bloque
+            try:
+                await refresh_counts(session, vertical)
+            except SQLAlchemyError:
+                logger.warning("⚠️ No se pudo refrescar post_counts (lo hará el refresh periódico)", exc_info=True)
+                await session.rollback()
 
             return {
-                "vertical": settings.vertical,
+                "vertical": vertical,
                 "clusters": len(clusters_data),
                 "posts": len(posts),
             }
@@ -99,6 +169,45 @@ async def cluster_posts():
             await session.rollback()
 
 
+async def _assign_posts(session, vertical: str, posts, labels, by_label) -> None:
+    """
+    Post.cluster_id = id del cluster de esta corrida (NULL = ruido). Es la
+    partición de la búsqueda IVF: los posts que quedaran con ids de una
+    corrida anterior no se sondearían nunca, así que se limpian.
+    """
+    cluster_ids = [
+        str(by_label[label].id) if label in by_label else None
+        for label in labels
+    ]
+    await session.execute(
+        text("""
+            UPDATE posts_sqlmodel p
+            SET cluster_id = a.cluster_id
+            FROM unnest(CAST(:pids AS text[]), CAST(:cluster_ids AS text[])) AS a(pid, cluster_id)
+            WHERE p.pid = a.pid
+              AND p.cluster_id IS DISTINCT FROM a.cluster_id
+        """),
+        {"pids": [p.pid for p in posts], "cluster_ids": cluster_ids},
+    )
+    await session.execute(
+        text("""
+            UPDATE posts_sqlmodel
+            SET cluster_id = NULL
+            WHERE vertical = :vertical
+              AND cluster_id IS NOT NULL
+              AND NOT (cluster_id = ANY(CAST(:current AS text[])))
+        """),
+        {"vertical": vertical, "current": [str(c.id) for c in by_label.values()]},
+    )
+
+
 if __name__ == "__main__":
-    result = asyncio.run(cluster_posts())
-    print("\nResultado final:", result)
+    parser = argparse.ArgumentParser(description="Clustering de posts")
+    parser.add_argument("--jobs", action="store_true", help="consumir jobs `cluster` de pipeline_jobs")
+    args = parser.parse_args()
+
+    if args.jobs:
+        print("\nJobs corridos:", asyncio.run(run_cluster_jobs()))
+    else:
+        result = asyncio.run(cluster_posts())
+        print("\nResultado final:", result)
@@ -1,24 +1,33 @@
+import argparse
 import asyncio
 import numpy as np
 import signal
 import sys
 import os
 import atexit
+import socket
 from concurrent.futures import ThreadPoolExecutor
 from functools import lru_cache
-from datetime import datetime, timedelta
-from typing import List, Union, Callable
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set, Union, Callable
+from collections import defaultdict
 from contextlib import nullcontext
 
-from sqlalchemy import update
-from sqlalchemy.exc import SQLAlchemyError, OperationalError
+from sqlalchemy import func
 from sqlalchemy.future import select
+from sqlalchemy.exc import SQLAlchemyError
 from sentence_transformers import SentenceTransformer
-from tenacity import retry, stop_after_attempt, wait_exponential
 
-from app.db.database import async_session_maker
+from app.db import jobs
+from app.db.database import get_async_session_maker
+from app.db.models_jobs import PipelineJob
 from app.db.models_sqlmodel import Post
-from app.core.logger import logger
+from app.db.models_stats import vertical_stats_live
+from app.db.stats import fold_loop
+from app.db.notify import listen
+from app.ml.encode_batching import PaddingStats, encode_bucketed
+from app.core.logger import RateLimitedLogger, logger
+from app.core.profiling import StageTimer, worker_profiler
 from app.core.settings import settings
 
 
@@ -26,11 +35,26 @@ from app.core.settings import settings
 # ⚙️ Optional Prometheus Metrics
 # ============================================================
 try:
-    from prometheus_client import Counter, Histogram
+    from prometheus_client import Counter, Gauge, Histogram, start_http_server
     USE_PROM = True
     emb_ok = Counter("embeddings_generated_total", "Embeddings exitosos")
     emb_fail = Counter("embeddings_failed_total", "Embeddings fallidos")
     emb_dur = Histogram("embedding_batch_duration_seconds", "Duración del batch")
+    emb_tokens = Counter(
+        "embedding_tokens_total", "Tokens por forward del encoder (real | padded)", ["kind"]
+    )
+    emb_backlog = Gauge("embedding_backlog_posts", "Posts sin embedding", multiprocess_mode="max")
+    emb_lag = Gauge(
+        "embedding_lag_seconds", "Antigüedad del post más viejo aún no intentado", multiprocess_mode="max"
+    )
+    emb_heartbeat = Gauge(
+        "embedding_worker_heartbeat_timestamp", "Última vuelta del worker (unix ts)", multiprocess_mode="max"
+    )
+    emb_ingest_latency = Histogram(
+        "embedding_ingest_to_searchable_seconds",
+        "Desde created_at hasta que el post tiene embedding",
+        buckets=(1, 2, 5, 10, 30, 60, 300, 900, 3600, 6 * 3600, 24 * 3600),
+    )
 except ImportError:
     USE_PROM = False
 
@@ -47,12 +71,20 @@ if sys.platform.startswith("win"):
 # ============================================================
 MODEL_NAME = getattr(settings, "model_name", "sentence-transformers/all-MiniLM-L6-v2")
 BATCH_LIMIT = getattr(settings, "batch_limit", 1000)
-BATCH_SIZE = getattr(settings, "batch_size", 100)
-ENCODE_BATCH_SIZE = getattr(settings, "encode_batch_size", 64)
-MAX_WORDS = getattr(settings, "max_words", 250)
+# posts por claim = ventana que se ordena por largo: más grande → menos padding
+BATCH_SIZE = getattr(settings, "batch_size", 500)
+ENCODE_TOKEN_BUDGET = settings.encode_token_budget
+ENCODE_MAX_BATCH = settings.encode_max_batch
 MAX_WORKERS = getattr(settings, "max_workers", 1)
 ENCODE_TIMEOUT = getattr(settings, "encode_timeout", 120)
-RETRY_HOURS = getattr(settings, "retry_hours", 24)
+LEASE_SECONDS = settings.embed_lease_seconds
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"[:100]
+NOTIFY_CHANNEL = "posts_inserted"  # trigger de la migración d87131f0285f
+
+async_session_maker = get_async_session_maker("embed_worker")
+
+# Avisos por post: con un lote roto serían miles de líneas por batch
+row_logger = RateLimitedLogger(logger, per_second=1, burst=20)
 
 logger.info(f"🚀 Worker iniciado (PID={os.getpid()}, container={os.environ.get('HOSTNAME','local')})")
 
@@ -82,7 +114,27 @@ def _safe_shutdown():
         logger.warning("⚠️ ThreadPool ya estaba cerrado.")
 
 atexit.register(_safe_shutdown)
-signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+
+# ============================================================
+# 🛑 Apagado ordenado (SIGTERM/SIGINT → terminar el batch en curso)
+# ============================================================
+shutdown = asyncio.Event()
+
+
+def _request_shutdown(signum: int) -> None:
+    if not shutdown.is_set():
+        logger.info("🛑 %s recibido: terminando el batch en curso...", signal.Signals(signum).name)
+        shutdown.set()
+
+
+def _install_signal_handlers() -> None:
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(signum, _request_shutdown, signum)
+        except NotImplementedError:  # Windows
+            signal.signal(signum, lambda s, _: loop.call_soon_threadsafe(_request_shutdown, s))
 
 
 # ============================================================
@@ -95,15 +147,14 @@ async def embed_text(texts: Union[str, List[str]]) -> List[List[float]]:
     def _encode():
         model = get_model()
         try:
-            return model.encode(
-                texts,
-                batch_size=ENCODE_BATCH_SIZE,
-                show_progress_bar=False,
-                normalize_embeddings=True,
+            embs, padding = encode_bucketed(
+                model, texts, ENCODE_TOKEN_BUDGET, ENCODE_MAX_BATCH, normalize_embeddings=True,
             )
         except Exception as e:
             logger.error(f"💥 Error interno en encode(): {e}")
             return [None] * len(texts)
+        _report_padding(padding)
+        return embs
 
     try:
         return await asyncio.wait_for(
@@ -115,126 +166,283 @@ async def embed_text(texts: Union[str, List[str]]) -> List[List[float]]:
         raise
 
 
+def _report_padding(padding: PaddingStats) -> None:
+    logger.debug(
+        "🧮 %s forwards, %s tokens reales, padding %.1f%%",
+        padding.batches, padding.real_tokens, padding.waste * 100,
+    )
+    if USE_PROM:
+        emb_tokens.labels("real").inc(padding.real_tokens)
+        emb_tokens.labels("padded").inc(padding.padded_tokens)
+
+
 # ============================================================
 # 🧰 Preprocesamiento
 # ============================================================
 def preprocess(post: Post) -> str:
-    return " ".join(((post.title or "") + " " + (post.body or "")).split())[:MAX_WORDS]
+    """Título + cuerpo con espacios normalizados; el corte es por tokens (encode_bucketed)."""
+    return " ".join(((post.title or "") + " " + (post.body or "")).split())
 
 
 # ============================================================
-# 🔁 Batch con reintento (incluye FIX CRÍTICO)
+# 🔁 Batch de jobs (reintentos por item en pipeline_jobs)
 # ============================================================
-@retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
-async def process_batch(batch: List[Post], texts: List[str]) -> None:
+def _validate(emb) -> Optional[str]:
+    """None si el embedding es usable; si no, el motivo del fallo."""
+    if emb is None:
+        return "embedding nulo"
+    dim = np.asarray(emb).squeeze().shape[0]
+    if dim != EXPECTED_DIM:
+        return f"dim incorrecta {dim} != {EXPECTED_DIM}"
+    return None
+
+
+async def process_batch(
+    batch: List[PipelineJob],
+    stages: Optional[StageTimer] = None,
+) -> Set[str]:
+    """
+    Embebe los posts de `batch` y cierra cada job en la misma transacción
+    que escribe su embedding: los buenos → done, los malos → reintento con
+    backoff (o dead). Un item roto no tira el batch ni se recalculan los ok.
+    Devuelve las verticales con embeddings nuevos (ver `request_clustering`).
+    """
+    stages = stages or StageTimer("process_batch")
 
     async with async_session_maker() as session:
-        try:
-            timer = emb_dur.time() if USE_PROM else nullcontext()
-            with timer:
-                embs = await embed_text(texts)
-
-            now = datetime.utcnow()
-
-            for p, e, t in zip(batch, embs, texts):
-
-                # ============================================================
-                # ❗ FIX: RECARGAR POST DESDE LA SESIÓN ACTUAL
-                # ============================================================
-                db_post = await session.get(Post, p.pid)
-                if db_post is None:
-                    logger.error(f"❌ Post {p.pid} no existe en BD")
+        with stages.stage("fetch"):
+            rows = await session.execute(
+                select(Post, Post.embedding.is_not(None).label("has_embedding"))
+                .where(Post.pid.in_([j.key for j in batch]))
+            )
+            posts = {p.pid: (p, has_embedding) for p, has_embedding in rows}
+
+        noop: List[int] = []                     # borrado / ya embebido → done sin trabajo
+        empty: List[int] = []                    # sin texto → dead (reintentar no cambia nada)
+        failures: Dict[str, List[int]] = defaultdict(list)
+        todo = []
+        with stages.stage("preprocess"):
+            for job in batch:
+                post, has_embedding = posts.get(job.key, (None, False))
+                if post is None or post.deleted_at is not None or has_embedding:
+                    noop.append(job.id)
                     continue
-
-                db_post.embedding_attempt_at = now
-
-                if not t.strip():
-                    logger.warning(f"⚠️ Post vacío: {p.pid}")
-                    if USE_PROM: emb_fail.inc()
+                text = preprocess(post)
+                if not text.strip():
+                    row_logger.warning("⚠️ Post vacío: %s", post.pid)
+                    empty.append(job.id)
                     continue
+                todo.append((job, post, text))
 
-                if e is None:
-                    logger.warning(f"⚠️ Embedding nulo: {p.pid}")
-                    if USE_PROM: emb_fail.inc()
-                    continue
-
-                e_np = np.asarray(e, dtype=np.float32).squeeze()
+        embs = []
+        if todo:
+            timer = emb_dur.time() if USE_PROM else nullcontext()
+            with timer, stages.stage("encode"):
+                embs = await embed_text([t for _, _, t in todo])
 
-                if e_np.shape[0] != EXPECTED_DIM:
-                    logger.warning(f"⚠️ Dim incorrecta {e_np.shape[0]} ≠ {EXPECTED_DIM} en {p.pid}")
-                    if USE_PROM: emb_fail.inc()
+        with stages.stage("write"):
+            now = datetime.utcnow()
+            done = []
+            for (job, post, _), emb in zip(todo, embs):
+                post.embedding_attempt_at = now
+                error = _validate(emb)
+                if error:
+                    row_logger.warning("⚠️ %s: %s", error, post.pid)
+                    failures[error].append(job.id)
                     continue
+                post.embedding = np.asarray(emb, dtype=np.float32).squeeze().tolist()
+                done.append((job, post))
 
-                # asignar embedding real al objeto cargado
-                db_post.embedding = e_np.tolist()
-                if USE_PROM: emb_ok.inc()
-
+            closed = await jobs.complete(session, noop + [job.id for job, _ in done], WORKER_ID)
+            closed += await jobs.fail(session, empty, WORKER_ID, "texto vacío", permanent=True)
+            for error, ids in failures.items():
+                closed += await jobs.fail(session, ids, WORKER_ID, error)
             await session.commit()
-
-        except Exception as e:
-            logger.exception(f"💥 Error batch: {e}")
-            await session.rollback()
-            raise
+            if closed < len(batch):
+                # lease vencido: otro worker los reclamó (el embedding escrito vale igual)
+                logger.warning("⏳ %s jobs del batch ya no eran de este worker", len(batch) - closed)
+
+    if USE_PROM:
+        emb_ok.inc(len(done))
+        emb_fail.inc(len(empty) + sum(len(ids) for ids in failures.values()))
+        done_at = datetime.now(timezone.utc)
+        for _, post in done:
+            if post.created_at is not None:
+                emb_ingest_latency.observe((done_at - post.created_at).total_seconds())
+    return {post.vertical for _, post in done}
+
+
+async def request_clustering(verticals: Set[str], stages: Optional[StageTimer] = None) -> None:
+    """
+    Pide reclusterizar las verticales tocadas, en una transacción corta
+    aparte: la fila del job cluster es una por vertical y no debe quedar
+    bloqueada durante la escritura de cada worker. El debounce agrupa
+    muchos batches en una sola corrida (si ya hay una pendiente, ni se toca).
+    Fuera del manejo de errores del batch: sus jobs ya están cerrados, un
+    fallo acá solo se loguea (el próximo batch lo vuelve a pedir).
+    """
+    if not verticals:
+        return
+    stages = stages or StageTimer("request_clustering")
+    try:
+        with stages.stage("enqueue_cluster"):
+            async with async_session_maker() as session:
+                for vertical in verticals:
+                    await jobs.request_run(
+                        session, jobs.CLUSTER, vertical, vertical, delay=settings.cluster_debounce,
+                    )
+                await session.commit()
+    except SQLAlchemyError:
+        logger.warning("⚠️ No se pudo encolar el clustering de %s", sorted(verticals), exc_info=True)
 
 
 # ============================================================
 # 🚀 Pipeline principal
 # ============================================================
 async def embed_all_posts(limit: int = BATCH_LIMIT) -> None:
+    """Corrida completa; PROFILE=1 / SIGUSR1 para perfilar (app/core/profiling.py)."""
+    stages = StageTimer("embed_posts")
+    with worker_profiler("embed_posts"):
+        try:
+            await _embed_all_posts(limit, stages)
+        finally:
+            stages.log_summary()
 
-    cutoff = datetime.utcnow() - timedelta(hours=RETRY_HOURS)
-
-    # leer posts que necesitan embedding
-    async with async_session_maker() as session:
-        result = await session.execute(
-            select(Post)
-            .where(
-                Post.embedding.is_(None),
-                (Post.embedding_attempt_at.is_(None)) | (Post.embedding_attempt_at < cutoff),
-            )
-            .order_by(Post.created_at)
-            .limit(limit)
-        )
-        posts = result.scalars().all()
-
-    if not posts:
-        logger.info("✅ No hay posts pendientes.")
-        return
 
-    total = len(posts)
-    logger.info(f"📦 {total} posts pendientes.")
+async def _embed_all_posts(limit: int, stages: StageTimer) -> int:
+    """
+    Consume hasta `limit` jobs `embed`, reclamando de a BATCH_SIZE (seguro
+    con N réplicas en paralelo). Devuelve cuántos reclamó.
+    """
+    claimed = 0
+    batches = 0
 
-    for i in range(0, total, BATCH_SIZE):
+    while claimed < limit:
+        if shutdown.is_set():
+            logger.info("🛑 Corte ordenado tras %s posts", claimed)
+            break
 
-        batch = posts[i : i + BATCH_SIZE]
-        texts = [preprocess(p) for p in batch]
+        with stages.stage("claim"):
+            async with async_session_maker() as session:
+                batch = await jobs.claim(
+                    session, jobs.EMBED, min(BATCH_SIZE, limit - claimed), WORKER_ID, LEASE_SECONDS
+                )
+        if not batch:
+            break
 
+        claimed += len(batch)
+        batches += 1
         try:
-            await process_batch(batch, texts)
-            logger.info(f"✅ Batch {i//BATCH_SIZE + 1} procesado ({len(batch)} posts)")
+            verticals = await process_batch(batch, stages)
+            logger.info(f"✅ Batch {batches} procesado ({len(batch)} posts)")
 
         except Exception as e:
+            # encoder caído / timeout / error de BD: todo el batch a backoff
             logger.exception(f"🔥 Batch falló: {e}")
-
-            # marcar intentos en caso de fallo
+            if USE_PROM: emb_fail.inc(len(batch))
             async with async_session_maker() as session:
-                now = datetime.utcnow()
-                await session.execute(
-                    update(Post)
-                    .where(Post.pid.in_([p.pid for p in batch]))
-                    .values(embedding_attempt_at=now)
-                )
+                await jobs.fail(session, [j.id for j in batch], WORKER_ID, f"{type(e).__name__}: {e}")
                 await session.commit()
+        else:
+            await request_clustering(verticals, stages)
+
+    if not claimed:
+        logger.debug("✅ No hay posts pendientes.")
+        return 0
 
-    logger.info("🎯 Embeddings completados.")
+    logger.info("🎯 Embeddings completados: %s posts (worker %s).", claimed, WORKER_ID)
+    return claimed
+
+
+# ============================================================
+# 🔁 Modo daemon: NOTIFY + barrido periódico
+# ============================================================
+async def report_backlog() -> None:
+    """Backlog (vertical_stats, O(1)) y lag (jobs embed pendientes)."""
+    if not USE_PROM:
+        return
+    async with async_session_maker() as session:
+        pending = await session.scalar(
+            select(func.coalesce(
+                func.sum(vertical_stats_live.c.total - vertical_stats_live.c.embedded), 0
+            ))
+        )
+        oldest = await session.scalar(
+            # solo nunca intentados: los fallidos esperan su backoff a propósito
+            select(func.min(PipelineJob.created_at)).where(
+                PipelineJob.kind == jobs.EMBED,
+                PipelineJob.status == jobs.PENDING,
+                PipelineJob.attempts == 0,
+            )
+        )
+    emb_backlog.set(pending or 0)
+    emb_lag.set((datetime.now(timezone.utc) - oldest).total_seconds() if oldest else 0)
+    emb_heartbeat.set_to_current_time()
+
+
+async def _wait_for_work(wake: asyncio.Event, timeout: float) -> None:
+    waiters = [asyncio.ensure_future(wake.wait()), asyncio.ensure_future(shutdown.wait())]
+    try:
+        await asyncio.wait(waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for w in waiters:
+            w.cancel()
+
+
+async def run_daemon(
+    limit: int = BATCH_LIMIT,
+    sweep_interval: float = settings.embed_sweep_interval,
+) -> None:
+    """
+    Worker continuo: procesa mientras haya backlog; si no, duerme hasta un
+    NOTIFY de posts nuevos o hasta el próximo barrido (fallback si se pierde
+    una notificación, y para reintentos cuyo backoff venció).
+    """
+    if USE_PROM and settings.embed_metrics_port:
+        start_http_server(settings.embed_metrics_port)
+        logger.info("📈 Métricas en :%s/metrics", settings.embed_metrics_port)
+
+    wake = asyncio.Event()
+    listener = asyncio.create_task(listen(NOTIFY_CHANNEL, lambda _: wake.set(), shutdown))
+    # deltas de vertical_stats que generan nuestros UPDATE (advisory lock: un fold a la vez)
+    folder = asyncio.create_task(fold_loop(async_session_maker, settings.stats_fold_interval, shutdown))
+    stages = StageTimer("embed_daemon")
+
+    with worker_profiler("embed_daemon"):
+        try:
+            while not shutdown.is_set():
+                wake.clear()  # lo que llegue mientras procesamos dispara otra vuelta
+                try:
+                    fetched = await _embed_all_posts(limit, stages)
+                    await report_backlog()
+                except Exception:
+                    logger.error("💥 Error en la vuelta del daemon", exc_info=True)
+                    fetched = 0
+                if fetched >= limit:
+                    continue  # queda backlog: seguir sin esperar
+                await _wait_for_work(wake, sweep_interval)
+        finally:
+            shutdown.set()
+            await listener
+            await folder
+            stages.log_summary()
+            logger.info("👋 Daemon de embeddings detenido.")
 
 
 # ============================================================
 # 🧹 Entry point
 # ============================================================
 async def main():
-    await embed_all_posts()
+    parser = argparse.ArgumentParser(description="Worker de embeddings")
+    parser.add_argument("--daemon", action="store_true", help="modo continuo (LISTEN/NOTIFY + barrido)")
+    parser.add_argument("--limit", type=int, default=BATCH_LIMIT)
+    args = parser.parse_args()
+
+    _install_signal_handlers()
+    if args.daemon:
+        await run_daemon(args.limit)
+    else:
+        await embed_all_posts(args.limit)
 
 if __name__ == "__main__":
     asyncio.run(main())
-
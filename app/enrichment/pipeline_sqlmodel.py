@@ -1,16 +1,20 @@
 # app/enrichment/pipeline_sqlmodel.py
 import asyncio
+import os
+import socket
+from collections import defaultdict
 from datetime import datetime, timezone
-from typing import Dict
+from typing import Dict, List
 from sqlalchemy.exc import SQLAlchemyError
 from asyncio import TimeoutError
 from async_timeout import timeout as async_timeout
-import logging
 
 from sqlmodel import select
-from app.db.database import async_session_maker
+from app.db import jobs
+from app.db.database import get_async_session_maker
 from app.db.models_sqlmodel import Post
-from app.ml.embedder import embed_text
+from app.ml.predict_filter import classify_problem
+from app.core.logger import RateLimitedLogger, get_logger
 from app.core.settings import settings
 
 # -------------------------------------------------------------------
@@ -18,116 +22,138 @@ from app.core.settings import settings
 # -------------------------------------------------------------------
 ROW_TIMEOUT = 5      # segundos por fila
 BATCH_TIMEOUT = 30   # segundos por lote
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"[:100]
 
-logger = logging.getLogger(__name__)
-logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+async_session_maker = get_async_session_maker("embed_worker")
+
+logger = get_logger(__name__)
+row_logger = RateLimitedLogger(logger, per_second=1, burst=20)
 
 
 # -------------------------------------------------------------------
-# 🧠 Enriquecimiento de posts con embeddings reales
+# 🧠 Clasificación de posts (jobs `classify` de pipeline_jobs)
 # -------------------------------------------------------------------
 async def enrich_pending_posts(limit: int = 10) -> Dict[str, int]:
     """
     Enrich posts for the current vertical (multi-tenant).
     - Usa SQLModel async
-    - Embeddings reales (SentenceTransformer)
+    - Consume jobs `classify` (app/db/jobs.py): prioridad, reintentos con
+      backoff y dead-letter por post; N réplicas sin pisarse
     - Control por timeout
-    - Batch commit
-    - Idempotente (solo posts sin enriched_at)
+    - Batch commit (resultado + cierre del job en la misma transacción)
+    - Idempotente (un post ya enriquecido no se reclasifica)
+    El embedding lo escribe el worker de embeddings (jobs `embed`).
     """
     processed = 0
 
+    # --------------------------------------------------------
+    # 1️⃣ Reclama jobs pendientes de la vertical
+    # --------------------------------------------------------
     async with async_session_maker() as session:
-        try:
-            # --------------------------------------------------------
-            # 1️⃣ Selecciona posts pendientes de enriquecer
-            # --------------------------------------------------------
-            stmt = (
-                select(Post)
-                .where(
-                    Post.vertical == settings.vertical,
-                    Post.enriched_at.is_(None)
-                )
-                .order_by(Post.pid.asc())
-                .limit(limit)
-            )
+        batch = await jobs.claim(
+            session, jobs.CLASSIFY, limit, WORKER_ID,
+            lease_seconds=BATCH_TIMEOUT + ROW_TIMEOUT * limit,
+            vertical=settings.vertical,
+        )
 
-            async with async_timeout(BATCH_TIMEOUT):
-                result = await session.execute(stmt)
-                posts = result.scalars().all()
+    if not batch:
+        logger.info("No hay posts pendientes para %s", settings.vertical)
+        return {"vertical": settings.vertical, "processed": 0, "total": 0}
 
-            if not posts:
-                logger.info("No hay posts pendientes para %s", settings.vertical)
-                return {"vertical": settings.vertical, "processed": 0, "total": 0}
+    logger.info("Procesando %s posts para vertical '%s'", len(batch), settings.vertical)
 
-            logger.info("Procesando %s posts para vertical '%s'", len(posts), settings.vertical)
+    async with async_session_maker() as session:
+        try:
+            async with async_timeout(BATCH_TIMEOUT):
+                result = await session.execute(
+                    select(Post).where(Post.pid.in_([j.key for j in batch]))
+                )
+                posts = {p.pid: p for p in result.scalars().all()}
+
+            done: List[int] = []
+            empty: List[int] = []
+            failures: Dict[str, List[int]] = defaultdict(list)
 
             # --------------------------------------------------------
-            # 2️⃣ Enriquecimiento fila por fila
+            # 2️⃣ Clasificación fila por fila
             # --------------------------------------------------------
-            for post in posts:
-                try:
-                    async with async_timeout(ROW_TIMEOUT):
-                        text = f"{post.title or ''} {post.body or ''}".strip()
-                        if not text:
-                            logger.warning("Post %s vacío, omitido", post.pid)
-                            continue
-
-                        # ✅ Generar embedding real (CPU/GPU auto)
-                        embedding = await asyncio.to_thread(embed_text, text)
-
-                        # (Temporal) categoría dummy
-                        category, confidence = "other", 0.5
-
-                        post.embedding = embedding
-                        post.category = category
-                        post.confidence = confidence
-                        post.enriched_at = datetime.now(timezone.utc)
-                        post.updated_at = datetime.now(timezone.utc)
+            for job in batch:
+                post = posts.get(job.key)
+                if post is None or post.deleted_at is not None or post.enriched_at is not None:
+                    done.append(job.id)  # nada que hacer
+                    continue
 
-                        session.add(post)
-                        processed += 1
+                text = f"{post.title or ''} {post.body or ''}".strip()
+                if not text:
+                    row_logger.warning("Post %s vacío, omitido", post.pid)
+                    empty.append(job.id)
+                    continue
 
+                try:
+                    async with async_timeout(ROW_TIMEOUT):
+                        category, confidence = await asyncio.to_thread(classify_problem, text)
                 except TimeoutError:
-                    logger.warning("Post %s excedió timeout y fue omitido", post.pid)
+                    row_logger.warning("Post %s excedió timeout", post.pid)
+                    failures["timeout"].append(job.id)
                     continue
                 except Exception as e:
-                    logger.error("Error procesando post %s: %s", post.pid, e)
+                    row_logger.error("Error procesando post %s: %s", post.pid, e)
+                    failures[f"{type(e).__name__}: {e}"].append(job.id)
                     continue
 
+                post.category = category
+                post.confidence = confidence
+                post.enriched_at = datetime.now(timezone.utc)
+                post.updated_at = datetime.now(timezone.utc)
+                session.add(post)
+                done.append(job.id)
+                processed += 1
+
             # --------------------------------------------------------
-            # 3️⃣ Commit del batch
+            # 3️⃣ Commit del batch + cierre de jobs
             # --------------------------------------------------------
+            await jobs.complete(session, done, WORKER_ID)
+            await jobs.fail(session, empty, WORKER_ID, "texto vacío", permanent=True)
+            for error, ids in failures.items():
+                await jobs.fail(session, ids, WORKER_ID, error)
             await session.commit()
 
             logger.info(
                 "✅ Enriquecidos %s/%s posts para '%s'",
-                processed, len(posts), settings.vertical,
+                processed, len(batch), settings.vertical,
                 extra={
                     "vertical": settings.vertical,
                     "processed": processed,
-                    "total": len(posts),
-                    "last_pid": posts[-1].pid if posts else None,
+                    "total": len(batch),
+                    "failed": len(batch) - len(done),
                 }
             )
 
-            return {"vertical": settings.vertical, "processed": processed, "total": len(posts)}
+            return {"vertical": settings.vertical, "processed": processed, "total": len(batch)}
 
         except SQLAlchemyError as e:
             logger.error("Error en batch DB", exc_info=True)
             await session.rollback()
+            await _fail_batch(batch, e)
             raise
 
         except Exception as e:
             logger.error("Error inesperado en batch", exc_info=True)
             await session.rollback()
+            await _fail_batch(batch, e)
             raise
 
 
+async def _fail_batch(batch, error: Exception) -> None:
+    # sin esto los jobs quedarían `running` hasta que venza el lease
+    async with async_session_maker() as session:
+        await jobs.fail(session, [j.id for j in batch], WORKER_ID, f"{type(error).__name__}: {error}")
+        await session.commit()
+
+
 # -------------------------------------------------------------------
 # 🚀 Ejecución directa (modo script)
 # -------------------------------------------------------------------
 if __name__ == "__main__":
     result = asyncio.run(enrich_pending_posts(limit=10))
     print("\nResultado final:", result)
-
@@ -4,14 +4,19 @@ import asyncio
 from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-from sqlalchemy import select, func
+from sqlalchemy import select
 
-from app.api.routes import insights
-from app.api.deps import AsyncDbDep
+from app.api.routes import debug, insights
+from app.api.deps import AsyncDbDep, AsyncReadDbDep
 from app.core.settings import settings
 from app.core.logger import logger
-from app.db.database import async_engine
+from app.core.metrics import MetricsMiddleware, install_db_hooks, metrics_response
+from app.db import counts
+from app.db.database import get_async_engine, get_async_session_maker, dispose_engines
+from app.db.replicas import replica_router
 from app.db.models_sqlmodel import Post
+from app.db.stats import fold_loop, get_vertical_stats, stats_payload
+from app.ml import centroid_index
 
 
 # ------------------------------------------------------------------
@@ -23,18 +28,58 @@ async def lifespan(app: FastAPI):
 
     if settings.env == "dev":
         try:
-            async with async_engine.begin() as conn:
+            async with get_async_engine().begin() as conn:
                 await conn.run_sync(Post.metadata.create_all)
             logger.info("Dev tables created")
         except Exception:
             logger.error("Error creating dev tables", exc_info=True)
             raise
 
+    # Refresh en background de post_counts (estrategia de conteo "cached")
+    refresh_task = None
+    if settings.count_cache_refresh_interval > 0:
+        refresh_task = asyncio.create_task(
+            counts.refresh_loop(
+                get_async_session_maker(),
+                settings.vertical,
+                settings.count_cache_refresh_interval,
+            )
+        )
+
+    # Centroides de clusters en memoria (/clusters/nearest): NOTIFY + barrido
+    centroid_stop = asyncio.Event()
+    centroid_task = asyncio.create_task(
+        centroid_index.refresh_loop(
+            get_async_session_maker(),
+            settings.centroid_refresh_interval,
+            centroid_stop,
+        )
+    )
+
+    # Pliegue de deltas de vertical_stats (advisory lock: uno por cluster)
+    fold_stop = asyncio.Event()
+    fold_task = asyncio.create_task(
+        fold_loop(get_async_session_maker(), settings.stats_fold_interval, fold_stop)
+    )
+
+    # Lag / estado de las réplicas en background (las requests solo leen)
+    replica_stop = asyncio.Event()
+    replica_task = asyncio.create_task(replica_router.refresh_loop(replica_stop))
+
     yield
 
+    if refresh_task is not None:
+        refresh_task.cancel()
+    centroid_stop.set()
+    centroid_task.cancel()
+    replica_stop.set()
+    replica_task.cancel()
+    fold_stop.set()
+    fold_task.cancel()
+
     try:
-        await async_engine.dispose()
-        logger.info("DB engine disposed")
+        await dispose_engines()
+        logger.info("DB engines disposed")
     except Exception:
         logger.error("Error disposing engine", exc_info=True)
 
@@ -64,6 +109,14 @@ app.add_middleware(
 )
 
 
+# ------------------------------------------------------------------
+# Métricas (latencia por ruta + DB por request; ver app/core/metrics.py)
+# y trazas (Server-Timing + requests lentas), mismo middleware y hooks
+# ------------------------------------------------------------------
+install_db_hooks()
+app.add_middleware(MetricsMiddleware)
+
+
 # ------------------------------------------------------------------
 # Global exception handler
 # ------------------------------------------------------------------
@@ -87,18 +140,18 @@ PROBE_TIMEOUT = 5
 
 
 @app.get("/health", tags=["system"])
-async def health(db: AsyncDbDep):
+async def health(db: AsyncReadDbDep):
     try:
         async with asyncio.timeout(PROBE_TIMEOUT):
-            total = await db.scalar(
-                select(func.count(Post.pid)).where(Post.vertical == settings.vertical)
-            )
+            # O(1): vertical_stats_live (fila plegada + deltas pendientes)
+            stats = await get_vertical_stats(db, settings.vertical)
 
         return {
             "status": "ok",
             "db": "up",
             "vertical": settings.vertical,
-            "total_posts": total,
+            "total_posts": stats.total,
+            "posts": stats_payload(stats),
         }
 
     except Exception as e:
@@ -115,6 +168,14 @@ async def health(db: AsyncDbDep):
         )
 
 
+# ------------------------------------------------------------------
+# Prometheus
+# ------------------------------------------------------------------
+@app.get("/metrics", tags=["system"], include_in_schema=False)
+async def metrics():
+    return metrics_response()
+
+
 # ------------------------------------------------------------------
 # Readiness probe
 # ------------------------------------------------------------------
@@ -145,3 +206,9 @@ app.include_router(
     tags=["Insights"],
 )
 
+# Profiling bajo demanda (interno, X-Internal-Key)
+app.include_router(
+    debug.router,
+    prefix="/debug",
+    tags=["system"],
+)
@@ -0,0 +1,147 @@
+# app/ml/centroid_index.py
+"""
+Índice en memoria de los centroides de la última corrida de clustering
+por vertical (`insights_clusters`, filas con el `created_at` más nuevo).
+
+- `nearest`: una query / post contra todos los centroides de la vertical
+  con un solo producto matriz-vector (matriz float32 normalizada).
+- `refresh_loop`: carga al arrancar y recarga cuando `cluster_posts`
+  commitea una corrida (NOTIFY `clusters_updated`), con barrido periódico
+  de respaldo. Son cientos de filas por vertical: cada worker tiene la suya.
+"""
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import text
+
+from app.core.logger import logger
+from app.db.notify import listen
+
+NOTIFY_CHANNEL = "clusters_updated"   # lo envía app/enrichment/cluster_pipeline.py
+
+LATEST_RUN = text("""
+    SELECT id, vertical, label, summary, n_posts, last_post_at, centroid, created_at
+    FROM insights_clusters c
+    WHERE centroid IS NOT NULL
+      AND (CAST(:vertical AS text) IS NULL OR vertical = CAST(:vertical AS text))
+      AND created_at = (
+          SELECT max(created_at) FROM insights_clusters WHERE vertical = c.vertical
+      )
+    ORDER BY vertical, id
+""")
+
+
+@dataclass
+class NearestCluster:
+    id: int
+    label: str
+    summary: Optional[str]
+    n_posts: int
+    last_post_at: Optional[datetime]
+    score: float
+
+
+@dataclass
+class VerticalCentroids:
+    ids: np.ndarray            # int64 [c]
+    matrix: np.ndarray         # float32 [c, dim], filas normalizadas
+    rows: List[dict]           # metadata por fila (mismo orden)
+    run_at: datetime
+
+    def nearest(self, vec: np.ndarray, k: int) -> List[NearestCluster]:
+        vec = np.asarray(vec, dtype=np.float32)
+        vec = vec / (np.linalg.norm(vec) or 1.0)
+        scores = self.matrix @ vec
+        k = min(k, len(scores))
+        top = np.argpartition(scores, len(scores) - k)[-k:] if k < len(scores) else np.arange(len(scores))
+        top = top[np.argsort(-scores[top])]
+        return [
+            NearestCluster(
+                id=int(self.ids[i]),
+                label=self.rows[i]["label"],
+                summary=self.rows[i]["summary"],
+                n_posts=self.rows[i]["n_posts"],
+                last_post_at=self.rows[i]["last_post_at"],
+                score=float(scores[i]),
+            )
+            for i in top
+        ]
+
+
+class CentroidIndex:
+    def __init__(self):
+        self._verticals: Dict[str, VerticalCentroids] = {}
+
+    def get(self, vertical: str) -> Optional[VerticalCentroids]:
+        return self._verticals.get(vertical)
+
+    def nearest(self, vertical: str, vec: np.ndarray, k: int = 5) -> List[NearestCluster]:
+        centroids = self._verticals.get(vertical)
+        return centroids.nearest(vec, k) if centroids is not None else []
+
+    async def refresh(self, db, vertical: Optional[str] = None) -> None:
+        """Recarga una vertical (o todas). Swap por vertical: los lectores no ven mitades."""
+        rows = (await db.execute(LATEST_RUN, {"vertical": vertical})).mappings().all()
+        by_vertical: Dict[str, List[dict]] = {}
+        for row in rows:
+            by_vertical.setdefault(row["vertical"], []).append(dict(row))
+
+        loaded = {v: _build(rs) for v, rs in by_vertical.items()}
+        if vertical is None:
+            self._verticals = loaded
+        elif vertical in loaded:
+            self._verticals[vertical] = loaded[vertical]
+        else:
+            self._verticals.pop(vertical, None)
+        for v, c in loaded.items():
+            logger.info("🧭 Centroides %s: %s clusters (corrida %s)", v, len(c.ids), c.run_at.isoformat())
+
+
+def _build(rows: List[dict]) -> VerticalCentroids:
+    matrix = np.stack([np.asarray(r.pop("centroid"), dtype=np.float32) for r in rows])
+    matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+    return VerticalCentroids(
+        ids=np.array([r["id"] for r in rows], dtype=np.int64),
+        matrix=matrix,
+        rows=rows,
+        run_at=rows[0]["created_at"],
+    )
+
+
+centroid_index = CentroidIndex()
+
+
+async def refresh_loop(session_maker, interval: float, stop: asyncio.Event) -> None:
+    """
+    Carga inicial + recarga por NOTIFY (payload {"vertical": ...}) o cada
+    `interval` segundos si no llega ninguno (notificaciones perdidas).
+    """
+    pending: set = {None}   # None = todas
+    wake = asyncio.Event()
+    wake.set()
+
+    def _on_notify(payload: dict) -> None:
+        pending.add(payload.get("vertical"))
+        wake.set()
+
+    listener = asyncio.create_task(listen(NOTIFY_CHANNEL, _on_notify, stop))
+    try:
+        while not stop.is_set():
+            try:
+                await asyncio.wait_for(wake.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pending.add(None)
+            wake.clear()
+            targets = [None] if None in pending else list(pending)
+            pending.clear()
+            try:
+                async with session_maker() as session:
+                    for vertical in targets:
+                        await centroid_index.refresh(session, vertical)
+            except Exception:
+                logger.warning("⚠️ No se pudieron recargar los centroides", exc_info=True)
+    finally:
+        listener.cancel()
@@ -0,0 +1,30 @@
+# app/ml/clustering.py
+"""
+Clustering de embeddings con HDBSCAN (scikit-learn >= 1.3).
+
+Los embeddings vienen normalizados: distancia euclídea ≡ coseno (mismo
+orden). Label -1 = ruido (no pertenece a ningún cluster).
+"""
+from typing import List, Sequence, Tuple
+
+import numpy as np
+from sklearn.cluster import HDBSCAN
+
+MIN_CLUSTER_SIZE = 5
+MIN_SAMPLES = 3
+
+
+def cluster_embeddings(
+    embeddings: Sequence[np.ndarray],
+    min_cluster_size: int = MIN_CLUSTER_SIZE,
+) -> Tuple[List[int], int]:
+    """(label por embedding, cantidad de clusters sin contar el ruido)."""
+    if len(embeddings) < min_cluster_size:
+        return [-1] * len(embeddings), 0
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    labels = HDBSCAN(
+        min_cluster_size=min_cluster_size,
+        min_samples=MIN_SAMPLES,
+        metric="euclidean",
+    ).fit_predict(matrix)
+    return labels.tolist(), len(set(labels.tolist()) - {-1})
@@ -1,5 +1,8 @@
 # app/ml/embeddings.py
 
+import time
+from typing import List
+
 import numpy as np
 from functools import lru_cache
 from fastapi import HTTPException
@@ -14,6 +17,8 @@ except ImportError:
 
 from sentence_transformers import SentenceTransformer
 
+from app.core.metrics import observe_embedding
+
 
 # ============================================================
 # 🧠 Modelo singleton
@@ -40,6 +45,7 @@ def embed_query(text: str) -> np.ndarray:
 
     model = get_model()
 
+    start = time.perf_counter()
     try:
         emb = model.encode(
             [text],
@@ -48,6 +54,8 @@ def embed_query(text: str) -> np.ndarray:
         )
     except Exception as e:
         raise HTTPException(500, f"Error generando embedding: {str(e)}")
+    finally:
+        observe_embedding(time.perf_counter() - start)
 
     # Convertir a float32 y aplastar
     emb = np.asarray(emb, dtype=np.float32).squeeze()
@@ -72,3 +80,40 @@ def cached_embed_query(text: str) -> np.ndarray:
     """Versión cacheada para queries repetidas."""
     text = text.strip().lower()
     return embed_query(text)
+
+
+# ============================================================
+# 📦 Batch de queries (un solo encode para N textos)
+# ============================================================
+def embed_queries(texts: List[str]) -> np.ndarray:
+    """
+    Embeddings normalizados [N, 384] en un solo `encode` (mismo preproceso
+    que `cached_embed_query`). Para endpoints batch: N forwards → 1.
+    """
+    texts = [t.strip().lower() for t in texts]
+    if not texts or not all(texts):
+        raise HTTPException(400, "El texto no puede estar vacío.")
+
+    if USE_PROM:
+        query_counter.inc(len(texts))
+
+    start = time.perf_counter()
+    try:
+        embs = get_model().encode(
+            texts,
+            batch_size=len(texts),
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        )
+    except Exception as e:
+        raise HTTPException(500, f"Error generando embedding: {str(e)}")
+    finally:
+        observe_embedding(time.perf_counter() - start)
+
+    embs = np.asarray(embs, dtype=np.float32)
+    if embs.shape != (len(texts), EXPECTED_DIM):
+        raise HTTPException(
+            500,
+            f"Dimensión inesperada del embedding: {embs.shape}, se esperaba (N, {EXPECTED_DIM})"
+        )
+    return embs
@@ -0,0 +1,106 @@
+# app/ml/encode_batching.py
+"""
+Batching por tokens para `SentenceTransformer.encode`.
+
+- `fit_to_model`: trunca cada texto en el último token que entra en
+  `max_seq_length` (offsets del tokenizer → corte sobre el texto original,
+  sin decode) y devuelve el largo en tokens de cada uno.
+- `token_budget_batches`: ordena por largo y arma batches con un tope de
+  tokens *con padding* (n × más largo) en vez de una cantidad fija: los
+  posts cortos van en batches grandes, los largos en chicos, y casi no se
+  computa padding.
+- `encode_bucketed`: encode por batch y reordena al orden de entrada.
+"""
+from dataclasses import dataclass
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+# corte previo en caracteres: no tokenizar megas de un post patológico
+# (un token WordPiece rara vez supera ~8 caracteres)
+CHARS_PER_TOKEN_MAX = 8
+
+
+@dataclass
+class PaddingStats:
+    real_tokens: int = 0
+    padded_tokens: int = 0
+    batches: int = 0
+
+    @property
+    def waste(self) -> float:
+        """Fracción del cómputo gastada en padding."""
+        return 1 - self.real_tokens / self.padded_tokens if self.padded_tokens else 0.0
+
+    def add(self, other: "PaddingStats") -> None:
+        self.real_tokens += other.real_tokens
+        self.padded_tokens += other.padded_tokens
+        self.batches += other.batches
+
+
+def fit_to_model(tokenizer, texts: Sequence[str], max_tokens: int) -> Tuple[List[str], List[int]]:
+    """Textos truncados a `max_tokens` (incluye [CLS]/[SEP]) y su largo en tokens."""
+    clipped = [t[: max_tokens * CHARS_PER_TOKEN_MAX] for t in texts]
+    enc = tokenizer(
+        clipped,
+        truncation=True,
+        max_length=max_tokens,
+        return_offsets_mapping=True,
+        return_attention_mask=False,
+    )
+    fitted, lengths = [], []
+    for text, ids, offsets in zip(clipped, enc["input_ids"], enc["offset_mapping"]):
+        end = max((e for _, e in offsets), default=0)  # especiales tienen (0, 0)
+        fitted.append(text[:end])
+        lengths.append(len(ids))
+    return fitted, lengths
+
+
+def token_budget_batches(lengths: Sequence[int], budget: int, max_batch: int) -> List[List[int]]:
+    """
+    Índices agrupados en batches con `len(batch) * max(largos) <= budget`,
+    de más largo a más corto (el primer batch revela un OOM enseguida).
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i], reverse=True)
+    batches: List[List[int]] = []
+    current: List[int] = []
+    for i in order:
+        # orden descendente: el primero del batch es el más largo
+        if current and (len(current) >= max_batch or (len(current) + 1) * lengths[current[0]] > budget):
+            batches.append(current)
+            current = []
+        current.append(i)
+    if current:
+        batches.append(current)
+    return batches
+
+
+def padding_stats(batches: Sequence[Sequence[int]], lengths: Sequence[int]) -> PaddingStats:
+    stats = PaddingStats(batches=len(batches))
+    for batch in batches:
+        batch_lengths = [lengths[i] for i in batch]
+        stats.real_tokens += sum(batch_lengths)
+        stats.padded_tokens += len(batch_lengths) * max(batch_lengths)
+    return stats
+
+
+def encode_bucketed(model, texts: Sequence[str], budget: int, max_batch: int, **encode_kwargs):
+    """
+    `model.encode` por batches de presupuesto de tokens. Devuelve
+    (embeddings en el orden de `texts`, PaddingStats).
+    """
+    dim = model.get_sentence_embedding_dimension()
+    if not texts:
+        return np.empty((0, dim), dtype=np.float32), PaddingStats()
+    fitted, lengths = fit_to_model(model.tokenizer, texts, model.max_seq_length)
+    batches = token_budget_batches(lengths, budget, max_batch)
+    out = np.empty((len(texts), dim), dtype=np.float32)
+    for batch in batches:
+        out[batch] = model.encode(
+            [fitted[i] for i in batch],
+            batch_size=len(batch),
+            show_progress_bar=False,
+            convert_to_numpy=True,
+            **encode_kwargs,
+        )
+    return out, padding_stats(batches, lengths)
@@ -1,13 +1,17 @@
 # app/ml/predict_filter.py
+from functools import lru_cache
+
 from app.core.settings import settings
 from app.core.logger import logger
 
+@lru_cache(maxsize=None)
 def load_model(vertical: str):
-    logger.info(f"Loading ML model for vertical {vertical}")
+    # cacheado: classify_problem corre por post, el log sale una vez por vertical
+    logger.info("Loading ML model for vertical %s", vertical)
     return {"vertical": vertical, "model": "dummy_model"}
 
 def predict(model, text: str) -> bool:
-    logger.debug(f"Predicting text: {text}")
+    logger.debug("Predicting text: %.80s", text)
     return "problem" in text.lower()
 
 # -----------------------------
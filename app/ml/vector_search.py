@@ -0,0 +1,282 @@
+# app/ml/vector_search.py
+"""
+Búsqueda semántica exacta en proceso sobre el snapshot mmap
+(app/ml/vector_snapshot.py), para verticales chicas/medianas.
+
+- `VectorEngine.search`: producto matricial por bloques de filas
+  (queries × bloque, una GEMM por bloque) + `np.argpartition` top-k por
+  bloque y merge final. Exacto: mismo ranking que `embedding <=> q`
+  con vectores normalizados.
+- Filtros como máscaras booleanas precalculadas (categoría, vivos); los
+  posts borrados después del snapshot se marcan al hidratar.
+- `QueryBatcher`: junta las queries concurrentes de unos ms en una sola
+  GEMM (un hilo, fuera del event loop).
+- `get_engine`: elige motor por vertical (VECTOR_ENGINE=db|numpy|auto);
+  None → camino SQL de siempre. Default db: el snapshot no incluye los
+  posts embebidos después de exportarlo (numpy/auto son opt-in).
+"""
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from app.core.logger import logger
+from app.core.settings import settings
+from app.core.metrics import span
+from app.db.quantized import fetch_scored_posts
+from app.ml.vector_snapshot import VectorSnapshot, get_snapshot
+
+BLOCK_ROWS = 32768          # 32k × 384 × 4 B = 48 MB por bloque de la matriz
+TOMBSTONE_SLACK = 8         # candidatos extra por si alguno se borró tras el snapshot
+
+Result = Tuple[np.ndarray, np.ndarray]   # (índices int64, scores float32), score desc
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Índices de los k mayores (sin ordenar)."""
+    if k >= len(scores):
+        return np.arange(len(scores))
+    return np.argpartition(scores, len(scores) - k)[-k:]
+
+
+class VectorEngine:
+    def __init__(self, snapshot: VectorSnapshot):
+        self.snapshot = snapshot
+        # máscaras por proceso (n bytes c/u); la matriz sigue en el mmap
+        self._masks: Dict[Optional[str], np.ndarray] = {
+            None: np.ones(len(snapshot), dtype=bool),
+        }
+
+    def __len__(self) -> int:
+        return len(self.snapshot)
+
+    def mask(self, category: Optional[str] = None) -> np.ndarray:
+        """Vivos ∧ categoría (se calcula una vez por categoría)."""
+        if category not in self._masks:
+            code = self.snapshot.category_code(category)
+            by_category = (
+                self.snapshot.categories == code
+                if code is not None
+                else np.zeros(len(self.snapshot), dtype=bool)
+            )
+            self._masks[category] = self._masks[None] & by_category
+        return self._masks[category]
+
+    def tombstone(self, indices: Sequence[int]) -> None:
+        """Excluye filas que ya no existen (borradas después del snapshot)."""
+        for mask in self._masks.values():
+            mask[indices] = False
+
+    def search(
+        self,
+        queries: np.ndarray,
+        ks: Sequence[int],
+        masks: Sequence[Optional[np.ndarray]],
+    ) -> List[Result]:
+        """
+        Top-k exacto para un batch de queries (filas normalizadas).
+        `ks[j]` y `masks[j]` son de la query j.
+        """
+        queries = np.ascontiguousarray(queries, dtype=np.float32).reshape(len(ks), -1)
+        matrix = self.snapshot.matrix
+        best_idx = [np.empty(0, dtype=np.int64) for _ in ks]
+        best_sc = [np.empty(0, dtype=np.float32) for _ in ks]
+
+        for start in range(0, len(matrix), BLOCK_ROWS):
+            block = matrix[start : start + BLOCK_ROWS]
+            scores = queries @ block.T          # una GEMM para todo el batch
+            for j, k in enumerate(ks):
+                row = scores[j]
+                if masks[j] is not None:
+                    np.copyto(row, -np.inf, where=~masks[j][start : start + len(block)])
+                top = _top_k(row, k)
+                idx = np.concatenate((best_idx[j], top + start))
+                sc = np.concatenate((best_sc[j], row[top]))
+                keep = _top_k(sc, k)
+                best_idx[j], best_sc[j] = idx[keep], sc[keep]
+
+        results = []
+        for idx, sc in zip(best_idx, best_sc):
+            order = np.argsort(-sc, kind="stable")
+            order = order[np.isfinite(sc[order])]   # enmascarados
+            results.append((idx[order], sc[order]))
+        return results
+
+
+# ============================================================
+# 🧺 Micro-batching de queries concurrentes
+# ============================================================
+@dataclass
+class _Pending:
+    engine: VectorEngine
+    query: np.ndarray
+    k: int
+    mask: Optional[np.ndarray]
+    future: asyncio.Future
+
+
+class QueryBatcher:
+    """
+    Las queries que llegan dentro de `max_wait` segundos (o hasta
+    `max_batch`) se resuelven con una sola pasada sobre la matriz: el
+    costo dominante es leer la matriz, no el número de queries.
+    """
+
+    def __init__(self, max_batch: int, max_wait: float):
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._pending: List[_Pending] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def search(
+        self, engine: VectorEngine, query: np.ndarray, k: int, mask: Optional[np.ndarray] = None
+    ) -> Result:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append(_Pending(engine, query, k, mask, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, []
+        groups: Dict[int, List[_Pending]] = {}
+        for p in pending:
+            groups.setdefault(id(p.engine), []).append(p)
+        for batch in groups.values():
+            task = asyncio.ensure_future(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[_Pending]) -> None:
+        try:
+            results = await asyncio.to_thread(
+                batch[0].engine.search,
+                np.stack([p.query for p in batch]),
+                [p.k for p in batch],
+                [p.mask for p in batch],
+            )
+        except Exception as e:
+            for p in batch:
+                if not p.future.done():
+                    p.future.set_exception(e)
+            return
+        for p, result in zip(batch, results):
+            if not p.future.done():   # la request pudo cancelarse (timeout)
+                p.future.set_result(result)
+
+
+# ============================================================
+# 🔀 Selección de motor por vertical
+# ============================================================
+_engines: Dict[str, VectorEngine] = {}
+_batcher: Optional[QueryBatcher] = None
+
+
+def get_engine(vertical: str) -> Optional[VectorEngine]:
+    """
+    Motor en proceso para la vertical, o None (→ SQL). En "auto" solo si
+    hay snapshot, es fresco (`vector_engine_max_age`) y la vertical no
+    supera `vector_engine_max_rows`.
+    """
+    mode = settings.vector_engine
+    if mode == "db":
+        return None
+    snapshot = get_snapshot(vertical)
+    if snapshot is None:
+        return None
+    if mode == "auto":
+        age = time.time() - snapshot.stat[1] / 1e9
+        if len(snapshot) > settings.vector_engine_max_rows or age > settings.vector_engine_max_age:
+            return None
+    engine = _engines.get(vertical)
+    if engine is None or engine.snapshot is not snapshot:
+        engine = _engines[vertical] = VectorEngine(snapshot)
+    return engine
+
+
+def get_batcher() -> QueryBatcher:
+    global _batcher
+    if _batcher is None:
+        _batcher = QueryBatcher(settings.vector_batch_max, settings.vector_batch_wait_ms / 1000)
+    return _batcher
+
+
+async def search_posts(
+    db,
+    engine: VectorEngine,
+    vertical: str,
+    query_vec: np.ndarray,
+    limit: int,
+    offset: int,
+    min_score: float,
+    category: Optional[str] = None,
+) -> List[dict]:
+    """Top-k en proceso + hidratación de filas (y scores) desde la base."""
+    with span("vector"):
+        idx, scores = await get_batcher().search(
+            engine, query_vec, offset + limit + TOMBSTONE_SLACK, engine.mask(category)
+        )
+    keep = scores >= min_score
+    idx, scores = idx[keep][offset:], scores[keep][offset:]
+
+    with span("db"):
+        pids = engine.snapshot.pids(idx)
+        rows = await fetch_scored_posts(db, vertical, pids, scores)
+    if len(rows) < len(pids):
+        found = {row["pid"] for row in rows}
+        gone = [i for i, pid in zip(idx, pids) if pid not in found]
+        engine.tombstone(gone)
+        logger.debug("🪦 %s posts del snapshot %s ya no existen", len(gone), vertical)
+    return rows[:limit]
+
+
+async def search_posts_batch(
+    db,
+    engine: VectorEngine,
+    vertical: str,
+    queries: np.ndarray,
+    ks: Sequence[int],
+    min_scores: Sequence[float],
+) -> List[List[dict]]:
+    """
+    N queries en una GEMM (sin pasar por el batcher: ya vienen juntas) +
+    una sola hidratación para la unión de pids.
+    """
+    mask = engine.mask()
+    with span("vector"):
+        results = await asyncio.to_thread(
+            engine.search, queries, [k + TOMBSTONE_SLACK for k in ks], [mask] * len(ks)
+        )
+    hits = []
+    for (idx, scores), min_score in zip(results, min_scores):
+        keep = scores >= min_score
+        hits.append((idx[keep], scores[keep]))
+
+    with span("db"):
+        unique = np.unique(np.concatenate([idx for idx, _ in hits])) if hits else np.empty(0, np.int64)
+        pids = engine.snapshot.pids(unique)
+        rows = await fetch_scored_posts(db, vertical, pids, np.zeros(len(pids)))
+    by_pid = {row["pid"]: row for row in rows}
+    if len(rows) < len(pids):
+        engine.tombstone([i for i, pid in zip(unique, pids) if pid not in by_pid])
+
+    out = []
+    for (idx, scores), k in zip(hits, ks):
+        items = []
+        for pid, score in zip(engine.snapshot.pids(idx), scores):
+            row = by_pid.get(pid)
+            if row is not None:
+                items.append({**row, "score": float(score)})
+            if len(items) == k:
+                break
+        out.append(items)
+    return out
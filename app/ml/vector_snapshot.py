@@ -0,0 +1,284 @@
+# app/ml/vector_snapshot.py
+"""
+Snapshot en disco de los embeddings de una vertical, compartido por todos
+los workers de la API vía mmap (page cache: una sola copia en RAM por host).
+
+Archivo `<dir>/<vertical>.vecs` (little-endian):
+
+    [0, HEADER_BYTES)   MAGIC + u32 largo + JSON (format, version, dim, n,
+                        offsets de secciones, categorías, ...)
+    matrix              float32 [n, dim], alineada a página
+    pid_offsets         uint64 [n + 1]  → pid i = pid_blob[off[i]:off[i+1]]
+    pid_blob            pids en UTF-8 concatenados
+    categories          int16 [n], índice en header["categories"] (-1 = NULL)
+
+Lo escribe app/scripts/export_vector_snapshot.py en `<archivo>.tmp-<pid>`
+y lo publica con `os.replace` (atómico): un lector ve la versión anterior
+o la nueva completa, nunca media. Los lectores ya abiertos siguen con el
+inode viejo hasta que sueltan la referencia.
+"""
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.logger import logger
+from app.core.settings import settings
+
+MAGIC = b"ICVSNAP\x00"
+FORMAT = 1
+HEADER_BYTES = 64 * 1024   # reservado: el header se escribe al final, con n ya conocido
+ALIGN = mmap.PAGESIZE
+_PREFIX = struct.Struct("<8sI")
+
+
+def snapshot_path(directory: str, vertical: str) -> Path:
+    return Path(directory) / f"{vertical}.vecs"
+
+
+def _align(offset: int) -> int:
+    return -(-offset // ALIGN) * ALIGN
+
+
+# ============================================================
+# ✍️ Escritura
+# ============================================================
+class SnapshotWriter:
+    """
+    Escritura incremental: la matriz va directo al archivo temporal por
+    chunks (memoria acotada), pids y categorías se acumulan (son chicos).
+
+        with SnapshotWriter(path, vertical, dim=384) as w:
+            for pids, cats, embs in chunks:
+                w.append(pids, cats, embs)
+    """
+
+    def __init__(self, path: Path, vertical: str, dim: int, meta: Optional[dict] = None):
+        self.path = Path(path)
+        self.vertical = vertical
+        self.dim = dim
+        self.meta = meta or {}
+        self.n = 0
+        self._tmp = self.path.with_name(f"{self.path.name}.tmp-{os.getpid()}")
+        self._pids: List[bytes] = []
+        self._cats: List[int] = []
+        self._categories: Dict[str, int] = {}
+        self._fh = None
+
+    def __enter__(self) -> "SnapshotWriter":
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fh = open(self._tmp, "wb")
+        self._fh.seek(HEADER_BYTES)
+        return self
+
+    def append(self, pids: Sequence[str], categories: Sequence[Optional[str]], embeddings) -> None:
+        matrix = np.ascontiguousarray(embeddings, dtype="<f4")
+        if matrix.ndim != 2 or matrix.shape != (len(pids), self.dim):
+            raise ValueError(f"chunk con forma {matrix.shape}, se esperaba ({len(pids)}, {self.dim})")
+        self._fh.write(matrix.tobytes())
+        self._pids.extend(p.encode("utf-8") for p in pids)
+        self._cats.extend(
+            -1 if c is None else self._categories.setdefault(c, len(self._categories))
+            for c in categories
+        )
+        self.n += len(pids)
+
+    def _finish(self) -> dict:
+        fh = self._fh
+        sections = {"matrix": HEADER_BYTES}
+
+        offsets = np.zeros(self.n + 1, dtype="<u8")
+        np.cumsum([len(p) for p in self._pids], out=offsets[1:])
+        fh.seek(_align(fh.tell()))
+        sections["pid_offsets"] = fh.tell()
+        fh.write(offsets.tobytes())
+        sections["pid_blob"] = fh.tell()
+        fh.write(b"".join(self._pids))
+        fh.seek(_align(fh.tell()))
+        sections["categories"] = fh.tell()
+        fh.write(np.asarray(self._cats, dtype="<i2").tobytes())
+        fh.truncate(fh.tell())  # n = 0: la sección vacía igual cae dentro del archivo
+
+        header = {
+            "format": FORMAT,
+            "version": _next_version(self.path),
+            "vertical": self.vertical,
+            "dim": self.dim,
+            "n": self.n,
+            "sections": sections,
+            "categories": list(self._categories),  # dict → orden de inserción = código
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            **self.meta,
+        }
+        raw = json.dumps(header).encode("utf-8")
+        if _PREFIX.size + len(raw) > HEADER_BYTES:
+            raise ValueError(f"header de {len(raw)} bytes no entra en {HEADER_BYTES}")
+        fh.seek(0)
+        fh.write(_PREFIX.pack(MAGIC, len(raw)) + raw)
+        fh.flush()
+        os.fsync(fh.fileno())
+        return header
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        try:
+            if exc_type is None:
+                self.header = self._finish()
+        finally:
+            self._fh.close()
+        if exc_type is not None:
+            self._tmp.unlink(missing_ok=True)
+            return
+        os.replace(self._tmp, self.path)  # publicación atómica
+        _fsync_dir(self.path.parent)
+
+
+def _next_version(path: Path) -> int:
+    try:
+        return read_header(path)["version"] + 1
+    except (OSError, ValueError):
+        return 1
+
+
+def _fsync_dir(directory: Path) -> None:
+    # durabilidad del rename (no aplica en Windows)
+    if hasattr(os, "O_DIRECTORY"):
+        fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+# ============================================================
+# 📖 Lectura (mmap, sin copias)
+# ============================================================
+def _parse_header(buf) -> dict:
+    magic, size = _PREFIX.unpack_from(buf, 0)
+    if magic != MAGIC:
+        raise ValueError("no es un snapshot de vectores")
+    header = json.loads(bytes(buf[_PREFIX.size : _PREFIX.size + size]))
+    if header["format"] != FORMAT:
+        raise ValueError(f"formato de snapshot {header['format']} no soportado (esperado {FORMAT})")
+    return header
+
+
+def read_header(path: Path) -> dict:
+    with open(path, "rb") as fh:
+        return _parse_header(fh.read(HEADER_BYTES))
+
+
+@dataclass
+class VectorSnapshot:
+    """
+    Vista read-only sobre el mmap. `matrix` es un ndarray float32 que apunta
+    al page cache (no ocupa memoria propia del proceso).
+    """
+    path: Path
+    header: dict
+    matrix: np.ndarray
+    categories: np.ndarray
+    stat: Tuple[int, int]            # (st_ino, st_mtime_ns) al abrir
+    _pid_offsets: np.ndarray
+    _pid_blob: memoryview
+
+    @classmethod
+    def open(cls, path: Path) -> "VectorSnapshot":
+        with open(path, "rb") as fh:
+            st = os.fstat(fh.fileno())
+            mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        header = _parse_header(mm)
+        n, dim, sec = header["n"], header["dim"], header["sections"]
+        offsets = np.frombuffer(mm, dtype="<u8", count=n + 1, offset=sec["pid_offsets"])
+        blob_end = sec["pid_blob"] + int(offsets[-1])
+        # el mmap se cierra solo cuando ningún array/memoryview lo referencia
+        return cls(
+            path=Path(path),
+            header=header,
+            matrix=np.frombuffer(mm, dtype="<f4", count=n * dim, offset=sec["matrix"]).reshape(n, dim),
+            categories=np.frombuffer(mm, dtype="<i2", count=n, offset=sec["categories"]),
+            stat=(st.st_ino, st.st_mtime_ns),
+            _pid_offsets=offsets,
+            _pid_blob=memoryview(mm)[sec["pid_blob"] : blob_end],
+        )
+
+    @property
+    def version(self) -> int:
+        return self.header["version"]
+
+    def __len__(self) -> int:
+        return self.header["n"]
+
+    def pid(self, i: int) -> str:
+        return bytes(self._pid_blob[self._pid_offsets[i] : self._pid_offsets[i + 1]]).decode("utf-8")
+
+    def pids(self, indices: Iterable[int]) -> List[str]:
+        return [self.pid(int(i)) for i in indices]
+
+    def category_code(self, category: str) -> Optional[int]:
+        try:
+            return self.header["categories"].index(category)
+        except ValueError:
+            return None
+
+
+class SnapshotStore:
+    """
+    Snapshots abiertos por vertical, uno por proceso. `get` revisa como
+    mucho cada `check_interval` segundos si el archivo fue reemplazado
+    (inode / mtime) y en ese caso abre la versión nueva.
+    """
+
+    def __init__(self, directory: str, check_interval: float = 5.0):
+        self.directory = directory
+        self.check_interval = check_interval
+        self._snapshots: Dict[str, VectorSnapshot] = {}
+        self._checked: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def get(self, vertical: str) -> Optional[VectorSnapshot]:
+        now = time.monotonic()
+        current = self._snapshots.get(vertical)
+        if current is not None and now - self._checked.get(vertical, 0.0) < self.check_interval:
+            return current
+
+        with self._lock:
+            self._checked[vertical] = now
+            path = snapshot_path(self.directory, vertical)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                self._snapshots.pop(vertical, None)
+                return None
+            current = self._snapshots.get(vertical)
+            if current is not None and current.stat == (st.st_ino, st.st_mtime_ns):
+                return current
+            try:
+                snap = VectorSnapshot.open(path)
+            except (OSError, ValueError):
+                logger.warning("⚠️ Snapshot de vectores ilegible: %s", path, exc_info=True)
+                return current
+            self._snapshots[vertical] = snap
+            logger.info(
+                "🗺️ Snapshot %s v%s: %s vectores (%s)",
+                vertical, snap.version, len(snap), path,
+            )
+            return snap
+
+
+_store: Optional[SnapshotStore] = None
+
+
+def get_snapshot(vertical: str) -> Optional[VectorSnapshot]:
+    """Snapshot actual de la vertical para este proceso (None si no hay)."""
+    global _store
+    if _store is None:
+        _store = SnapshotStore(settings.vector_snapshot_dir, settings.vector_snapshot_check_interval)
+    return _store.get(vertical)
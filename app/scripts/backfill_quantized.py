@@ -0,0 +1,101 @@
+# app/scripts/backfill_quantized.py
+"""
+Completa embedding_bit en filas existentes y crea los índices HNSW
+compactos. Reanudable (--after <último pid logueado>), lotes cortos en
+su propia transacción, índices con CONCURRENTLY (sin bloquear escrituras).
+
+Uso:
+    python -m app.scripts.backfill_quantized                       # backfill + índice binary
+    python -m app.scripts.backfill_quantized --index binary,halfvec
+    python -m app.scripts.backfill_quantized --skip-backfill --index halfvec
+    python -m app.scripts.backfill_quantized --skip-backfill --index binary --verticals all
+
+--verticals (lista o `all`): un índice parcial por vertical en vez del
+global. Con varias verticales en la tabla y pgvector < 0.8 (sin
+hnsw.iterative_scan) es lo que mantiene el recall de las minoritarias.
+
+Después: VECTOR_SEARCH_MODE=binary (o halfvec) en la API.
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+from sqlalchemy import text
+
+from app.core.logger import logger
+from app.db.database import dispose_engines, get_async_engine
+from app.db.quantized import INDEXES, backfill_embedding_bit, create_index
+
+if sys.platform.startswith("win"):
+    asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
+
+async def backfill(after: str, batch_size: int, pause: float) -> int:
+    seen = 0
+    start = time.perf_counter()
+    async with get_async_engine().connect() as conn:
+        while True:
+            pids = await backfill_embedding_bit(conn, after, batch_size)
+            if not pids:
+                break
+            seen += len(pids)
+            after = pids[-1]
+            logger.info(
+                "🧱 %s filas recorridas (%.0f/s), último pid: %s",
+                seen, seen / (time.perf_counter() - start), after,
+            )
+            if pause:
+                await asyncio.sleep(pause)  # aire para la replicación / el autovacuum
+    return seen
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Backfill de embedding_bit + índices HNSW compactos")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--after", default="", help="reanudar después de este pid")
+    parser.add_argument("--pause", type=float, default=0.0, help="segundos entre lotes")
+    parser.add_argument("--index", default="binary", help="binary,halfvec | vacío para ninguno")
+    parser.add_argument("--skip-backfill", action="store_true")
+    parser.add_argument("--maintenance-work-mem", default="1GB", help="memoria para el build HNSW")
+    parser.add_argument("--verticals", default="", help="índices parciales: v1,v2 | all | vacío = global")
+    args = parser.parse_args()
+
+    modes = [m for m in args.index.split(",") if m]
+    unknown = [m for m in modes if m not in INDEXES]
+    if unknown:
+        parser.error(f"índices desconocidos: {unknown} (válidos: {list(INDEXES)})")
+
+    try:
+        if not args.skip_backfill:
+            seen = await backfill(args.after, args.batch_size, args.pause)
+            logger.info("✅ Backfill completo: %s filas recorridas", seen)
+
+        if modes:
+            async with get_async_engine().connect() as conn:
+                conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+                await conn.execute(
+                    text("SELECT set_config('maintenance_work_mem', :mem, false)"),
+                    {"mem": args.maintenance_work_mem},
+                )
+                verticals = [None]
+                if args.verticals == "all":
+                    verticals = list((await conn.execute(
+                        text("SELECT DISTINCT vertical FROM posts_sqlmodel ORDER BY vertical")
+                    )).scalars())
+                elif args.verticals:
+                    verticals = args.verticals.split(",")
+                for mode in modes:
+                    for vertical in verticals:
+                        t0 = time.perf_counter()
+                        await create_index(conn, mode, vertical)
+                        logger.info(
+                            "✅ Índice %s (%s) listo en %.1fs",
+                            mode, vertical or "global", time.perf_counter() - t0,
+                        )
+    finally:
+        await dispose_engines()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
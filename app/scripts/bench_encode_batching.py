@@ -0,0 +1,115 @@
+# app/scripts/bench_encode_batching.py
+"""
+Throughput del encoder y padding desperdiciado con largos realistas
+(textos lognormales de benchmarks/datagen.py). Sin base de datos.
+
+Compara:
+  - antes: corte a 250 caracteres, ventanas de 100 en orden de llegada,
+    batch_size=64 (encode ordena por caracteres dentro de cada llamada)
+  - tokens, batch fijo: corte por tokens, mismas ventanas/batches
+  - tokens + presupuesto: corte por tokens, ventana de --window ordenada
+    por largo en tokens, batches de --budget tokens con padding (ahora)
+
+Uso:
+    python -m app.scripts.bench_encode_batching --posts 2000 --budget 4096
+"""
+import argparse
+import time
+from typing import List, Sequence
+
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+from app.ml.encode_batching import PaddingStats, encode_bucketed, fit_to_model, padding_stats
+from benchmarks.datagen import DatasetSpec, Generator
+
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+OLD_WINDOW, OLD_BATCH, OLD_CHARS = 100, 64, 250
+
+
+def realistic_texts(n: int, seed: int) -> List[str]:
+    rows = next(Generator(DatasetSpec.for_scale(str(n), seed=seed)).batches("bench", n))
+    return [" ".join(f"{r['title']} {r['body']}".split()) for r in rows]
+
+
+def fixed_batches_stats(model, texts: Sequence[str]) -> PaddingStats:
+    """Padding de encode(batch_size=64): ordena por caracteres, corta de a 64."""
+    _, lengths = fit_to_model(model.tokenizer, texts, model.max_seq_length)
+    order = sorted(range(len(texts)), key=lambda i: -len(texts[i]))
+    return padding_stats([order[i : i + OLD_BATCH] for i in range(0, len(order), OLD_BATCH)], lengths)
+
+
+def run_fixed(model, texts: Sequence[str]):
+    windows = [texts[i : i + OLD_WINDOW] for i in range(0, len(texts), OLD_WINDOW)]
+    t0 = time.perf_counter()
+    out = [
+        model.encode(w, batch_size=OLD_BATCH, show_progress_bar=False, normalize_embeddings=True)
+        for w in windows
+    ]
+    elapsed = time.perf_counter() - t0
+
+    stats = PaddingStats()  # fuera del tiempo medido
+    for w in windows:
+        stats.add(fixed_batches_stats(model, w))
+    return np.vstack(out), stats, elapsed
+
+
+def run_budget(model, texts: Sequence[str], window: int, budget: int, max_batch: int):
+    stats = PaddingStats()
+    t0 = time.perf_counter()
+    out = []
+    for i in range(0, len(texts), window):
+        embs, padding = encode_bucketed(
+            model, texts[i : i + window], budget, max_batch, normalize_embeddings=True
+        )
+        out.append(embs)
+        stats.add(padding)
+    return np.vstack(out), stats, time.perf_counter() - t0
+
+
+def report(name: str, n: int, stats: PaddingStats, elapsed: float, base: float = None) -> float:
+    rate = n / elapsed
+    gain = f"  x{rate / base:.2f}" if base else ""
+    print(
+        f"{name:<22} {rate:>8.1f} posts/s  padding {stats.waste:6.1%}  "
+        f"tokens {stats.real_tokens:>9,} / {stats.padded_tokens:>9,}  forwards {stats.batches:>4}{gain}"
+    )
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--posts", type=int, default=2000)
+    parser.add_argument("--window", type=int, default=500, help="posts por claim (BATCH_SIZE)")
+    parser.add_argument("--budget", type=int, default=4096, help="tokens con padding por forward")
+    parser.add_argument("--max-batch", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    model = SentenceTransformer(MODEL_NAME)
+    texts = realistic_texts(args.posts, args.seed)
+    _, lengths = fit_to_model(model.tokenizer, texts, model.max_seq_length)
+    print(
+        f"📝 {len(texts)} posts: tokens p50={int(np.median(lengths))} "
+        f"p95={int(np.percentile(lengths, 95))} max={max(lengths)} "
+        f"(truncados a {model.max_seq_length}: {sum(l >= model.max_seq_length for l in lengths)})"
+    )
+    model.encode(texts[:64], show_progress_bar=False)  # warm-up
+
+    # "antes" embebe menos texto: la ganancia se mide contra el mismo corte por tokens
+    _, stats, elapsed = run_fixed(model, [t[:OLD_CHARS] for t in texts])
+    report("antes (250 chars)", len(texts), stats, elapsed)
+
+    fixed, stats, elapsed = run_fixed(model, texts)
+    base = report("tokens, batch fijo", len(texts), stats, elapsed)
+
+    bucketed, stats, elapsed = run_budget(model, texts, args.window, args.budget, args.max_batch)
+    report("tokens + presupuesto", len(texts), stats, elapsed, base)
+
+    # el padding no debería cambiar los vectores (máscara de atención)
+    cos = np.sum(fixed * bucketed, axis=1)
+    print(f"🔎 coseno batch fijo vs presupuesto: min={cos.min():.5f}")
+
+
+if __name__ == "__main__":
+    main()
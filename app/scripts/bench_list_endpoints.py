@@ -0,0 +1,115 @@
+# app/scripts/bench_list_endpoints.py
+"""
+Benchmark de los endpoints de listado (GET /posts, /posts/search) con limit=1000.
+
+- HTTP: requests/s y p50/p99 vía httpx + ASGITransport (sin red, sin uvicorn).
+- Serialización: ORM completo + PostOut.from_orm (antes) vs columnas + orjson (ahora).
+
+Requiere ≥1000 posts en la vertical (app/scripts/seed_posts.py o benchmarks).
+
+Uso:
+    python -m app.scripts.bench_list_endpoints --requests 200 --concurrency 8
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+from sqlmodel import select
+
+from app.api.responses import FastJSONResponse, post_list_payload, rows_to_items, select_post_out
+from app.api.schemas import PostListOut, PostOut
+from app.core.settings import settings
+from app.db.database import async_session_maker
+from app.db.models_sqlmodel import Post, with_embedding
+from app.main import app
+
+PREFIX = "/api/v1/insights"
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    idx = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[idx]
+
+
+# ============================================================
+# 🌐 HTTP
+# ============================================================
+async def bench_http(path: str, n_requests: int, concurrency: int):
+    latencies = []
+    sem = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.get(path)  # warm-up (pool, caches)
+
+        async def one():
+            async with sem:
+                t0 = time.perf_counter()
+                r = await client.get(path)
+                latencies.append(time.perf_counter() - t0)
+                r.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(n_requests)))
+        elapsed = time.perf_counter() - start
+
+    return {
+        "rps": n_requests / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+# ============================================================
+# 🧩 Serialización (misma query, dos caminos)
+# ============================================================
+async def bench_serialization(limit: int, rounds: int):
+    filters = [Post.vertical == settings.vertical, Post.deleted_at.is_(None)]
+    timings = {"orm + from_orm": [], "columns + orjson": []}
+
+    async with async_session_maker() as db:
+        for _ in range(rounds):
+            t0 = time.perf_counter()
+            posts = (await db.scalars(
+                select(Post).options(with_embedding())  # comportamiento anterior
+                .where(*filters).order_by(Post.created_at.desc()).limit(limit)
+            )).all()
+            PostListOut(
+                total=len(posts),
+                items=[PostOut.from_orm(p) for p in posts],
+                limit=limit, offset=0, has_more=len(posts) == limit,
+            ).model_dump_json()
+            timings["orm + from_orm"].append(time.perf_counter() - t0)
+            db.expunge_all()
+
+            t0 = time.perf_counter()
+            rows = (await db.execute(
+                select_post_out().where(*filters).order_by(Post.created_at.desc()).limit(limit)
+            )).all()
+            FastJSONResponse(post_list_payload(rows_to_items(rows), len(rows), limit, 0))
+            timings["columns + orjson"].append(time.perf_counter() - t0)
+
+    return {k: statistics.median(v) * 1000 for k, v in timings.items()}
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--limit", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    for path in (f"{PREFIX}/posts?limit={args.limit}", f"{PREFIX}/posts/search?q=the&limit=100"):
+        r = await bench_http(path, args.requests, args.concurrency)
+        print(f"🌐 {path:<45} {r['rps']:>8.1f} req/s  p50={r['p50_ms']:.1f}ms  p99={r['p99_ms']:.1f}ms")
+
+    for name, ms in (await bench_serialization(args.limit, args.rounds)).items():
+        print(f"🧩 {name:<20} {ms:>8.2f} ms (mediana, limit={args.limit})")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,114 @@
+# app/scripts/bench_logging.py
+"""
+Costo por llamada de log en un hot loop (lo que paga el event loop).
+
+- sync:         StreamHandler directo (formatea + write en el thread que loguea)
+- queue:        QueueHandler → QueueListener (solo encola)
+- rate-limited: RateLimitedLogger sobre la cola (la mayoría se descarta)
+- disabled:     logger.debug con nivel INFO, f-string vs %s lazy
+
+El destino es un archivo temporal (o stdout con --stdout). Con un destino
+rápido, encolar cuesta lo mismo que escribir; la cola gana cuando el write
+bloquea (terminal, pipe lleno, colector lento): simularlo con
+--sink-latency-us.
+
+Uso:
+    python -m app.scripts.bench_logging --calls 100000
+"""
+import argparse
+import logging
+import statistics
+import sys
+import tempfile
+import time
+from logging.handlers import QueueHandler, QueueListener
+from queue import SimpleQueue
+
+from app.core.logger import TEXT_FORMAT, RateLimitedLogger, _EnqueueHandler
+
+
+class _SlowStream:
+    """Stream que tarda `latency_us` por write (pipe/colector lento)."""
+
+    def __init__(self, inner, latency_us: float):
+        self.inner = inner
+        self.latency = latency_us / 1e6
+
+    def write(self, data):
+        time.sleep(self.latency)
+        return self.inner.write(data)
+
+    def flush(self):
+        self.inner.flush()
+
+
+def _fresh_logger(name: str, handler: logging.Handler) -> logging.Logger:
+    log = logging.getLogger(f"bench.{name}")
+    log.handlers[:] = [handler]
+    log.propagate = False
+    log.setLevel(logging.INFO)
+    return log
+
+
+def run(fn, calls: int):
+    """Devuelve (µs/llamada media, p99 µs) midiendo cada llamada."""
+    samples = []
+    for i in range(calls):
+        t0 = time.perf_counter_ns()
+        fn(i)
+        samples.append(time.perf_counter_ns() - t0)
+    samples.sort()
+    return statistics.fmean(samples) / 1000, samples[int(len(samples) * 0.99)] / 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=100_000)
+    parser.add_argument("--stdout", action="store_true", help="escribir a stdout en vez de un archivo")
+    parser.add_argument("--sink-latency-us", type=float, default=0, help="latencia simulada por write")
+    args = parser.parse_args()
+
+    out = sys.stdout if args.stdout else tempfile.TemporaryFile("w")
+    if args.sink_latency_us:
+        out = _SlowStream(out, args.sink_latency_us)
+    formatter = logging.Formatter(TEXT_FORMAT)
+
+    def stream_handler():
+        h = logging.StreamHandler(out)
+        h.setFormatter(formatter)
+        return h
+
+    results = {}
+
+    # --- sync ---
+    log = _fresh_logger("sync", stream_handler())
+    results["sync StreamHandler"] = run(lambda i: log.warning("⚠️ Embedding nulo: %s", i), args.calls)
+
+    # --- queue (listener vivo, como en la app) ---
+    q = SimpleQueue()
+    listener = QueueListener(q, stream_handler())
+    listener.start()
+    log = _fresh_logger("queue", _EnqueueHandler(q))
+    results["queue"] = run(lambda i: log.warning("⚠️ Embedding nulo: %s", i), args.calls)
+
+    # stdlib QueueHandler.prepare (formatea el record completo al encolar)
+    log_std = _fresh_logger("queue_std", QueueHandler(q))
+    results["queue (stdlib prepare)"] = run(lambda i: log_std.warning("⚠️ Embedding nulo: %s", i), args.calls)
+
+    limited = RateLimitedLogger(log, per_second=1, burst=20)
+    results["rate-limited (queue)"] = run(lambda i: limited.warning("⚠️ Embedding nulo: %s", i), args.calls)
+
+    # --- disabled ---
+    results["debug off, f-string"] = run(lambda i: log.debug(f"Predicting text: {i}"), args.calls)
+    results["debug off, %s lazy"] = run(lambda i: log.debug("Predicting text: %s", i), args.calls)
+
+    listener.stop()
+
+    sink = "stdout" if args.stdout else "archivo"
+    print(f"📊 {args.calls:,} llamadas por caso ({sink}, +{args.sink_latency_us:g} µs/write)")
+    for name, (mean_us, p99_us) in results.items():
+        print(f"{name:<26} {mean_us:>8.2f} µs/llamada   p99={p99_us:>8.2f} µs")
+
+
+if __name__ == "__main__":
+    main()
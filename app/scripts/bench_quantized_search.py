@@ -0,0 +1,183 @@
+# app/scripts/bench_quantized_search.py
+"""
+Memoria, recall@k y latencia de la búsqueda semántica por modo
+(fp32 / halfvec / binary / ivf, ver app/db/quantized.py) contra el top-k
+exacto en fp32 (seq scan, sin índices).
+
+Queries: embeddings de posts de la vertical elegidos al azar (no hace
+falta cargar el modelo). Correr después de app/scripts/backfill_quantized.py.
+
+--verticals all mide cada vertical por separado junto a su fracción de la
+tabla: con un índice HNSW global las verticales minoritarias pierden
+recall (el filtro por vertical se aplica después del grafo).
+
+Uso:
+    python -m app.scripts.bench_quantized_search --queries 200 --k 20
+    python -m app.scripts.bench_quantized_search --factors 2,5,10,20
+    python -m app.scripts.bench_quantized_search --modes fp32,ivf --nprobes 1,4,16,64
+    python -m app.scripts.bench_quantized_search --modes halfvec,binary --verticals all
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Dict, List, Set
+
+from sqlalchemy import text
+
+from app.core.settings import settings
+from app.db.database import dispose_engines, get_async_engine
+from app.db.quantized import INDEX_NAMES, candidates_for, semantic_search_sql, set_index_scan
+
+EXACT = """
+    SELECT pid FROM posts_sqlmodel
+    WHERE embedding IS NOT NULL AND deleted_at IS NULL AND vertical = :vertical
+    ORDER BY embedding <=> :query_vec
+    LIMIT :k
+"""
+
+
+def percentile(values: List[float], pct: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+async def storage(conn, vertical: str) -> None:
+    row = (await conn.execute(text("""
+        SELECT count(*) AS n,
+               avg(pg_column_size(embedding)) AS fp32,
+               avg(pg_column_size(embedding::halfvec(384))) AS half,
+               avg(pg_column_size(embedding_bit)) AS bit,
+               count(embedding_bit) AS with_bit
+        FROM posts_sqlmodel
+        WHERE vertical = :v AND embedding IS NOT NULL
+    """), {"v": vertical})).one()
+    print(f"📦 {row.n:,} posts con embedding ({row.with_bit:,} con embedding_bit)")
+    print(f"   bytes/fila   fp32={row.fp32 or 0:.0f}  halfvec={row.half or 0:.0f}  bit={row.bit or 0:.0f}")
+
+    sizes = {
+        r.relname: r.bytes
+        for r in await conn.execute(text("""
+            SELECT c.relname, pg_relation_size(c.oid) AS bytes
+            FROM pg_class c
+            WHERE c.relname = 'posts_sqlmodel'
+               OR c.relname LIKE ANY(:names)   -- globales + parciales por vertical
+        """), {"names": [f"{name}%" for name in INDEX_NAMES.values()]})
+    }
+    for name, size in sorted(sizes.items()):
+        print(f"   {name:<42} {size / 2**20:>10.1f} MB")
+
+    # ivf: tamaño de las listas (el ruido se escanea en toda búsqueda)
+    row = (await conn.execute(text("""
+        SELECT count(DISTINCT cluster_id) AS clusters,
+               count(*) FILTER (WHERE cluster_id IS NULL) AS unclustered
+        FROM posts_sqlmodel
+        WHERE vertical = :v AND embedding IS NOT NULL AND deleted_at IS NULL
+    """), {"v": vertical})).one()
+    print(f"🧩 ivf: {row.clusters:,} clusters, {row.unclustered:,} posts sin cluster (ruido)")
+
+
+async def ground_truth(conn, vertical: str, queries, k: int) -> List[Set[str]]:
+    truth = []
+    for q in queries:
+        async with conn.begin():
+            await conn.execute(text("SET LOCAL enable_indexscan = off"))
+            await conn.execute(text("SET LOCAL enable_bitmapscan = off"))
+            rows = await conn.execute(text(EXACT), {"query_vec": q, "vertical": vertical, "k": k})
+            truth.append({r.pid for r in rows})
+    return truth
+
+
+async def run_mode(conn, vertical: str, mode: str, queries, truth, k: int, knob: int) -> Dict[str, float]:
+    sql = text(semantic_search_sql(mode))
+    latencies, recalls = [], []
+    for q, expected in zip(queries, truth):
+        params = {
+            "query_vec": q, "vertical": vertical,
+            "min_score": 0.0, "limit": k, "offset": 0,
+        }
+        t0 = time.perf_counter()
+        async with conn.begin():
+            if mode == "ivf":
+                params["nprobe"] = knob
+            elif mode != "fp32":
+                params["candidates"] = candidates_for(k, 0, knob)
+                await set_index_scan(conn, params["candidates"])
+            got = {r.pid for r in await conn.execute(sql, params)}
+        latencies.append(time.perf_counter() - t0)
+        recalls.append(len(got & expected) / max(len(expected), 1))
+    return {
+        "recall": statistics.mean(recalls),
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+    }
+
+
+async def vertical_shares(conn) -> Dict[str, float]:
+    rows = (await conn.execute(text("""
+        SELECT vertical, count(*) AS n
+        FROM posts_sqlmodel
+        WHERE embedding IS NOT NULL AND deleted_at IS NULL
+        GROUP BY vertical
+        ORDER BY n DESC
+    """))).all()
+    total = sum(r.n for r in rows) or 1
+    return {r.vertical: r.n / total for r in rows}
+
+
+async def bench_vertical(conn, vertical: str, share: float, args) -> None:
+    print(f"\n━━ {vertical} ({share:.1%} de los embeddings de la tabla)")
+    await storage(conn, vertical)
+    await conn.commit()
+
+    queries = list((await conn.execute(text("""
+        SELECT embedding FROM posts_sqlmodel
+        WHERE vertical = :v AND embedding IS NOT NULL AND deleted_at IS NULL
+        ORDER BY random() LIMIT :n
+    """), {"v": vertical, "n": args.queries})).scalars())
+    await conn.commit()
+    if not queries:
+        print("   (sin embeddings)")
+        return
+    truth = await ground_truth(conn, vertical, queries, args.k)
+    print(f"🎯 {len(queries)} queries, recall@{args.k} contra fp32 exacto")
+
+    for mode in args.modes.split(","):
+        if mode == "fp32":
+            knobs, label_fmt = [0], "fp32"
+        elif mode == "ivf":
+            knobs, label_fmt = [int(n) for n in args.nprobes.split(",")], "ivf n={}"
+        else:
+            knobs, label_fmt = [int(f) for f in args.factors.split(",")], mode + " x{}"
+        for knob in knobs:
+            m = await run_mode(conn, vertical, mode, queries, truth, args.k, knob)
+            label = label_fmt.format(knob)
+            print(
+                f"   {label:<14} recall={m['recall']:.3f}  "
+                f"p50={m['p50_ms']:7.2f} ms  p95={m['p95_ms']:7.2f} ms"
+            )
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--modes", default="fp32,halfvec,binary,ivf")
+    parser.add_argument("--factors", default="10", help="vector_rerank_factor a probar")
+    parser.add_argument("--nprobes", default="1,4,8,16", help="nprobe a probar en ivf")
+    parser.add_argument("--verticals", default=settings.vertical, help="v1,v2 | all")
+    args = parser.parse_args()
+
+    try:
+        async with get_async_engine().connect() as conn:
+            shares = await vertical_shares(conn)
+            await conn.commit()
+            verticals = list(shares) if args.verticals == "all" else args.verticals.split(",")
+            for vertical in verticals:
+                await bench_vertical(conn, vertical, shares.get(vertical, 0.0), args)
+    finally:
+        await dispose_engines()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,93 @@
+# app/scripts/bench_vector_decode.py
+"""
+Bytes transferidos y tiempo de decode por 1.000 filas de posts_sqlmodel.
+
+Compara:
+  - embedding como texto ('[0.1,...]') parseado en Python  (antes)
+  - embedding con codec binario asyncpg → np.float32        (ahora, opt-in)
+  - select(Post) con embedding diferido                     (ahora, por defecto)
+
+Uso:
+    python -m app.scripts.bench_vector_decode --rows 1000 --rounds 10
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from pgvector import Vector
+from sqlalchemy import text
+from sqlmodel import select
+
+from app.core.settings import settings
+from app.db.database import async_session_maker
+from app.db.models_sqlmodel import Post, with_embedding
+
+
+async def timed(session, stmt, rounds, params=None, post=None):
+    samples = []
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        rows = (await session.execute(stmt, params or {})).all()
+        if post:
+            post(rows)
+        samples.append(time.perf_counter() - t0)
+        session.expunge_all()
+    return statistics.median(samples) * 1000, len(rows)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+    params = {"vertical": settings.vertical, "n": args.rows}
+
+    async with async_session_maker() as session:
+        # -------------------------
+        # Bytes en el wire (aprox.)
+        # -------------------------
+        sizes = (await session.execute(text("""
+            SELECT count(*),
+                   sum(length(embedding::text)) AS text_bytes,
+                   sum(4 + 4 * vector_dims(embedding)) AS binary_bytes
+            FROM (
+                SELECT embedding FROM posts_sqlmodel
+                WHERE vertical = :vertical AND embedding IS NOT NULL
+                LIMIT :n
+            ) t
+        """), params)).one()
+        n = sizes[0] or 1
+        scale = 1000 / n
+        print(f"📦 {n} filas con embedding")
+        print(f"   texto   : {sizes[1] * scale / 1024:>8.1f} KB / 1.000 filas")
+        print(f"   binario : {sizes[2] * scale / 1024:>8.1f} KB / 1.000 filas")
+        print(f"   diferido: {0:>8.1f} KB / 1.000 filas (columna no seleccionada)")
+
+        # -------------------------
+        # Tiempo de fetch + decode
+        # -------------------------
+        as_text = text("""
+            SELECT pid, embedding::text FROM posts_sqlmodel
+            WHERE vertical = :vertical AND embedding IS NOT NULL LIMIT :n
+        """)
+        ms, _ = await timed(
+            session, as_text, args.rounds, params,
+            post=lambda rows: [Vector.from_text(r[1]).to_list() for r in rows],
+        )
+        print(f"⏱️ texto → list[float]       {ms * scale:>8.2f} ms / 1.000 filas")
+
+        filters = (Post.vertical == settings.vertical, Post.embedding.is_not(None))
+        ms, _ = await timed(
+            session,
+            select(Post).options(with_embedding()).where(*filters).limit(args.rows),
+            args.rounds,
+        )
+        print(f"⏱️ select(Post) + binario    {ms * scale:>8.2f} ms / 1.000 filas")
+
+        ms, _ = await timed(session, select(Post).where(*filters).limit(args.rows), args.rounds)
+        print(f"⏱️ select(Post) diferido     {ms * scale:>8.2f} ms / 1.000 filas")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,82 @@
+# app/scripts/bench_vector_engine.py
+"""
+Motor en proceso (app/ml/vector_search.py) sobre un snapshot sintético:
+latencia por query sola vs. batcheada en una GEMM, y verificación contra
+el top-k por ordenamiento completo. Sin base de datos ni modelo.
+
+Uso:
+    python -m app.scripts.bench_vector_engine --rows 200000 --batch 1,8,32
+"""
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.ml.vector_search import VectorEngine
+from app.ml.vector_snapshot import SnapshotWriter, VectorSnapshot
+
+DIM = 384
+
+
+def build_snapshot(directory: Path, rows: int, categories: int, seed: int) -> VectorSnapshot:
+    rng = np.random.default_rng(seed)
+    path = directory / "bench.vecs"
+    with SnapshotWriter(path, "bench", DIM) as writer:
+        for start in range(0, rows, 50_000):
+            n = min(50_000, rows - start)
+            embs = rng.standard_normal((n, DIM), dtype=np.float32)
+            embs /= np.linalg.norm(embs, axis=1, keepdims=True)
+            writer.append(
+                [f"bench-{i}" for i in range(start, start + n)],
+                [f"cat{c}" for c in rng.integers(0, categories, n)],
+                embs,
+            )
+    return VectorSnapshot.open(path)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--queries", type=int, default=64)
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--batch", default="1,8,32")
+    parser.add_argument("--categories", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        snap = build_snapshot(Path(tmp), args.rows, args.categories, args.seed)
+        engine = VectorEngine(snap)
+        rng = np.random.default_rng(args.seed + 1)
+        queries = snap.matrix[rng.integers(0, len(snap), args.queries)] + 0.05 * rng.standard_normal(
+            (args.queries, DIM), dtype=np.float32
+        )
+        queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+        # exactitud: mismo top-k que un argsort completo (con y sin filtro)
+        for category in (None, "cat0"):
+            mask = engine.mask(category)
+            (idx, _), = engine.search(queries[:1], [args.k], [mask])
+            full = np.where(mask, snap.matrix @ queries[0], -np.inf)
+            expected = np.argsort(-full)[: args.k]
+            assert set(idx) == set(expected), f"top-k distinto (category={category})"
+        print(f"✅ top-{args.k} idéntico al argsort completo ({len(snap):,} filas)")
+
+        for size in (int(b) for b in args.batch.split(",")):
+            per_query = []
+            for start in range(0, args.queries, size):
+                chunk = queries[start : start + size]
+                t0 = time.perf_counter()
+                engine.search(chunk, [args.k] * len(chunk), [engine.mask()] * len(chunk))
+                per_query.append((time.perf_counter() - t0) / len(chunk))
+            print(
+                f"   batch={size:<3} {statistics.median(per_query) * 1000:8.2f} ms/query  "
+                f"({1 / statistics.median(per_query):8.0f} queries/s)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# app/scripts/export_vector_snapshot.py
+"""
+Exporta (pid, category, embedding) de cada vertical a un snapshot mmap
+(app/ml/vector_snapshot.py). Lee con cursor del lado del servidor (memoria
+acotada) y publica con rename atómico: los workers de la API toman la
+versión nueva en el próximo chequeo, sin reiniciar.
+
+Uso:
+    python -m app.scripts.export_vector_snapshot                   # settings.vertical
+    python -m app.scripts.export_vector_snapshot --vertical fitness --vertical saas
+    python -m app.scripts.export_vector_snapshot --all
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+import numpy as np
+from sqlalchemy import text
+
+from app.core.logger import logger
+from app.core.settings import settings
+from app.db.database import dispose_engines, get_async_engine
+from app.ml.vector_snapshot import SnapshotWriter, VectorSnapshot, snapshot_path
+
+if sys.platform.startswith("win"):
+    asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
+DIM = 384
+CHUNK = 5000
+
+ROWS = text("""
+    SELECT pid, category, embedding, updated_at
+    FROM posts_sqlmodel
+    WHERE vertical = :vertical
+      AND embedding IS NOT NULL
+      AND deleted_at IS NULL
+    ORDER BY pid
+""")
+
+
+async def export_vertical(conn, vertical: str, directory: str) -> dict:
+    path = snapshot_path(directory, vertical)
+    start = time.perf_counter()
+    last_update = None
+    with SnapshotWriter(path, vertical, DIM) as writer:
+        result = await conn.stream(ROWS.execution_options(yield_per=CHUNK), {"vertical": vertical})
+        async for rows in result.partitions():
+            writer.append(
+                [r.pid for r in rows],
+                [r.category for r in rows],
+                np.stack([r.embedding for r in rows]),
+            )
+            chunk_max = max(r.updated_at for r in rows)
+            last_update = chunk_max if last_update is None else max(last_update, chunk_max)
+        writer.meta["max_updated_at"] = last_update.isoformat() if last_update else None
+    elapsed = time.perf_counter() - start
+
+    # arranque en frío de un worker: abrir + tocar todas las páginas
+    t0 = time.perf_counter()
+    snap = VectorSnapshot.open(path)
+    float(snap.matrix.sum())
+    logger.info(
+        "📦 %s v%s: %s vectores, %.1f MB → %s | export %.2fs, open+scan %.3fs",
+        vertical, writer.header["version"], writer.n, path.stat().st_size / 2**20, path,
+        elapsed, time.perf_counter() - t0,
+    )
+    return writer.header
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Snapshot mmap de embeddings por vertical")
+    parser.add_argument("--vertical", action="append", help="repetible; default: settings.vertical")
+    parser.add_argument("--all", action="store_true", help="todas las verticales con embeddings")
+    parser.add_argument("--dir", default=settings.vector_snapshot_dir)
+    args = parser.parse_args()
+
+    try:
+        async with get_async_engine().connect() as conn:
+            if args.all:
+                verticals = list((await conn.execute(text(
+                    "SELECT DISTINCT vertical FROM posts_sqlmodel WHERE embedding IS NOT NULL"
+                ))).scalars())
+            else:
+                verticals = args.vertical or [settings.vertical]
+            for vertical in verticals:
+                await export_vertical(conn, vertical, args.dir)
+                await conn.commit()
+    finally:
+        await dispose_engines()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -3,8 +3,8 @@ import os
 import sys
 import time
 from datetime import datetime
-from sqlalchemy import text
 from app.db.database import async_session_maker
+from app.db.stats import get_global_stats
 from app.core.logger import logger
 from app.core.settings import settings
 
@@ -35,20 +35,10 @@ async def monitor_loop():
     while True:
         try:
             async with async_session_maker() as session:
-                # Posts pendientes
-                res = await session.execute(
-                    text("SELECT COUNT(*) FROM posts_sqlmodel WHERE embedding IS NULL;")
-                )
-                pending = res.scalar()
-
-                # Posts totales (si no se proporcionó)
-                if TOTAL_LIMIT == 0:
-                    total_res = await session.execute(
-                        text("SELECT COUNT(*) FROM posts_sqlmodel;")
-                    )
-                    total = total_res.scalar()
-                else:
-                    total = TOTAL_LIMIT
+                # O(1): vertical_stats (triggers) en vez de dos COUNT(*) por vuelta
+                stats = await get_global_stats(session)
+                pending = stats["total"] - stats["embedded"]
+                total = TOTAL_LIMIT or stats["total"]
 
                 processed = total - pending
                 progress = processed / total * 100 if total else 0
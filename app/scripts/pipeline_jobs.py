@@ -0,0 +1,52 @@
+import argparse
+import asyncio
+import sys
+
+from app.db import jobs
+from app.db.database import async_session_maker
+
+# ============================================================
+# 🪟 Fix para Windows
+# ============================================================
+if sys.platform.startswith("win"):
+    asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
+
+# ============================================================
+# 📋 Estado de la cola / reintento de dead-letters
+# ============================================================
+async def show_stats() -> None:
+    async with async_session_maker() as session:
+        rows = await jobs.queue_stats(session)
+    if not rows:
+        print("Cola vacía.")
+        return
+    for r in rows:
+        print(f"{r['kind']:<10} {r['status']:<8} {r['jobs']:>10,}  más viejo: {r['oldest']:%Y-%m-%d %H:%M}")
+
+
+async def retry_dead(kind: str) -> None:
+    async with async_session_maker() as session:
+        n = await jobs.retry_dead(session, kind)
+    print(f"♻️ {n} jobs '{kind}' dead → pending")
+
+
+# ============================================================
+# 🧹 Entry point
+# ============================================================
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Cola pipeline_jobs")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("stats", help="jobs por kind/status")
+    p = sub.add_parser("retry-dead", help="reintentar dead-letters")
+    p.add_argument("--kind", required=True, choices=[jobs.EMBED, jobs.CLASSIFY, jobs.CLUSTER])
+    args = parser.parse_args()
+
+    if args.cmd == "stats":
+        asyncio.run(show_stats())
+    else:
+        asyncio.run(retry_dead(args.kind))
+
+
+if __name__ == "__main__":
+    main()
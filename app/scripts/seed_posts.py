@@ -15,7 +15,7 @@ async def seed_posts(n: int = 3):
         try:
             # Verificar si ya existen posts para esta vertical
             result = await session.execute(
-                select(Post).where(Post.vertical == settings.vertical)
+                select(Post.pid).where(Post.vertical == settings.vertical).limit(1)
             )
             if result.scalars().first():
                 logger.info("⚠️ Ya existen posts para vertical '%s'", settings.vertical)
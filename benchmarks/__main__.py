@@ -0,0 +1,238 @@
+# benchmarks/__main__.py
+"""
+Suite de benchmarks (contra Postgres + pgvector local).
+
+Usar una vertical dedicada para no mezclar con datos reales; los escenarios
+de pipelines reprocesan posts sintéticos (pid `bench-*`):
+
+    export VERTICAL=bench
+
+    # 1) datos sintéticos (tiny | small | medium | large | N)
+    python -m benchmarks seed --scale small
+
+    # 2) correr escenarios → benchmarks/results/<fecha>-<sha>.json
+    python -m benchmarks run
+    python -m benchmarks run --scenarios list,semantic_search --requests 500
+
+    # 3) comparar (exit 1 si alguna métrica empeora más que --threshold)
+    python -m benchmarks compare benchmarks/results/base.json benchmarks/results/new.json
+
+    # 4) escalado del worker de embeddings con 1..8 procesos
+    python -m benchmarks scaling --workers 1,2,4,8 --sample 4000 --encode-ms 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from dataclasses import asdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+def _git_sha() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except Exception:
+        return "unknown"
+
+
+async def _pg_version() -> str:
+    from sqlalchemy import text
+    from app.db.database import get_async_engine
+
+    async with get_async_engine().connect() as conn:
+        return await conn.scalar(text("SHOW server_version"))
+
+
+# ============================================================
+# 📥 seed
+# ============================================================
+async def cmd_seed(args) -> int:
+    from app.core.settings import settings
+    from benchmarks.datagen import DatasetSpec
+    from benchmarks.seed import load_dataset
+
+    spec = DatasetSpec.for_scale(args.scale, seed=args.seed)
+    stats = await load_dataset(spec, settings.vertical)
+    print(
+        f"✅ {stats['posts']:,} posts en '{settings.vertical}' "
+        f"({stats['posts_per_s']:,.0f} posts/s, {spec.n_topics} temas)"
+    )
+    return 0
+
+
+# ============================================================
+# ⏱️ run
+# ============================================================
+async def cmd_run(args) -> int:
+    from app.api.cache import response_cache
+    from app.core.settings import settings
+    from app.db.database import dispose_engines
+    from benchmarks.scenarios import SCENARIOS, BenchContext
+
+    names = args.scenarios.split(",") if args.scenarios else list(SCENARIOS)
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        print(f"❌ Escenarios desconocidos: {unknown} (disponibles: {list(SCENARIOS)})")
+        return 2
+
+    # medir el path real, no el cache de respuestas
+    response_cache.enabled = args.response_cache
+
+    ctx = BenchContext(
+        vertical=settings.vertical,
+        requests=args.requests,
+        concurrency=args.concurrency,
+        sample=args.sample,
+    )
+    results = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_sha": _git_sha(),
+            "label": args.label,
+            "python": platform.python_version(),
+            "host": platform.node(),
+            "postgres": await _pg_version(),
+            "context": asdict(ctx),
+            "response_cache": args.response_cache,
+        },
+        "scenarios": {},
+    }
+
+    for name in names:
+        print(f"▶️  {name}...", flush=True)
+        start = time.perf_counter()
+        try:
+            metrics = await SCENARIOS[name](ctx)
+        except Exception as e:  # un escenario roto no aborta la suite
+            metrics = {"error": f"{type(e).__name__}: {e}"}
+        results["scenarios"][name] = metrics
+        summary = ", ".join(
+            f"{k}={v:.2f}" if isinstance(v, float) else f"{k}={v}" for k, v in metrics.items()
+        )
+        print(f"   {summary}  [{time.perf_counter() - start:.1f}s]")
+
+    await dispose_engines()
+
+    out = Path(args.out) if args.out else RESULTS_DIR / (
+        f"{datetime.now():%Y%m%d-%H%M%S}-{results['meta']['git_sha']}.json"
+    )
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(results, indent=2, default=str))
+    print(f"💾 {out}")
+
+    if args.baseline:
+        return _compare(args.baseline, str(out), args.threshold)
+    return 0
+
+
+# ============================================================
+# 📈 scaling
+# ============================================================
+async def cmd_scaling(args) -> int:
+    from app.core.settings import settings
+    from app.db.database import dispose_engines
+    from benchmarks.scaling import scaling
+    from benchmarks.scenarios import BenchContext
+
+    ctx = BenchContext(vertical=settings.vertical, sample=args.sample)
+    workers = [int(n) for n in args.workers.split(",")]
+    scenarios = await scaling(ctx, workers, args.encode_ms)
+    await dispose_engines()
+
+    for name, m in scenarios.items():
+        print(
+            f"{name:<12} {m['posts_per_s']:>9.1f} posts/s  speedup x{m['speedup']:.2f}  "
+            f"eficiencia {m['efficiency']:.0%}  duplicados {m['duplicates']}"
+        )
+
+    results = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_sha": _git_sha(),
+            "label": args.label,
+            "python": platform.python_version(),
+            "host": platform.node(),
+            "cpus": os.cpu_count(),
+            "encode_ms": args.encode_ms,
+            "context": asdict(ctx),
+        },
+        "scenarios": scenarios,
+    }
+    out = Path(args.out) if args.out else RESULTS_DIR / (
+        f"{datetime.now():%Y%m%d-%H%M%S}-{results['meta']['git_sha']}-scaling.json"
+    )
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(results, indent=2, default=str))
+    print(f"💾 {out}")
+    return 1 if any(m["duplicates"] for m in scenarios.values()) else 0
+
+
+# ============================================================
+# 📊 compare
+# ============================================================
+def _compare(base_path: str, new_path: str, threshold: float) -> int:
+    from benchmarks.compare import compare, load, report
+
+    deltas = compare(load(base_path), load(new_path), threshold)
+    print(report(deltas))
+    regressions = [d for d in deltas if d.regression]
+    if regressions:
+        print(f"\n🔴 {len(regressions)} regresiones (> {threshold:.0%})")
+        return 1
+    print(f"\n✅ Sin regresiones (umbral {threshold:.0%})")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("seed", help="cargar dataset sintético")
+    p.add_argument("--scale", default="small", help="tiny | small | medium | large | N posts")
+    p.add_argument("--seed", type=int, default=42)
+
+    p = sub.add_parser("run", help="correr escenarios")
+    p.add_argument("--scenarios", default="", help="lista separada por comas (default: todos)")
+    p.add_argument("--requests", type=int, default=200)
+    p.add_argument("--concurrency", type=int, default=8)
+    p.add_argument("--sample", type=int, default=500, help="posts a reprocesar en pipelines")
+    p.add_argument("--label", default="")
+    p.add_argument("--out", default="")
+    p.add_argument("--response-cache", action="store_true", help="no desactivar el cache de respuestas")
+    p.add_argument("--baseline", default="", help="JSON previo para comparar al terminar")
+    p.add_argument("--threshold", type=float, default=0.10)
+
+    p = sub.add_parser("scaling", help="escalado del worker de embeddings (1..N procesos)")
+    p.add_argument("--workers", default="1,2,4,8")
+    p.add_argument("--sample", type=int, default=4000, help="posts del backlog por corrida")
+    p.add_argument("--encode-ms", type=float, default=None, help="encoder falso de X ms/batch")
+    p.add_argument("--label", default="")
+    p.add_argument("--out", default="")
+
+    p = sub.add_parser("compare", help="comparar dos resultados")
+    p.add_argument("base")
+    p.add_argument("new")
+    p.add_argument("--threshold", type=float, default=0.10)
+
+    args = parser.parse_args()
+    if args.cmd == "compare":
+        return _compare(args.base, args.new, args.threshold)
+    commands = {"seed": cmd_seed, "run": cmd_run, "scaling": cmd_scaling}
+    return asyncio.run(commands[args.cmd](args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+# benchmarks/compare.py
+"""Comparación de dos resultados JSON y detección de regresiones."""
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+
+
+@dataclass
+class Delta:
+    scenario: str
+    metric: str
+    base: float
+    new: float
+    change: float        # relativo, positivo = peor
+    regression: bool
+
+
+def direction(metric: str) -> Optional[int]:
+    """+1 si menor es mejor, -1 si mayor es mejor, None si no se compara."""
+    if metric == "rps" or metric.endswith("_per_s"):
+        return -1
+    if metric.endswith("_ms") or metric.endswith("_s"):
+        return 1
+    return None
+
+
+def load(path: str) -> dict:
+    return json.loads(Path(path).read_text())
+
+
+def compare(base: dict, new: dict, threshold: float = 0.10) -> List[Delta]:
+    deltas = []
+    for scenario, new_metrics in new.get("scenarios", {}).items():
+        base_metrics = base.get("scenarios", {}).get(scenario)
+        if not base_metrics or "error" in new_metrics or "error" in base_metrics:
+            continue
+        for metric, new_value in new_metrics.items():
+            sign = direction(metric)
+            base_value = base_metrics.get(metric)
+            if sign is None or not base_value:
+                continue
+            change = sign * (new_value - base_value) / base_value
+            deltas.append(Delta(scenario, metric, base_value, new_value, change, change > threshold))
+    return deltas
+
+
+def report(deltas: List[Delta]) -> str:
+    lines = []
+    for d in deltas:
+        flag = "🔴 REGRESIÓN" if d.regression else ("🟢" if d.change < 0 else "  ")
+        lines.append(
+            f"{d.scenario:<16} {d.metric:<12} {d.base:>12.2f} → {d.new:>12.2f} "
+            f"({(d.new - d.base) / d.base:+.1%}) {flag}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,137 @@
+# benchmarks/datagen.py
+"""
+Datos sintéticos reproducibles para los benchmarks.
+
+Extiende la idea de app/scripts/seed_posts.py (posts de la vertical) y
+seed_clusters.py (vectores normalizados de 384 dims) a escala:
+
+- Textos: largo de título/cuerpo lognormal (muchos posts cortos, cola larga
+  de posts muy largos, como en Reddit), vocabulario común + palabras propias
+  de cada tema → las búsquedas de texto tienen hits realistas.
+- Embeddings: centro por tema + ruido gaussiano, normalizados L2 →
+  clusters reales para HDBSCAN y vecinos cercanos con sentido.
+- Estado del pipeline: fracción con embedding / enriquecidos / con cluster.
+
+Misma `seed` → mismos datos. Las filas llevan pid `bench-<n>` para poder
+borrarlas sin tocar datos reales.
+"""
+import math
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List
+
+import numpy as np
+
+N_DIM = 384
+PID_PREFIX = "bench-"
+
+SCALES: Dict[str, int] = {
+    "tiny": 2_000,
+    "small": 20_000,
+    "medium": 200_000,
+    "large": 1_000_000,
+}
+
+COMMON_WORDS = (
+    "i have been trying to find a way the my and for with but it is not any "
+    "does anyone know what how when why best good bad help need problem issue "
+    "after before every day week month still really just also about this that"
+).split()
+
+TOPIC_WORDS = (
+    "protein creatine whey vegan shake sleep insomnia caffeine focus memory "
+    "knee shoulder injury recovery stretch running marathon pace shoes cardio "
+    "diet calories keto fasting sugar weight loss gain muscle strength squat "
+    "deadlift bench gym routine program beginner plateau supplement vitamin "
+    "magnesium zinc omega anxiety stress energy fatigue hydration electrolytes"
+).split()
+
+# Queries de ejemplo (texto plano y semántico) derivadas del mismo vocabulario
+SAMPLE_QUERIES = [
+    "protein", "sleep", "knee injury", "creatine", "weight loss",
+    "best protein powder for muscle growth", "cannot sleep after training",
+    "knee pain when running", "supplements for focus and memory",
+]
+
+
+@dataclass(frozen=True)
+class DatasetSpec:
+    n_posts: int
+    n_topics: int = 50
+    cluster_noise: float = 0.35      # sigma del ruido alrededor del centro
+    embedded_ratio: float = 0.9
+    enriched_ratio: float = 0.7
+    clustered_ratio: float = 0.5
+    title_words_median: float = 9
+    body_words_median: float = 60
+    body_words_sigma: float = 1.1    # lognormal → cola larga
+    days: int = 90
+    seed: int = 42
+
+    @classmethod
+    def for_scale(cls, scale: str, **overrides) -> "DatasetSpec":
+        n = SCALES[scale] if scale in SCALES else int(scale)
+        return cls(n_posts=n, n_topics=max(10, int(math.sqrt(n) / 3)), **overrides)
+
+
+class Generator:
+    def __init__(self, spec: DatasetSpec):
+        self.spec = spec
+        rng = np.random.default_rng(spec.seed)
+        centers = rng.normal(0, 1, (spec.n_topics, N_DIM)).astype(np.float32)
+        self.centers = centers / np.linalg.norm(centers, axis=1, keepdims=True)
+        # cada tema usa un subconjunto de palabras propias
+        self.topic_vocab = [
+            rng.choice(TOPIC_WORDS, size=6, replace=False).tolist()
+            for _ in range(spec.n_topics)
+        ]
+
+    def _words(self, rng, median: float, sigma: float, topic: int) -> str:
+        n = max(1, int(rng.lognormal(math.log(median), sigma)))
+        topical = rng.random(n) < 0.25
+        common = rng.choice(COMMON_WORDS, size=n)
+        own = rng.choice(self.topic_vocab[topic], size=n)
+        return " ".join(np.where(topical, own, common).tolist())
+
+    def embeddings(self, topics: np.ndarray, rng) -> np.ndarray:
+        noise = rng.normal(0, self.spec.cluster_noise / math.sqrt(N_DIM), (len(topics), N_DIM))
+        vecs = self.centers[topics] + noise.astype(np.float32)
+        return vecs / np.linalg.norm(vecs, axis=1, keepdims=True)
+
+    def batches(self, vertical: str, batch_size: int = 5_000) -> Iterator[List[dict]]:
+        """Filas para posts_sqlmodel, en lotes (memoria acotada a cualquier escala)."""
+        spec = self.spec
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+        for start in range(0, spec.n_posts, batch_size):
+            # semilla por lote: el lote k es idéntico sin importar batch_size previo
+            rng = np.random.default_rng([spec.seed, start])
+            n = min(batch_size, spec.n_posts - start)
+            topics = rng.integers(0, spec.n_topics, n)
+            embs = self.embeddings(topics, rng)
+            flags = rng.random((n, 3))
+            ages = rng.random(n) * spec.days * 86400
+
+            rows = []
+            for i in range(n):
+                topic = int(topics[i])
+                created = now - timedelta(seconds=float(ages[i]))
+                embedded = flags[i, 0] < spec.embedded_ratio
+                enriched = embedded and flags[i, 1] < spec.enriched_ratio
+                rows.append({
+                    "pid": f"{PID_PREFIX}{start + i}",
+                    "title": self._words(rng, spec.title_words_median, 0.5, topic),
+                    "body": self._words(rng, spec.body_words_median, spec.body_words_sigma, topic),
+                    "vertical": vertical,
+                    "category": f"topic_{topic}" if enriched else None,
+                    "confidence": 0.5 + 0.5 * float(flags[i, 1]) if enriched else None,
+                    "score": float(rng.integers(0, 5000)),
+                    "n_comments": int(rng.integers(0, 500)),
+                    "cluster_id": (
+                        f"bench_{topic}" if enriched and flags[i, 2] < spec.clustered_ratio else None
+                    ),
+                    "embedding": embs[i] if embedded else None,
+                    "enriched_at": created + timedelta(hours=1) if enriched else None,
+                    "created_at": created,
+                    "updated_at": created,
+                })
+            yield rows
@@ -0,0 +1,107 @@
+# benchmarks/scaling.py
+"""
+Escalado horizontal del worker de embeddings: 1 → N procesos locales
+reclamando del mismo backlog (jobs `embed`: SKIP LOCKED + lease).
+
+Por cada N: reset de `sample` posts sintéticos, N procesos (spawn) cargan
+el modelo, esperan una barrera y corren `_embed_all_posts` hasta vaciar la
+cola. Se mide wall desde la barrera hasta el último proceso y se verifica
+que ningún post se haya reclamado dos veces (`duplicates` = reclamados -
+distintos embebidos).
+
+`--encode-ms X` reemplaza el encoder por uno que duerme X ms por batch:
+aísla el costo de coordinación (claim/commit) del CPU del modelo, que con
+más procesos que cores deja de escalar por hardware, no por protocolo.
+"""
+import asyncio
+import multiprocessing as mp
+import os
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.db import jobs
+from benchmarks.scenarios import BenchContext, _count, _requeue, _reset_sample
+
+RESET = "embedding = NULL, embedding_attempt_at = NULL"
+
+
+def _fake_encoder(encode_ms: float, dim: int):
+    rng = np.random.default_rng(os.getpid())
+
+    async def embed_text(texts):
+        await asyncio.sleep(encode_ms / 1000)
+        embs = rng.standard_normal((len(texts), dim)).astype(np.float32)
+        return embs / np.linalg.norm(embs, axis=1, keepdims=True)
+
+    return embed_text
+
+
+def _worker(limit: int, encode_ms: Optional[float], ready, go, results) -> None:
+    # un hilo de BLAS/torch por proceso: N procesos ≈ N cores
+    os.environ.setdefault("OMP_NUM_THREADS", "1")
+    os.environ.setdefault("MKL_NUM_THREADS", "1")
+
+    from app.core.profiling import StageTimer
+    from app.enrichment import embed_posts
+
+    try:
+        import torch
+        torch.set_num_threads(1)
+    except ImportError:
+        pass
+
+    if encode_ms is not None:
+        embed_posts.embed_text = _fake_encoder(encode_ms, embed_posts.EXPECTED_DIM)
+
+    ready.release()
+    go.wait()
+    claimed = asyncio.run(embed_posts._embed_all_posts(limit, StageTimer(f"worker-{os.getpid()}")))
+    results.put(claimed)
+
+
+def _run_workers(n: int, limit: int, encode_ms: Optional[float]) -> Dict[str, float]:
+    spawn = mp.get_context("spawn")  # sin heredar engine/event loop del padre
+    ready, go, results = spawn.Semaphore(0), spawn.Event(), spawn.Queue()
+    procs = [spawn.Process(target=_worker, args=(limit, encode_ms, ready, go, results)) for _ in range(n)]
+    for p in procs:
+        p.start()
+    for _ in procs:
+        ready.acquire()  # todos con el modelo cargado
+
+    start = time.perf_counter()
+    go.set()
+    claimed = [results.get() for _ in procs]
+    elapsed = time.perf_counter() - start
+    for p in procs:
+        p.join()
+    return {"claimed": sum(claimed), "max_per_worker": max(claimed), "elapsed_s": elapsed}
+
+
+async def scaling(ctx: BenchContext, workers: List[int], encode_ms: Optional[float] = None) -> Dict[str, dict]:
+    """Un resultado por N (`scaling_w<N>`), comparable con benchmarks.compare."""
+    results: Dict[str, dict] = {}
+    base: Optional[float] = None
+
+    for n in workers:
+        pids = await _reset_sample(ctx, RESET)
+        await _requeue(ctx, jobs.EMBED, pids)
+        run = await asyncio.to_thread(_run_workers, n, len(pids), encode_ms)
+        done = await _count(
+            "SELECT count(*) FROM posts_sqlmodel WHERE pid = ANY(:pids) AND embedding IS NOT NULL", pids
+        )
+        rate = done / run["elapsed_s"]
+        base = base or rate / n  # throughput por worker de la primera corrida
+        results[f"scaling_w{n}"] = {
+            "workers": n,
+            "posts": done,
+            # con el backlog = sample, reclamos de más solo pueden ser dobles
+            # (o batches fallidos: ver los logs del worker)
+            "duplicates": run["claimed"] - done,
+            "elapsed_s": run["elapsed_s"],
+            "posts_per_s": rate,
+            "speedup": rate / base,
+            "efficiency": rate / (base * n),
+        }
+    return results
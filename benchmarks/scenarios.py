@@ -0,0 +1,191 @@
+# benchmarks/scenarios.py
+"""
+Escenarios: uno por hot path. Cada uno devuelve un dict de métricas con
+sufijo que indica la dirección (ver compare.py):
+
+    *_ms, *_s            → menor es mejor
+    rps, *_per_s         → mayor es mejor
+    el resto             → informativo (no se compara)
+"""
+import asyncio
+import itertools
+import statistics
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List
+
+from sqlalchemy import text
+
+from app.db import jobs
+from app.db.database import get_async_engine, get_async_session_maker
+from benchmarks.datagen import PID_PREFIX, SAMPLE_QUERIES
+
+PREFIX = "/api/v1/insights"
+
+
+@dataclass
+class BenchContext:
+    vertical: str
+    requests: int = 200
+    concurrency: int = 8
+    sample: int = 500          # posts a reprocesar en escenarios de pipelines
+    queries: List[str] = field(default_factory=lambda: list(SAMPLE_QUERIES))
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    idx = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[idx]
+
+
+def latency_summary(latencies: List[float], elapsed: float) -> Dict[str, float]:
+    return {
+        "requests": len(latencies),
+        "rps": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+# ============================================================
+# 🌐 HTTP (ASGI en proceso: sin red ni uvicorn)
+# ============================================================
+async def _http(ctx: BenchContext, paths: List[str]) -> Dict[str, float]:
+    import httpx
+    from app.main import app
+
+    latencies = []
+    sem = asyncio.Semaphore(ctx.concurrency)
+    cycle = itertools.cycle(paths)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for path in paths:
+            (await client.get(path)).raise_for_status()  # warm-up
+
+        async def one(path):
+            async with sem:
+                t0 = time.perf_counter()
+                r = await client.get(path)
+                latencies.append(time.perf_counter() - t0)
+                r.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(next(cycle)) for _ in range(ctx.requests)))
+        elapsed = time.perf_counter() - start
+
+    return latency_summary(latencies, elapsed)
+
+
+async def list_posts(ctx: BenchContext):
+    return await _http(ctx, [
+        f"{PREFIX}/posts?limit=100",
+        f"{PREFIX}/posts?limit=100&offset=1000",
+        f"{PREFIX}/posts?limit=20&cluster_id=bench_1",
+    ])
+
+
+async def text_search(ctx: BenchContext):
+    return await _http(ctx, [f"{PREFIX}/posts/search?q={q}&limit=50" for q in ctx.queries])
+
+
+async def semantic_search(ctx: BenchContext):
+    return await _http(ctx, [f"{PREFIX}/posts/semantic-search?q={q}&limit=20" for q in ctx.queries])
+
+
+# ============================================================
+# ⚙️ Pipelines (reprocesan `sample` posts sintéticos)
+# ============================================================
+async def _reset_sample(ctx: BenchContext, assignments: str) -> List[str]:
+    async with get_async_engine().begin() as conn:
+        result = await conn.execute(
+            text(f"""
+                UPDATE posts_sqlmodel SET {assignments}
+                WHERE pid IN (
+                    SELECT pid FROM posts_sqlmodel
+                    WHERE vertical = :v AND pid LIKE :prefix AND deleted_at IS NULL
+                    ORDER BY pid LIMIT :n
+                )
+                RETURNING pid
+            """),
+            {"v": ctx.vertical, "prefix": f"{PID_PREFIX}%", "n": ctx.sample},
+        )
+        return list(result.scalars())
+
+
+async def _requeue(ctx: BenchContext, kind: str, pids: List[str]) -> None:
+    """Vuelve a pending los jobs `kind` de la muestra (done → pending)."""
+    async with get_async_session_maker()() as db:
+        await jobs.enqueue(db, kind, pids, ctx.vertical, reopen=True)
+        await db.commit()
+
+
+async def _count(sql: str, pids: List[str]) -> int:
+    async with get_async_engine().connect() as conn:
+        return await conn.scalar(text(sql), {"pids": pids}) or 0
+
+
+async def embed_worker(ctx: BenchContext):
+    from app.enrichment.embed_posts import embed_all_posts
+
+    pids = await _reset_sample(ctx, "embedding = NULL, embedding_attempt_at = NULL")
+    await _requeue(ctx, jobs.EMBED, pids)
+    start = time.perf_counter()
+    await embed_all_posts(limit=len(pids))
+    elapsed = time.perf_counter() - start
+    done = await _count(
+        "SELECT count(*) FROM posts_sqlmodel WHERE pid = ANY(:pids) AND embedding IS NOT NULL", pids
+    )
+    return {"posts": done, "elapsed_s": elapsed, "posts_per_s": done / elapsed}
+
+
+async def enrichment(ctx: BenchContext):
+    from app.enrichment.pipeline_sqlmodel import enrich_pending_posts
+
+    pids = await _reset_sample(ctx, "enriched_at = NULL")
+    await _requeue(ctx, jobs.CLASSIFY, pids)
+    start = time.perf_counter()
+    result = await enrich_pending_posts(limit=len(pids))
+    elapsed = time.perf_counter() - start
+    done = result.get("processed", 0)
+    return {"posts": done, "elapsed_s": elapsed, "posts_per_s": done / elapsed}
+
+
+async def clustering(ctx: BenchContext):
+    from app.enrichment.cluster_pipeline import cluster_posts
+
+    started_at = time.time()
+    start = time.perf_counter()
+    result = await cluster_posts() or {}
+    elapsed = time.perf_counter() - start
+
+    # no acumular clusters de corridas de benchmark (ni dejar posts
+    # apuntando a clusters borrados: la búsqueda ivf no los sondearía)
+    async with get_async_engine().begin() as conn:
+        await conn.execute(
+            text("DELETE FROM insights_clusters WHERE vertical = :v AND created_at >= to_timestamp(:t)"),
+            {"v": ctx.vertical, "t": started_at},
+        )
+        await conn.execute(
+            text("UPDATE posts_sqlmodel SET cluster_id = NULL WHERE vertical = :v AND cluster_id IS NOT NULL"),
+            {"v": ctx.vertical},
+        )
+
+    posts = result.get("posts", 0)
+    return {
+        "posts": posts,
+        "clusters": result.get("clusters", 0),
+        "elapsed_s": elapsed,
+        "posts_per_s": posts / elapsed if elapsed else 0.0,
+    }
+
+
+SCENARIOS: Dict[str, Callable[[BenchContext], Awaitable[dict]]] = {
+    "list": list_posts,
+    "text_search": text_search,
+    "semantic_search": semantic_search,
+    "embed_worker": embed_worker,
+    "enrichment": enrichment,
+    "clustering": clustering,
+}
@@ -0,0 +1,50 @@
+# benchmarks/seed.py
+"""Carga/borrado del dataset sintético (COPY binario vía asyncpg)."""
+import time
+
+from sqlalchemy import text
+
+from app.core.logger import logger
+from app.db.database import get_async_engine
+from benchmarks.datagen import PID_PREFIX, DatasetSpec, Generator
+
+COLUMNS = (
+    "pid", "title", "body", "vertical", "category", "confidence", "score",
+    "n_comments", "cluster_id", "embedding", "enriched_at", "created_at", "updated_at",
+)
+
+
+async def reset_dataset(vertical: str) -> int:
+    async with get_async_engine().begin() as conn:
+        result = await conn.execute(
+            text("DELETE FROM posts_sqlmodel WHERE vertical = :v AND pid LIKE :prefix"),
+            {"v": vertical, "prefix": f"{PID_PREFIX}%"},
+        )
+        return result.rowcount
+
+
+async def load_dataset(spec: DatasetSpec, vertical: str, batch_size: int = 5_000) -> dict:
+    """Borra el dataset previo de la vertical y carga uno nuevo. Devuelve stats de carga."""
+    deleted = await reset_dataset(vertical)
+    if deleted:
+        logger.info("🧹 %s posts sintéticos previos borrados", deleted)
+
+    start = time.perf_counter()
+    loaded = 0
+    async with get_async_engine().connect() as conn:
+        raw = await conn.get_raw_connection()
+        apg = raw.driver_connection  # asyncpg.Connection (con el codec de vector)
+        for rows in Generator(spec).batches(vertical, batch_size):
+            await apg.copy_records_to_table(
+                "posts_sqlmodel",
+                records=[tuple(r[c] for c in COLUMNS) for r in rows],
+                columns=COLUMNS,
+            )
+            loaded += len(rows)
+            logger.info("📥 %s/%s posts", loaded, spec.n_posts)
+
+    async with get_async_engine().begin() as conn:  # commit: si no, pg_statistic vuelve atrás
+        await conn.execute(text("ANALYZE posts_sqlmodel"))
+
+    elapsed = time.perf_counter() - start
+    return {"posts": loaded, "elapsed_s": elapsed, "posts_per_s": loaded / elapsed}
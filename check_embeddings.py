@@ -1,12 +1,12 @@
 import asyncio
 from app.db.database import async_session_maker
-from app.db.models_sqlmodel import Post
+from app.db.models_sqlmodel import Post, with_embedding
 from sqlalchemy.future import select
 
 
 async def check_posts():
     async with async_session_maker() as session:
-        result = await session.execute(select(Post))
+        result = await session.execute(select(Post).options(with_embedding()))
         posts = result.scalars().all()   # <-- 🔥 AQUÍ LA CORRECCIÓN
 
         for p in posts:
@@ -0,0 +1,4 @@
+#!/bin/bash
+# Permite conexiones de replicación (pg_basebackup / streaming) desde la red de compose.
+set -e
+echo "host replication all all scram-sha-256" >> "$PGDATA/pg_hba.conf"
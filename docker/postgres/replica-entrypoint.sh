@@ -0,0 +1,11 @@
+#!/bin/bash
+# Réplica de streaming local: clona el primario la primera vez y arranca en hot standby.
+set -e
+if [ ! -s "$PGDATA/PG_VERSION" ]; then
+  until pg_basebackup -h postgres -U "$POSTGRES_USER" -D "$PGDATA" -R -X stream; do
+    echo "Esperando al primario..."
+    sleep 2
+  done
+  chmod 700 "$PGDATA"
+fi
+exec postgres -c hot_standby=on
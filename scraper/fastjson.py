@@ -0,0 +1,23 @@
+# scraper/fastjson.py
+"""
+Decodificador JSON rápido para el parseo de listings.
+
+Parsea directo desde bytes (sin pasar por `response.text`).
+Backend: orjson → msgspec → stdlib, según lo que esté instalado.
+"""
+try:
+    import orjson
+
+    BACKEND = "orjson"
+    loads = orjson.loads
+except ImportError:
+    try:
+        import msgspec
+
+        BACKEND = "msgspec"
+        loads = msgspec.json.Decoder().decode
+    except ImportError:
+        import json
+
+        BACKEND = "json"
+        loads = json.loads  # acepta bytes (detecta utf-8/16/32)
@@ -3,10 +3,42 @@
 # See documentation in:
 # https://docs.scrapy.org/en/latest/topics/items.html
 
-import scrapy
+from dataclasses import dataclass
+from typing import Any, Dict
 
 
-class ScraperItem(scrapy.Item):
-    # define the fields for your item here like:
-    # name = scrapy.Field()
-    pass
+@dataclass(slots=True)
+class ScraperItem:
+    """
+    Post de un listing de Reddit (`/r/<sub>/.json`).
+
+    Dataclass con __slots__: Scrapy la soporta vía itemadapter y es mucho
+    más barata de construir que un dict o un scrapy.Item por post.
+    """
+
+    pid: str          # id corto ("abc123")
+    fullname: str     # "t3_abc123", útil como cursor `after`
+    subreddit: str
+    title: str
+    body: str         # selftext
+    author: str
+    score: int
+    comments: int     # num_comments (nombre que espera data_pipeline/clean_data.py)
+    url: str
+    created_utc: float
+
+    @classmethod
+    def from_listing(cls, d: Dict[str, Any]) -> "ScraperItem":
+        """Construye el item desde `child["data"]` de un listing."""
+        return cls(
+            d["id"],
+            d["name"],
+            d.get("subreddit", ""),
+            d.get("title", ""),
+            d.get("selftext", ""),
+            d.get("author", ""),
+            d.get("score", 0),
+            d.get("num_comments", 0),
+            d.get("url", ""),
+            d.get("created_utc", 0.0),
+        )
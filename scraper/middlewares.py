@@ -4,10 +4,15 @@
 # https://docs.scrapy.org/en/latest/topics/spider-middleware.html
 
 from scrapy import signals
+from scrapy.exceptions import IgnoreRequest
+from scrapy.http import Headers
+from scrapy.responsetypes import responsetypes
 
 # useful for handling different item types with a single interface
 from itemadapter import ItemAdapter
 
+from scraper.response_cache import ResponseCache
+
 
 class ScraperSpiderMiddleware:
     # Not all methods need to be defined. If a method is not defined,
@@ -54,17 +59,49 @@ class ScraperSpiderMiddleware:
 
 
 class ScraperDownloaderMiddleware:
-    # Not all methods need to be defined. If a method is not defined,
-    # scrapy acts as if the downloader middleware does not modify the
-    # passed objects.
+    """
+    Cache HTTP en disco + modo replay.
+
+    - RESPONSE_CACHE_ENABLED: sirve respuestas frescas (< RESPONSE_CACHE_TTL)
+      desde disco y guarda las nuevas.
+    - RESPONSE_CACHE_REPLAY: sirve el crawl grabado sin tocar la red; una
+      request no grabada se ignora. Sirve de fixture determinista para
+      medir parseo y pipelines.
+    """
+
+    def __init__(self, crawler=None, cache=None, replay=False, statuses=(200,)):
+        self.crawler = crawler
+        self.cache = cache
+        self.replay = replay
+        self.statuses = set(statuses)
 
     @classmethod
     def from_crawler(cls, crawler):
         # This method is used by Scrapy to create your spiders.
-        s = cls()
+        settings = crawler.settings
+        replay = settings.getbool("RESPONSE_CACHE_REPLAY")
+        cache = None
+        if replay or settings.getbool("RESPONSE_CACHE_ENABLED"):
+            cache = ResponseCache(
+                settings.get("RESPONSE_CACHE_DIR", ".scrapy/response_cache"),
+                ttl=settings.getfloat("RESPONSE_CACHE_TTL", 0),
+            )
+        s = cls(
+            crawler=crawler,
+            cache=cache,
+            replay=replay,
+            # desde CLI/env llegan como strings ("200,404")
+            statuses=[int(code) for code in settings.getlist("RESPONSE_CACHE_STATUSES", [200])],
+        )
         crawler.signals.connect(s.spider_opened, signal=signals.spider_opened)
         return s
 
+    def _key(self, request) -> str:
+        return self.crawler.request_fingerprinter.fingerprint(request).hex()
+
+    def _stat(self, name: str) -> None:
+        self.crawler.stats.inc_value(f"response_cache/{name}")
+
     def process_request(self, request, spider):
         # Called for each request that goes through the downloader
         # middleware.
@@ -75,7 +112,27 @@ class ScraperDownloaderMiddleware:
         # - or return a Request object
         # - or raise IgnoreRequest: process_exception() methods of
         #   installed downloader middleware will be called
-        return None
+        if self.cache is None:
+            return None
+
+        cached = self.cache.load(self._key(request), ignore_ttl=self.replay)
+        if cached is None:
+            self._stat("miss")
+            if self.replay:
+                raise IgnoreRequest(f"Not recorded (replay mode): {request.url}")
+            return None
+
+        self._stat("hit")
+        headers = Headers(cached.headers)
+        respcls = responsetypes.from_args(headers=headers, url=cached.url, body=cached.body)
+        return respcls(
+            url=cached.url,
+            status=cached.status,
+            headers=headers,
+            body=cached.body,
+            request=request,
+            flags=["cached"],
+        )
 
     def process_response(self, request, response, spider):
         # Called with the response returned from the downloader.
@@ -84,6 +141,20 @@ class ScraperDownloaderMiddleware:
         # - return a Response object
         # - return a Request object
         # - or raise IgnoreRequest
+        if (
+            self.cache is not None
+            and not self.replay
+            and "cached" not in response.flags
+            and response.status in self.statuses
+        ):
+            headers = {
+                k.decode("latin-1"): [v.decode("latin-1") for v in vs]
+                for k, vs in response.headers.items()
+            }
+            self.cache.store(
+                self._key(request), response.url, response.status, headers, response.body
+            )
+            self._stat("store")
         return response
 
     def process_exception(self, request, exception, spider):
@@ -98,3 +169,6 @@ class ScraperDownloaderMiddleware:
 
     def spider_opened(self, spider):
         spider.logger.info("Spider opened: %s" % spider.name)
+        if self.cache is not None:
+            mode = "replay" if self.replay else f"ttl={self.cache.ttl:g}s"
+            spider.logger.info("Response cache: %s (%s)" % (self.cache.cache_dir, mode))
@@ -0,0 +1,115 @@
+# scraper/response_cache.py
+"""
+Cache HTTP en disco, direccionado por contenido.
+
+Layout:
+    <dir>/objects/ab/ab12...   → body comprimido (zlib), nombre = sha256 del body
+    <dir>/requests/cd/cd34...  → metadata JSON de la request (url, status, headers, body_sha)
+
+Dos requests que devuelven el mismo body comparten un solo objeto.
+Sin dependencias de Scrapy: el middleware traduce Request/Response.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    url: str
+    status: int
+    headers: Dict[str, List[str]]
+    body: bytes
+    stored_at: float
+
+
+class ResponseCache:
+    """Almacén de respuestas con TTL (0 = nunca expira)."""
+
+    def __init__(self, cache_dir: str, ttl: float = 0, compresslevel: int = 6):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.compresslevel = compresslevel
+
+    # ------------------------------------------------------------
+    # Paths
+    # ------------------------------------------------------------
+    def _path(self, kind: str, key: str) -> str:
+        return os.path.join(self.cache_dir, kind, key[:2], key)
+
+    @staticmethod
+    def _write_atomic(path: str, data: bytes) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+
+    # ------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------
+    def is_expired(self, stored_at: float) -> bool:
+        return bool(self.ttl) and time.time() - stored_at > self.ttl
+
+    def load(self, key: str, ignore_ttl: bool = False) -> Optional[CachedResponse]:
+        """Devuelve la respuesta guardada o None si no existe / expiró."""
+        try:
+            with open(self._path("requests", key), "rb") as f:
+                meta = json.loads(f.read())
+            if not ignore_ttl and self.is_expired(meta["stored_at"]):
+                return None
+            with open(self._path("objects", meta["body_sha"]), "rb") as f:
+                body = zlib.decompress(f.read())
+        except (FileNotFoundError, KeyError, ValueError, zlib.error):
+            return None
+
+        return CachedResponse(
+            url=meta["url"],
+            status=meta["status"],
+            headers=meta["headers"],
+            body=body,
+            stored_at=meta["stored_at"],
+        )
+
+    def store(
+        self,
+        key: str,
+        url: str,
+        status: int,
+        headers: Dict[str, List[str]],
+        body: bytes,
+    ) -> None:
+        body_sha = hashlib.sha256(body).hexdigest()
+        obj_path = self._path("objects", body_sha)
+        if not os.path.exists(obj_path):
+            self._write_atomic(obj_path, zlib.compress(body, self.compresslevel))
+
+        meta = {
+            "url": url,
+            "status": status,
+            "headers": headers,
+            "body_sha": body_sha,
+            "stored_at": time.time(),
+        }
+        self._write_atomic(self._path("requests", key), json.dumps(meta).encode("utf-8"))
+
+    def iter_bodies(self):
+        """Itera los bodies grabados (útil como fixture de benchmarks)."""
+        root = os.path.join(self.cache_dir, "requests")
+        for dirpath, _, filenames in os.walk(root):
+            for name in sorted(filenames):
+                if name.startswith(".tmp-"):
+                    continue
+                cached = self.load(name, ignore_ttl=True)
+                if cached is not None:
+                    yield cached
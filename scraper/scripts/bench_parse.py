@@ -0,0 +1,138 @@
+"""
+Benchmark del parseo de listings (RedditSpider.parse) sobre páginas grabadas.
+
+Uso:
+    # 1) grabar un crawl una vez (ver RESPONSE_CACHE_* en scraper/settings.py)
+    scrapy crawl reddit_spider -s RESPONSE_CACHE_ENABLED=1
+    # 2) medir offline
+    python -m scraper.scripts.bench_parse --cache-dir .scrapy/response_cache
+    # sin grabación: páginas sintéticas
+    python -m scraper.scripts.bench_parse --synthetic 200
+"""
+import argparse
+import json
+import random
+import time
+
+from scrapy.http import TextResponse
+
+from scraper.response_cache import ResponseCache
+from scraper.spiders import reddit_spider
+from scraper.spiders.reddit_spider import RedditSpider
+
+
+# ============================================================
+# 📦 Fixtures
+# ============================================================
+def recorded_pages(cache_dir: str):
+    return [(c.url, c.body) for c in ResponseCache(cache_dir).iter_bodies()]
+
+
+def synthetic_pages(n: int, per_page: int = 100, seed: int = 42):
+    rng = random.Random(seed)
+    pages = []
+    for i in range(n):
+        children = []
+        for j in range(per_page):
+            pid = f"{i:04x}{j:03x}"
+            children.append({
+                "kind": "t3",
+                "data": {
+                    "id": pid,
+                    "name": f"t3_{pid}",
+                    "subreddit": "AskReddit",
+                    "title": "What is your biggest problem with " + "x" * rng.randint(10, 120),
+                    "selftext": "lorem ipsum " * rng.randint(0, 200),
+                    "author": f"user{rng.randint(0, 10_000)}",
+                    "score": rng.randint(0, 50_000),
+                    "num_comments": rng.randint(0, 5_000),
+                    "url": f"https://www.reddit.com/r/AskReddit/comments/{pid}/",
+                    "created_utc": 1.7e9 + rng.random() * 1e7,
+                    # campos que el spider ignora (los listings reales traen ~100)
+                    "thumbnail": "self", "over_18": False, "gilded": 0,
+                    "preview": {"images": [{"source": {"url": "https://i.redd.it/x.jpg"}}]},
+                },
+            })
+        body = json.dumps({"kind": "Listing", "data": {"after": None, "children": children}})
+        pages.append((f"https://www.reddit.com/r/AskReddit/.json?page={i}", body.encode()))
+    return pages
+
+
+# ============================================================
+# ⏱️ Medición
+# ============================================================
+def legacy_parse(response):
+    """Implementación anterior: response.text + dict por post (baseline)."""
+    data = json.loads(response.text)
+    for post in data["data"]["children"]:
+        yield {
+            "title": post["data"]["title"],
+            "author": post["data"]["author"],
+            "score": post["data"]["score"],
+            "url": post["data"]["url"],
+            "comments": post["data"]["num_comments"],
+        }
+
+
+def run(parse, pages, rounds: int):
+    items = 0
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for url, body in pages:
+            response = TextResponse(url=url, body=body, encoding="utf-8")
+            for _ in parse(response):
+                items += 1
+    elapsed = time.perf_counter() - start
+    return {
+        "pages_per_s": len(pages) * rounds / elapsed,
+        "items_per_s": items / elapsed,
+        "elapsed_s": elapsed,
+    }
+
+
+def backends():
+    import json as stdlib_json
+    found = {"json": stdlib_json.loads}
+    try:
+        import orjson
+        found["orjson"] = orjson.loads
+    except ImportError:
+        pass
+    try:
+        import msgspec
+        found["msgspec"] = msgspec.json.Decoder().decode
+    except ImportError:
+        pass
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cache-dir", default=".scrapy/response_cache")
+    parser.add_argument("--synthetic", type=int, default=0, help="N páginas sintéticas en vez del crawl grabado")
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    pages = synthetic_pages(args.synthetic) if args.synthetic else recorded_pages(args.cache_dir)
+    if not pages:
+        raise SystemExit(f"Sin páginas grabadas en {args.cache_dir} (usa --synthetic N)")
+
+    size_mb = sum(len(b) for _, b in pages) / 1e6
+    print(f"📦 {len(pages)} páginas ({size_mb:.1f} MB) x {args.rounds} rondas")
+
+    spider = RedditSpider()
+    results = {"legacy (text + dict)": run(legacy_parse, pages, args.rounds)}
+    for name, loads in backends().items():
+        reddit_spider.loads = loads
+        results[f"bytes + slots [{name}]"] = run(spider.parse, pages, args.rounds)
+
+    base = results["legacy (text + dict)"]["items_per_s"]
+    for name, r in results.items():
+        print(
+            f"{name:<28} {r['pages_per_s']:>9.1f} pages/s "
+            f"{r['items_per_s']:>11.0f} items/s  x{r['items_per_s'] / base:.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -22,3 +22,16 @@ DEFAULT_REQUEST_HEADERS = {
 
 # Encoding de los archivos exportados
 FEED_EXPORT_ENCODING = "utf-8"
+
+# 💾 Cache HTTP en disco (scraper/middlewares.py::ScraperDownloaderMiddleware)
+#   scrapy crawl reddit_spider -s RESPONSE_CACHE_ENABLED=1   → graba / reutiliza
+#   scrapy crawl reddit_spider -s RESPONSE_CACHE_REPLAY=1    → 100% offline
+RESPONSE_CACHE_ENABLED = False
+RESPONSE_CACHE_REPLAY = False
+RESPONSE_CACHE_DIR = ".scrapy/response_cache"
+RESPONSE_CACHE_TTL = 6 * 3600  # segundos (0 = nunca expira)
+RESPONSE_CACHE_STATUSES = [200]
+
+DOWNLOADER_MIDDLEWARES = {
+    "scraper.middlewares.ScraperDownloaderMiddleware": 543,
+}
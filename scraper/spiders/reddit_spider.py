@@ -1,5 +1,8 @@
 import scrapy
-import json
+
+from scraper.fastjson import loads
+from scraper.items import ScraperItem
+
 
 class RedditSpider(scrapy.Spider):
     name = "reddit_spider"
@@ -11,18 +14,14 @@ class RedditSpider(scrapy.Spider):
     }
 
     def parse(self, response):
-        data = json.loads(response.text)
-        for post in data['data']['children']:
-            yield {
-                'title': post['data']['title'],
-                'author': post['data']['author'],
-                'score': post['data']['score'],
-                'url': post['data']['url'],
-                'comments': post['data']['num_comments'],
-            }
+        # Parseo directo de bytes (orjson/msgspec si están instalados)
+        data = loads(response.body)['data']
+        from_listing = ScraperItem.from_listing
+        for post in data['children']:
+            yield from_listing(post['data'])
 
         # Paginación
-        after = data['data'].get('after')
+        after = data.get('after')
         if after:
             next_page = f"{response.url.split('?')[0]}?after={after}"
             yield response.follow(next_page, callback=self.parse)
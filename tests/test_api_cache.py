@@ -0,0 +1,158 @@
+# tests/test_api_cache.py
+from fastapi import Request, Response
+
+import app.api.cache as cache_module
+from app.api.cache import CachedBody, LocalLRU, ResponseCache, etag_matches, make_etag
+
+
+def make_request(path="/posts", query=b"", headers=None) -> Request:
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": path,
+        "query_string": query,
+        "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+    })
+
+
+def body(text: str) -> CachedBody:
+    return CachedBody(body=text.encode(), etag=make_etag(text.encode()))
+
+
+# ------------------------------------------------------------------
+# TEST: LRU desaloja la entrada menos usada
+# ------------------------------------------------------------------
+def test_lru_evicts_least_recently_used():
+    lru = LocalLRU(max_entries=2, ttl=60)
+    lru.set("a", body("a"))
+    lru.set("b", body("b"))
+    assert lru.get("a") is not None      # "a" pasa a ser la más reciente
+    lru.set("c", body("c"))
+
+    assert lru.get("b") is None
+    assert lru.get("a").body == b"a"
+    assert lru.get("c").body == b"c"
+
+
+# ------------------------------------------------------------------
+# TEST: TTL del tier local
+# ------------------------------------------------------------------
+def test_lru_ttl_expiry(monkeypatch):
+    lru = LocalLRU(max_entries=10, ttl=30)
+    lru.set("k", body("x"))
+
+    real = cache_module.time.monotonic
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: real() + 31)
+    assert lru.get("k") is None
+
+
+# ------------------------------------------------------------------
+# TEST: ETag / If-None-Match
+# ------------------------------------------------------------------
+def test_etag_matching():
+    etag = make_etag(b"payload")
+    assert etag == make_etag(b"payload") and etag != make_etag(b"other")
+
+    assert etag_matches(make_request(headers={"If-None-Match": etag}), etag)
+    assert etag_matches(make_request(headers={"If-None-Match": f'"x", W/{etag}'}), etag)
+    assert etag_matches(make_request(headers={"If-None-Match": "*"}), etag)
+    assert not etag_matches(make_request(headers={"If-None-Match": '"x"'}), etag)
+    assert not etag_matches(make_request(), etag)
+
+
+async def test_store_then_304():
+    cache = ResponseCache(LocalLRU(10, 60))
+    request = make_request()
+    key = await cache.key_for(request, "fitness")
+
+    first = await cache.store(request, key, Response(content=b'{"ok":1}', media_type="application/json"))
+    assert first.status_code == 200 and first.headers["X-Cache"] == "MISS"
+    etag = first.headers["ETag"]
+
+    cached = await cache.get(key)
+    hit = cache.respond(make_request(), cached, "HIT")
+    assert hit.status_code == 200 and hit.body == b'{"ok":1}'
+
+    not_modified = cache.respond(make_request(headers={"If-None-Match": etag}), cached, "HIT")
+    assert not_modified.status_code == 304 and not_modified.body == b""
+    assert not_modified.headers["ETag"] == etag
+
+
+# ------------------------------------------------------------------
+# TEST: claves normalizadas + invalidación por generación
+# ------------------------------------------------------------------
+async def test_key_normalizes_query_order():
+    cache = ResponseCache(LocalLRU(10, 60))
+    a = await cache.key_for(make_request(query=b"limit=10&offset=0"), "fitness")
+    b = await cache.key_for(make_request(query=b"offset=0&limit=10"), "fitness")
+    assert a == b
+
+
+async def test_invalidate_bumps_only_its_vertical():
+    cache = ResponseCache(LocalLRU(10, 60))
+    request = make_request()
+    fitness = await cache.key_for(request, "fitness")
+    other = await cache.key_for(request, "finance")
+    await cache.set(fitness, body("f"))
+    await cache.set(other, body("o"))
+
+    await cache.invalidate("fitness")
+
+    assert await cache.key_for(request, "fitness") != fitness
+    assert await cache.get(await cache.key_for(request, "fitness")) is None
+    assert (await cache.get(await cache.key_for(request, "finance"))).body == b"o"
+
+
+class FakeShared:
+    """Tier compartido en memoria (lo que ven todos los workers)."""
+
+    def __init__(self):
+        self.values, self.generations = {}, {}
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def set(self, key, value):
+        self.values[key] = value
+
+    async def generation(self, vertical):
+        return self.generations.get(vertical, 0)
+
+    async def bump(self, vertical):
+        self.generations[vertical] = self.generations.get(vertical, 0) + 1
+        return self.generations[vertical]
+
+
+async def test_shared_generation_invalidates_other_workers():
+    shared = FakeShared()
+    worker_a = ResponseCache(LocalLRU(10, 60), shared=shared)
+    worker_b = ResponseCache(LocalLRU(10, 60), shared=shared)
+    request = make_request()
+
+    key = await worker_b.key_for(request, "fitness")
+    await worker_b.set(key, body("stale"))
+    await worker_a.invalidate("fitness")
+
+    new_key = await worker_b.key_for(request, "fitness")
+    assert new_key != key
+    assert await worker_b.get(new_key) is None
+
+
+async def test_disabled_cache_stores_nothing():
+    cache = ResponseCache(LocalLRU(10, 60), enabled=False)
+    await cache.set("k", body("x"))
+    assert await cache.get("k") is None
+
+
+# ------------------------------------------------------------------
+# TEST: tier en disco (diskcache, en un hilo)
+# ------------------------------------------------------------------
+async def test_disk_tier_roundtrip(tmp_path):
+    from app.api.cache import DiskTier
+
+    tier = DiskTier(str(tmp_path), ttl=60)
+    await tier.set("k", body("x"))
+    assert (await tier.get("k")).body == b"x"
+    assert await tier.generation("fitness") == 0
+    assert await tier.bump("fitness") == 1
+    assert await tier.generation("fitness") == 1
@@ -0,0 +1,76 @@
+# tests/test_counts.py
+"""Estrategias de conteo contra Postgres real (DATABASE_URL, con migraciones)."""
+import pytest
+from sqlalchemy import or_, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+import app.db.counts as counts
+from app.core.settings import settings
+from app.db.models_sqlmodel import Post
+
+# filtro constante → "One-Time Filter": el sleep corre aunque la tabla esté vacía
+SLOW_FILTER = text("(SELECT pg_sleep(2)) IS NOT NULL")
+
+
+@pytest.fixture
+async def db():
+    engine = create_async_engine(settings.database_url)
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+    except Exception as e:
+        await engine.dispose()
+        pytest.skip(f"Postgres no disponible: {e}")
+    async with AsyncSession(engine) as session:
+        yield session
+    await engine.dispose()
+
+
+# ------------------------------------------------------------------
+# TEST: exact con timeout del servidor → estimate, sesión usable
+# ------------------------------------------------------------------
+async def test_exact_count_timeout_falls_back_to_estimate(db, monkeypatch):
+    monkeypatch.setattr(counts, "COUNT_TIMEOUT", 0.05)
+    filters = [Post.vertical == "test-counts", SLOW_FILTER]
+
+    result = await counts.count_posts(db, filters, "exact")
+
+    assert result.is_estimate
+    assert result.total >= 0
+    # la transacción sigue viva y sin el statement_timeout del conteo
+    assert await db.scalar(text("SELECT 1")) == 1
+    assert await db.scalar(text("SHOW statement_timeout")) == "0"
+
+
+async def test_exact_count_restores_statement_timeout(db):
+    before = await db.scalar(text("SHOW statement_timeout"))
+
+    result = await counts.count_posts(db, [Post.vertical == "test-counts"], "exact")
+
+    assert result == counts.CountResult(0, False)
+    assert await db.scalar(text("SHOW statement_timeout")) == before
+
+
+# ------------------------------------------------------------------
+# TEST: estimate con `:palabra`, `%` y comillas en los literales
+# ------------------------------------------------------------------
+@pytest.mark.parametrize("q", ["foo :bar", "50% 'off'", "a::text $1"])
+async def test_estimate_count_with_user_literals(db, q):
+    # mismos filtros que build_base_filters (/posts/search?q=...&cluster_id=...)
+    filters = [
+        Post.vertical == "test-counts",
+        or_(Post.title.ilike(f"%{q}%"), Post.body.ilike(f"%{q}%")),
+        Post.cluster_id == "a :b",
+    ]
+
+    result = await counts.count_posts(db, filters, "estimate")
+
+    assert result.is_estimate and result.total >= 0
+
+
+async def test_estimate_count_with_datetime_filter(db):
+    from datetime import datetime, timezone
+
+    filters = [Post.vertical == "test-counts", Post.created_at < datetime(2026, 1, 1, tzinfo=timezone.utc)]
+
+    assert (await counts.count_posts(db, filters, "estimate")).is_estimate
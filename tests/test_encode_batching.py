@@ -0,0 +1,113 @@
+# tests/test_encode_batching.py
+import re
+
+import numpy as np
+import pytest
+
+from app.ml.encode_batching import (
+    PaddingStats,
+    encode_bucketed,
+    fit_to_model,
+    padding_stats,
+    token_budget_batches,
+)
+
+
+class FakeTokenizer:
+    """Un token por palabra + [CLS]/[SEP] con offset (0, 0), como los fast tokenizers."""
+
+    def __call__(self, texts, truncation, max_length, **kwargs):
+        ids, offsets = [], []
+        for text in texts:
+            words = [(m.start(), m.end()) for m in re.finditer(r"\S+", text)][: max_length - 2]
+            ids.append([101] + [1] * len(words) + [102])
+            offsets.append([(0, 0)] + words + [(0, 0)])
+        return {"input_ids": ids, "offset_mapping": offsets}
+
+
+class FakeModel:
+    max_seq_length = 6
+    tokenizer = FakeTokenizer()
+
+    def __init__(self):
+        self.calls = []
+
+    def get_sentence_embedding_dimension(self):
+        return 2
+
+    def encode(self, texts, batch_size, **kwargs):
+        self.calls.append(list(texts))
+        # embedding = (cantidad de palabras, largo en caracteres): fácil de verificar
+        return np.array([[len(t.split()), len(t)] for t in texts], dtype=np.float32)
+
+
+# ------------------------------------------------------------------
+# TEST: invariantes de token_budget_batches
+# ------------------------------------------------------------------
+@pytest.mark.parametrize("seed", range(5))
+def test_token_budget_batches_invariants(seed):
+    rng = np.random.default_rng(seed)
+    lengths = rng.integers(3, 257, size=500).tolist()
+    budget, max_batch = 4096, 64
+
+    batches = token_budget_batches(lengths, budget, max_batch)
+
+    flat = [i for batch in batches for i in batch]
+    assert sorted(flat) == list(range(len(lengths)))          # cada índice exactamente una vez
+    for batch in batches:
+        batch_lengths = [lengths[i] for i in batch]
+        assert len(batch) <= max_batch
+        assert len(batch) * max(batch_lengths) <= budget
+        assert batch_lengths == sorted(batch_lengths, reverse=True)
+    maxima = [lengths[batch[0]] for batch in batches]
+    assert maxima == sorted(maxima, reverse=True)              # de más largo a más corto
+
+
+def test_token_budget_batches_oversized_item_goes_alone():
+    batches = token_budget_batches([10, 500, 10], budget=100, max_batch=8)
+    assert batches == [[1], [0, 2]]
+
+
+def test_token_budget_batches_empty():
+    assert token_budget_batches([], budget=100, max_batch=8) == []
+
+
+def test_padding_stats():
+    stats = padding_stats([[0, 1], [2]], [10, 4, 7])
+    assert (stats.real_tokens, stats.padded_tokens, stats.batches) == (21, 27, 2)
+    assert stats.waste == pytest.approx(1 - 21 / 27)
+
+    total = PaddingStats()
+    total.add(stats)
+    total.add(stats)
+    assert (total.real_tokens, total.padded_tokens, total.batches) == (42, 54, 4)
+    assert PaddingStats().waste == 0.0
+
+
+# ------------------------------------------------------------------
+# TEST: truncado por tokens + reorden al orden de entrada
+# ------------------------------------------------------------------
+def test_fit_to_model_cuts_at_last_fitting_token():
+    fitted, lengths = fit_to_model(FakeTokenizer(), ["a bb ccc dddd eeeee", "hola", ""], max_tokens=5)
+
+    assert fitted == ["a bb ccc", "hola", ""]
+    assert lengths == [5, 3, 2]
+
+
+def test_encode_bucketed_restores_input_order():
+    model = FakeModel()
+    texts = ["uno", "uno dos tres cuatro cinco seis", "uno dos", "x y z"]
+
+    out, stats = encode_bucketed(model, texts, budget=11, max_batch=8)
+
+    # la 2ª se trunca a max_seq_length - 2 = 4 palabras
+    np.testing.assert_array_equal(out[:, 0], [1, 4, 2, 3])
+    assert model.calls == [["uno dos tres cuatro"], ["x y z", "uno dos"], ["uno"]]
+    assert sum(len(c) for c in model.calls) == len(texts)
+    assert stats.real_tokens == 3 + 6 + 4 + 5
+    assert stats.batches == len(model.calls)
+
+
+def test_encode_bucketed_empty():
+    out, stats = encode_bucketed(FakeModel(), [], budget=12, max_batch=8)
+    assert out.shape == (0, 2) and stats.batches == 0
@@ -0,0 +1,136 @@
+# tests/test_export.py
+import base64
+import csv
+import io
+import json
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+
+import numpy as np
+import orjson
+import pytest
+
+import app.api.export as export
+
+COLUMNS = ["pid", "title", "tags", "score", "created_at", "embedding"]
+EMB = np.arange(export.DIM, dtype=np.float32) / export.DIM
+ROWS = [
+    ("p1", "hola, \"mundo\"", ["a", "ñ"], 1.5, datetime(2026, 1, 2, 3, 4, 5, tzinfo=timezone.utc), EMB.tolist()),
+    ("p2", None, None, None, None, None),
+    ("p3", "línea\nnueva", [], 0.0, datetime(2026, 1, 3, tzinfo=timezone.utc), (EMB * 2).tolist()),
+]
+
+
+class FakeResult:
+    def __init__(self, rows, size):
+        self.rows, self.size = rows, size
+
+    async def partitions(self):
+        for i in range(0, len(self.rows), self.size):
+            yield self.rows[i : i + self.size]
+
+
+def fake_session_maker(rows, size=2):
+    class FakeSession:
+        async def stream(self, stmt):
+            return FakeResult(rows, size)
+
+    @asynccontextmanager
+    async def maker():
+        yield FakeSession()
+
+    return maker
+
+
+async def collect(rows, fmt, columns=COLUMNS) -> bytes:
+    chunks = [c async for c in export.stream_export(fake_session_maker(rows), None, columns, fmt)]
+    return b"".join(chunks)
+
+
+def decode_embedding(value: str) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(value), dtype="<f4")
+
+
+# ------------------------------------------------------------------
+# TEST: columnas
+# ------------------------------------------------------------------
+def test_parse_columns():
+    assert export.parse_columns(None) == list(export.DEFAULT_COLUMNS)
+    assert "embedding" not in export.parse_columns("")
+    assert export.parse_columns(" pid, embedding ,pid") == ["pid", "embedding"]
+    with pytest.raises(ValueError):
+        export.parse_columns("pid,password")
+    with pytest.raises(ValueError):
+        export.parse_columns(" , ")
+
+
+# ------------------------------------------------------------------
+# TEST: NDJSON
+# ------------------------------------------------------------------
+async def test_ndjson():
+    body = await collect(ROWS, "ndjson")
+
+    lines = body.decode("utf-8").splitlines()
+    records = [orjson.loads(line) for line in lines]
+    assert [r["pid"] for r in records] == ["p1", "p2", "p3"]
+    assert records[0]["tags"] == ["a", "ñ"]
+    assert records[0]["created_at"] == "2026-01-02T03:04:05Z"
+    np.testing.assert_array_equal(decode_embedding(records[0]["embedding"]), EMB)
+    assert records[1] == {**dict.fromkeys(COLUMNS), "pid": "p2"}
+    assert records[2]["title"] == "línea\nnueva"
+
+
+async def test_ndjson_empty():
+    assert await collect([], "ndjson") == b""
+
+
+# ------------------------------------------------------------------
+# TEST: CSV
+# ------------------------------------------------------------------
+async def test_csv():
+    body = await collect(ROWS, "csv")
+
+    rows = list(csv.reader(io.StringIO(body.decode("utf-8"))))
+    assert rows[0] == COLUMNS
+    assert len(rows) == 4                                  # el \n del título va entre comillas
+    p1, p2, p3 = rows[1:]
+    assert p1[1] == 'hola, "mundo"'
+    assert json.loads(p1[2]) == ["a", "ñ"]
+    assert p1[4] == "2026-01-02T03:04:05+00:00"
+    np.testing.assert_array_equal(decode_embedding(p1[5]), EMB)
+    assert p2 == ["p2", "", "", "", "", ""]
+    assert p3[1] == "línea\nnueva" and p3[2] == "[]"
+
+
+async def test_csv_empty_has_header():
+    assert await collect([], "csv", ["pid", "title"]) == b"pid,title\r\n"
+
+
+# ------------------------------------------------------------------
+# TEST: Arrow IPC (requiere pyarrow)
+# ------------------------------------------------------------------
+async def test_arrow_roundtrip():
+    pa = pytest.importorskip("pyarrow")
+    if not export.USE_ARROW:
+        pytest.skip("pyarrow no importable por app.api.export")
+
+    body = await collect(ROWS, "arrow")
+
+    table = pa.ipc.open_stream(pa.BufferReader(body)).read_all()
+    assert table.schema.names == COLUMNS
+    assert table.schema.field("embedding").type == pa.list_(pa.float32(), export.DIM)
+    assert table.column("pid").to_pylist() == ["p1", "p2", "p3"]
+    assert table.column("tags").to_pylist() == ['["a", "ñ"]', None, "[]"]
+    embeddings = table.column("embedding").to_pylist()
+    np.testing.assert_array_equal(np.asarray(embeddings[0], dtype=np.float32), EMB)
+    assert embeddings[1] is None
+    assert table.column("created_at").to_pylist()[0] == ROWS[0][4]
+
+
+async def test_arrow_empty_has_schema():
+    pa = pytest.importorskip("pyarrow")
+    if not export.USE_ARROW:
+        pytest.skip("pyarrow no importable por app.api.export")
+
+    table = pa.ipc.open_stream(pa.BufferReader(await collect([], "arrow"))).read_all()
+    assert table.num_rows == 0 and table.schema.names == COLUMNS
@@ -0,0 +1,195 @@
+# tests/test_jobs.py
+"""Transiciones de la cola pipeline_jobs contra Postgres real (DATABASE_URL, con migraciones)."""
+import uuid
+
+import pytest
+from sqlalchemy import delete, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.core.settings import settings
+from app.db import jobs
+from app.db.models_jobs import PipelineJob
+
+VERTICAL = "test-jobs"
+WORKER = "test-worker"
+
+
+@pytest.fixture
+async def db():
+    engine = create_async_engine(settings.database_url)
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+    except Exception as e:
+        await engine.dispose()
+        pytest.skip(f"Postgres no disponible: {e}")
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        yield session
+        await session.rollback()
+        await session.execute(delete(PipelineJob).where(PipelineJob.vertical == VERTICAL))
+        await session.commit()
+    await engine.dispose()
+
+
+@pytest.fixture
+def kind():
+    # kind propio por test: claim no ve jobs reales ni de otros tests
+    return f"t-{uuid.uuid4().hex[:12]}"
+
+
+async def get_job(db, kind, key) -> PipelineJob:
+    db.expire_all()
+    return await db.scalar(select(PipelineJob).where(PipelineJob.kind == kind, PipelineJob.key == key))
+
+
+async def claim_one(db, kind) -> PipelineJob:
+    db.expire_all()  # el RETURNING no pisa objetos ya cargados en la sesión
+    [job] = await jobs.claim(db, kind, 1, WORKER, lease_seconds=60)
+    return job
+
+
+# ------------------------------------------------------------------
+# TEST: backoff exponencial → dead al agotar intentos
+# ------------------------------------------------------------------
+async def test_fail_backs_off_then_dead_letters(db, kind, monkeypatch):
+    monkeypatch.setattr(settings, "job_max_attempts", 2)
+    await jobs.enqueue(db, kind, ["a"], VERTICAL)
+    await db.commit()
+
+    job = await claim_one(db, kind)
+    assert job.status == jobs.RUNNING and job.attempts == 1
+    await jobs.fail(db, [job.id], WORKER, "boom")
+    await db.commit()
+
+    job = await get_job(db, kind, "a")
+    assert job.status == jobs.PENDING and job.last_error == "boom"
+    delay = await db.scalar(
+        text("SELECT extract(epoch FROM run_after - now())::float FROM pipeline_jobs WHERE id = :id"),
+        {"id": job.id},
+    )
+    assert delay == pytest.approx(settings.job_backoff_base, abs=2)
+    assert await jobs.claim(db, kind, 1, WORKER, 60) == []    # todavía en backoff
+
+    await db.execute(text("UPDATE pipeline_jobs SET run_after = now() WHERE id = :id"), {"id": job.id})
+    await db.commit()
+    job = await claim_one(db, kind)
+    assert job.attempts == 2
+    await jobs.fail(db, [job.id], WORKER, "boom again")
+    await db.commit()
+
+    job = await get_job(db, kind, "a")
+    assert job.status == jobs.DEAD and job.finished_at is not None
+
+
+async def test_permanent_failure_is_dead_at_once(db, kind):
+    await jobs.enqueue(db, kind, ["a"], VERTICAL)
+    await db.commit()
+    job = await claim_one(db, kind)
+
+    await jobs.fail(db, [job.id], WORKER, "texto vacío", permanent=True)
+    await db.commit()
+
+    assert (await get_job(db, kind, "a")).status == jobs.DEAD
+
+
+async def test_expired_lease_without_attempts_is_dead_lettered(db, kind, monkeypatch):
+    monkeypatch.setattr(settings, "job_max_attempts", 1)
+    await jobs.enqueue(db, kind, ["a"], VERTICAL)
+    await db.commit()
+    job = await claim_one(db, kind)
+    # el worker murió con el job en la mano
+    await db.execute(text("UPDATE pipeline_jobs SET lease_until = now() - interval '1 second' WHERE id = :id"), {"id": job.id})
+    await db.commit()
+
+    assert await jobs.claim(db, kind, 1, WORKER, 60) == []
+    job = await get_job(db, kind, "a")
+    assert job.status == jobs.DEAD and job.last_error == "lease expired"
+
+
+# ------------------------------------------------------------------
+# TEST: re-pedidos de un job (cluster por vertical)
+# ------------------------------------------------------------------
+async def test_request_run_while_running_repends_on_complete(db, kind):
+    await jobs.enqueue(db, kind, [VERTICAL], VERTICAL)
+    await db.commit()
+    job = await claim_one(db, kind)
+
+    assert await jobs.request_run(db, kind, VERTICAL, VERTICAL)
+    await db.commit()
+    assert (await get_job(db, kind, VERTICAL)).rerun_requested
+
+    await jobs.complete(db, [job.id], WORKER, rerun_delay=0)
+    await db.commit()
+    job = await get_job(db, kind, VERTICAL)
+    assert job.status == jobs.PENDING and job.attempts == 0 and not job.rerun_requested
+
+    job = await claim_one(db, kind)
+    await jobs.complete(db, [job.id], WORKER)
+    await db.commit()
+    assert (await get_job(db, kind, VERTICAL)).status == jobs.DONE
+
+
+async def test_request_run_skips_pending_and_reopens_done(db, kind):
+    assert await jobs.request_run(db, kind, VERTICAL, VERTICAL, delay=300)
+    await db.commit()
+    before = await get_job(db, kind, VERTICAL)
+
+    # ya pendiente: no se mueve el debounce
+    assert not await jobs.request_run(db, kind, VERTICAL, VERTICAL, delay=300)
+    await db.commit()
+    assert (await get_job(db, kind, VERTICAL)).run_after == before.run_after
+
+    await db.execute(text("UPDATE pipeline_jobs SET run_after = now() WHERE id = :id"), {"id": before.id})
+    await db.commit()
+    job = await claim_one(db, kind)
+    await jobs.complete(db, [job.id], WORKER)
+    await db.commit()
+    assert await jobs.request_run(db, kind, VERTICAL, VERTICAL)
+    await db.commit()
+    assert (await get_job(db, kind, VERTICAL)).status == jobs.PENDING
+
+
+async def test_claim_orders_by_priority(db, kind):
+    await jobs.enqueue(db, kind, ["old"], VERTICAL, priority=jobs.PRIORITY_BACKFILL)
+    await jobs.enqueue(db, kind, ["fresh"], VERTICAL, priority=jobs.PRIORITY_FRESH)
+    await db.commit()
+
+    claimed = await jobs.claim(db, kind, 2, WORKER, 60)
+
+    assert [j.key for j in claimed] == ["fresh", "old"]
+
+
+# ------------------------------------------------------------------
+# TEST: complete/fail solo sobre jobs running de este worker
+# ------------------------------------------------------------------
+async def test_fail_after_complete_does_not_reopen(db, kind):
+    await jobs.enqueue(db, kind, ["a"], VERTICAL)
+    await db.commit()
+    job = await claim_one(db, kind)
+    assert await jobs.complete(db, [job.id], WORKER) == 1
+    await db.commit()
+
+    # p. ej. un error posterior en el mismo batch
+    assert await jobs.fail(db, [job.id], WORKER, "boom") == 0
+    await db.commit()
+
+    job = await get_job(db, kind, "a")
+    assert job.status == jobs.DONE and job.last_error is None
+
+
+async def test_expired_worker_cannot_touch_new_claim(db, kind):
+    await jobs.enqueue(db, kind, ["a"], VERTICAL)
+    await db.commit()
+    job = await claim_one(db, kind)
+    await db.execute(text("UPDATE pipeline_jobs SET lease_until = now() - interval '1 second' WHERE id = :id"), {"id": job.id})
+    await db.commit()
+    db.expire_all()
+    [reclaimed] = await jobs.claim(db, kind, 1, "other-worker", 60)
+
+    assert await jobs.complete(db, [job.id], WORKER) == 0
+    assert await jobs.fail(db, [job.id], WORKER, "late") == 0
+    await db.commit()
+
+    job = await get_job(db, kind, "a")
+    assert job.status == jobs.RUNNING and job.claimed_by == "other-worker"
+    assert await jobs.complete(db, [reclaimed.id], "other-worker") == 1
@@ -0,0 +1,48 @@
+# tests/test_response_cache.py
+import os
+
+from scraper.response_cache import ResponseCache
+
+
+# ------------------------------------------------------------------
+# TEST: guardar y recuperar
+# ------------------------------------------------------------------
+def test_store_and_load(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    headers = {"Content-Type": ["application/json"]}
+    cache.store("k1", "https://reddit.com/r/x/.json", 200, headers, b'{"data": {}}')
+
+    cached = cache.load("k1")
+    assert cached is not None
+    assert cached.body == b'{"data": {}}'
+    assert cached.status == 200
+    assert cached.headers == headers
+    assert cache.load("missing") is None
+
+
+# ------------------------------------------------------------------
+# TEST: bodies idénticos se guardan una sola vez
+# ------------------------------------------------------------------
+def test_bodies_are_content_addressed(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    cache.store("a", "https://a", 200, {}, b"same body")
+    cache.store("b", "https://b", 200, {}, b"same body")
+
+    objects = [f for _, _, files in os.walk(tmp_path / "objects") for f in files]
+    assert len(objects) == 1
+    assert cache.load("b").url == "https://b"
+
+
+# ------------------------------------------------------------------
+# TEST: TTL (replay ignora la expiración)
+# ------------------------------------------------------------------
+def test_ttl_expiry(tmp_path, monkeypatch):
+    cache = ResponseCache(str(tmp_path), ttl=10)
+    cache.store("k", "https://x", 200, {}, b"body")
+
+    import scraper.response_cache as rc
+    real_time = rc.time.time
+    monkeypatch.setattr(rc.time, "time", lambda: real_time() + 60)
+
+    assert cache.load("k") is None
+    assert cache.load("k", ignore_ttl=True).body == b"body"
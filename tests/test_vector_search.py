@@ -0,0 +1,148 @@
+# tests/test_vector_search.py
+import asyncio
+
+import numpy as np
+import pytest
+
+import app.ml.vector_search as vs
+from app.core.settings import settings
+from app.ml.vector_search import QueryBatcher, VectorEngine
+from app.ml.vector_snapshot import SnapshotWriter, VectorSnapshot
+
+DIM = 16
+
+
+def normalized(rng, n: int) -> np.ndarray:
+    m = rng.standard_normal((n, DIM)).astype(np.float32)
+    return m / np.linalg.norm(m, axis=1, keepdims=True)
+
+
+def make_engine(tmp_path, matrix: np.ndarray, categories=None, name="v") -> VectorEngine:
+    path = tmp_path / f"{name}.vecs"
+    categories = categories or [None] * len(matrix)
+    with SnapshotWriter(path, name, dim=DIM) as w:
+        w.append([f"p{i}" for i in range(len(matrix))], categories, matrix)
+    return VectorEngine(VectorSnapshot.open(path))
+
+
+def exact_top_k(matrix, query, k, mask=None):
+    scores = matrix @ query
+    if mask is not None:
+        scores = np.where(mask, scores, -np.inf)
+    order = np.argsort(-scores, kind="stable")[:k]
+    return order[np.isfinite(scores[order])]
+
+
+# ------------------------------------------------------------------
+# TEST: merge por bloques == argsort completo
+# ------------------------------------------------------------------
+def test_blocked_top_k_matches_argsort(tmp_path, monkeypatch):
+    monkeypatch.setattr(vs, "BLOCK_ROWS", 37)   # varios bloques, el último incompleto
+    rng = np.random.default_rng(0)
+    matrix = normalized(rng, 500)
+    engine = make_engine(tmp_path, matrix)
+    queries = normalized(rng, 4)
+    ks = [1, 10, 37, 600]                      # k > n → todas las filas
+
+    results = engine.search(queries, ks, [None] * len(ks))
+
+    for q, k, (idx, scores) in zip(queries, ks, results):
+        expected = exact_top_k(matrix, q, k)
+        np.testing.assert_array_equal(idx, expected)
+        np.testing.assert_allclose(scores, matrix[expected] @ q, atol=1e-6)
+        assert np.all(np.diff(scores) <= 0)
+
+
+# ------------------------------------------------------------------
+# TEST: máscaras por categoría + tombstones
+# ------------------------------------------------------------------
+def test_category_mask_filters_and_drops_masked(tmp_path, monkeypatch):
+    monkeypatch.setattr(vs, "BLOCK_ROWS", 16)
+    rng = np.random.default_rng(1)
+    matrix = normalized(rng, 60)
+    categories = ["a" if i % 3 == 0 else "b" for i in range(60)]
+    engine = make_engine(tmp_path, matrix, categories)
+    query = normalized(rng, 1)[0]
+
+    mask = engine.mask("a")
+    [(idx, _)] = engine.search(query[None], [50], [mask])
+
+    assert len(idx) == 20                      # solo hay 20 "a": el resto queda afuera
+    assert all(categories[i] == "a" for i in idx)
+    np.testing.assert_array_equal(idx, exact_top_k(matrix, query, 50, mask))
+    assert not engine.mask("nope").any()
+
+
+def test_tombstone_applies_to_existing_masks(tmp_path):
+    rng = np.random.default_rng(2)
+    matrix = normalized(rng, 30)
+    engine = make_engine(tmp_path, matrix, ["a"] * 30)
+    query = matrix[5]
+    by_category = engine.mask("a")             # calculada antes del tombstone
+
+    engine.tombstone([5])
+
+    for mask in (engine.mask(), by_category):
+        [(idx, _)] = engine.search(query[None], [3], [mask])
+        assert 5 not in idx
+
+
+# ------------------------------------------------------------------
+# TEST: QueryBatcher agrupa por motor (una GEMM por motor)
+# ------------------------------------------------------------------
+async def test_batcher_groups_queries_per_engine(tmp_path, monkeypatch):
+    rng = np.random.default_rng(3)
+    engines = [make_engine(tmp_path, normalized(rng, 40), name=n) for n in ("x", "y")]
+    calls = []
+    for engine in engines:
+        original = engine.search
+
+        def search(queries, ks, masks, engine=engine, original=original):
+            calls.append((engine, len(ks)))
+            return original(queries, ks, masks)
+
+        monkeypatch.setattr(engine, "search", search)
+
+    batcher = QueryBatcher(max_batch=100, max_wait=0.01)
+    queries = normalized(rng, 3)
+    results = await asyncio.gather(
+        batcher.search(engines[0], queries[0], 5),
+        batcher.search(engines[1], queries[1], 5),
+        batcher.search(engines[0], queries[2], 7),
+    )
+
+    assert sorted((id(e), n) for e, n in calls) == sorted([(id(engines[0]), 2), (id(engines[1]), 1)])
+    np.testing.assert_array_equal(results[2][0], exact_top_k(engines[0].snapshot.matrix, queries[2], 7))
+
+
+async def test_batcher_flushes_at_max_batch(tmp_path):
+    rng = np.random.default_rng(4)
+    engine = make_engine(tmp_path, normalized(rng, 20))
+    batcher = QueryBatcher(max_batch=2, max_wait=60)   # sin el tope esperaría un minuto
+
+    results = await asyncio.wait_for(
+        asyncio.gather(*(batcher.search(engine, q, 3) for q in normalized(rng, 2))),
+        timeout=5,
+    )
+
+    assert [len(idx) for idx, _ in results] == [3, 3]
+
+
+# ------------------------------------------------------------------
+# TEST: selección de motor
+# ------------------------------------------------------------------
+def test_get_engine_modes(tmp_path, monkeypatch):
+    engine = make_engine(tmp_path, normalized(np.random.default_rng(5), 10))
+    monkeypatch.setattr(vs, "get_snapshot", lambda vertical: engine.snapshot)
+    monkeypatch.setattr(vs, "_engines", {})
+
+    monkeypatch.setattr(settings, "vector_engine", "db")
+    assert vs.get_engine("v") is None
+
+    monkeypatch.setattr(settings, "vector_engine", "numpy")
+    assert vs.get_engine("v").snapshot is engine.snapshot
+    assert vs.get_engine("v") is vs.get_engine("v")      # máscaras reutilizadas
+
+    monkeypatch.setattr(settings, "vector_engine", "auto")
+    monkeypatch.setattr(settings, "vector_engine_max_rows", 5)
+    assert vs.get_engine("v") is None                     # demasiadas filas → SQL
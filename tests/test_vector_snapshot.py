@@ -0,0 +1,101 @@
+# tests/test_vector_snapshot.py
+import numpy as np
+import pytest
+
+from app.ml.vector_snapshot import SnapshotStore, SnapshotWriter, VectorSnapshot, snapshot_path
+
+DIM = 8
+
+
+def write(path, pids, categories, matrix, vertical="v"):
+    with SnapshotWriter(path, vertical, dim=DIM) as w:
+        half = len(pids) // 2               # dos chunks
+        w.append(pids[:half], categories[:half], matrix[:half])
+        w.append(pids[half:], categories[half:], matrix[half:])
+    return w.header
+
+
+# ------------------------------------------------------------------
+# TEST: round trip (matriz, pids, categorías)
+# ------------------------------------------------------------------
+def test_roundtrip(tmp_path):
+    rng = np.random.default_rng(0)
+    matrix = rng.standard_normal((5, DIM)).astype(np.float32)
+    pids = ["a", "ñandú", "", "t3_xyz", "🦀"]
+    categories = ["x", None, "y", "x", None]
+    path = tmp_path / "v.vecs"
+
+    header = write(path, pids, categories, matrix)
+    snap = VectorSnapshot.open(path)
+
+    assert header["version"] == snap.version == 1
+    assert len(snap) == 5 and snap.header["dim"] == DIM
+    np.testing.assert_array_equal(snap.matrix, matrix)
+    assert snap.pids(range(5)) == pids
+    assert snap.category_code("y") == 1 and snap.category_code("z") is None
+    assert snap.categories.tolist() == [0, -1, 1, 0, -1]
+    assert snap.header["sections"]["matrix"] % 4096 == 0
+
+
+def test_empty_snapshot(tmp_path):
+    path = tmp_path / "v.vecs"
+    with SnapshotWriter(path, "v", dim=DIM):
+        pass
+    snap = VectorSnapshot.open(path)
+    assert len(snap) == 0 and snap.matrix.shape == (0, DIM)
+
+
+def test_rejects_wrong_shape_and_keeps_previous(tmp_path):
+    path = tmp_path / "v.vecs"
+    write(path, ["a", "b"], [None, None], np.ones((2, DIM), np.float32))
+
+    with pytest.raises(ValueError):
+        with SnapshotWriter(path, "v", dim=DIM) as w:
+            w.append(["c"], [None], np.ones((1, DIM + 1), np.float32))
+
+    assert VectorSnapshot.open(path).pids([0, 1]) == ["a", "b"]
+    assert [p.name for p in tmp_path.iterdir()] == ["v.vecs"]   # sin .tmp-* colgados
+
+
+# ------------------------------------------------------------------
+# TEST: reemplazo atómico (lectores viejos siguen con su versión)
+# ------------------------------------------------------------------
+def test_atomic_replace_keeps_open_readers(tmp_path):
+    path = tmp_path / "v.vecs"
+    write(path, ["old0", "old1"], [None, None], np.zeros((2, DIM), np.float32))
+    old = VectorSnapshot.open(path)
+
+    header = write(path, ["new0", "new1", "new2"], ["c"] * 3, np.ones((3, DIM), np.float32))
+
+    assert header["version"] == 2
+    assert old.pids([0, 1]) == ["old0", "old1"] and not old.matrix.any()
+    new = VectorSnapshot.open(path)
+    assert len(new) == 3 and new.pid(2) == "new2" and new.matrix.all()
+
+
+def test_store_reopens_replaced_file(tmp_path):
+    store = SnapshotStore(str(tmp_path), check_interval=0)
+    assert store.get("v") is None
+
+    path = snapshot_path(str(tmp_path), "v")
+    write(path, ["a"], [None], np.zeros((1, DIM), np.float32))
+    first = store.get("v")
+    assert first.version == 1 and store.get("v") is first   # sin cambios → misma instancia
+
+    write(path, ["a", "b"], [None, None], np.zeros((2, DIM), np.float32))
+    second = store.get("v")
+    assert second.version == 2 and len(second) == 2
+
+    path.unlink()
+    assert store.get("v") is None
+
+
+def test_store_check_interval_caches(tmp_path):
+    path = snapshot_path(str(tmp_path), "v")
+    write(path, ["a"], [None], np.zeros((1, DIM), np.float32))
+    store = SnapshotStore(str(tmp_path), check_interval=3600)
+    first = store.get("v")
+
+    write(path, ["a", "b"], [None, None], np.zeros((2, DIM), np.float32))
+
+    assert store.get("v") is first          # no revisa el archivo hasta el próximo intervalo